@@ -1,39 +1,148 @@
+import os
+
 import gradio as gr
-from core import save_uploaded_zip, evaluate_zip, parse_response_to_dataframe
-from styler import style_dataframe
+import pandas as pd
+from core import DEFAULT_OUTPUT_ROW, MAX_ARCHIVE_SIZE, uploaded_zip_path, open_zip_files, iter_evaluate_files, parse_findings
+from exporter import RegionResolver, JsonlFindingsWriter, SarifFindingsWriter, new_export_dir
+from results_view import ResultsView, RESULT_COLUMNS
+from scheduler import ScanBudget
+from zip_processor import UnsafeZipError
+
+SORT_COLUMNS = ["Severity", "Type", "Weakness", "File"]
+
+
+def page_info(view: ResultsView, number: int) -> str:
+    """
+    Formats the pagination label for the current view.
+    """
+    return f"Page {number} of {view.page_count} ({len(view)} issues)"
+
+
+def render(view: ResultsView | None, number: int):
+    """
+    Renders one page of the view, returning the HTML, page number and label.
+    """
+    if view is None:
+        return "", 1, ""
 
+    number = min(max(1, int(number or 1)), view.page_count)
+    return view.render_page(number), number, page_info(view, number)
 
-def process_zip_and_display(zip_file) -> gr.Dataframe:
+
+def scan_report(budget: ScanBudget, done: bool) -> str:
+    """
+    Formats the progress of the evaluation and the files left unscanned.
+    """
+    report = budget.report()
+    status = "Scanned" if done else "Scanning, riskiest files first:"
+    text = f"{status} {report['scanned_files']} files in {report['seconds']:.0f}s ({report['tokens']} tokens)."
+    if done and report["unscanned"]:
+        files = ", ".join(f"`{item['file']}`" for item in report["unscanned"][:20])
+        more = len(report["unscanned"]) - 20
+        text += f" {len(report['unscanned'])} lower-risk files were left unscanned by the budget: {files}"
+        text += f" and {more} more." if more > 0 else "."
+    return text
+
+
+def process_zip_and_display(zip_file, time_budget):
     """
-    Processes the uploaded ZIP file, evaluates it using the LLM,
-    parses the response, and returns a styled DataFrame.
+    Processes the uploaded ZIP file, evaluates it using the LLM riskiest
+    chunks first, and streams the results view after every chunk, together
+    with the available filter values. The findings of each chunk are appended
+    to the view, and the filters and page chosen meanwhile are kept. A time
+    budget (in seconds) skips the lower-risk chunks that no longer fit.
     """
     if not zip_file:
-        return gr.update(value=[], headers=[])
+        yield (None, "", gr.update(choices=[]), gr.update(choices=[]), gr.update(choices=[]), 1, "", None, "")
+        return
 
-    tmp_path = save_uploaded_zip(zip_file)
-    llm_response = evaluate_zip(tmp_path)
+    export_dir = new_export_dir()
+    exports = [os.path.join(export_dir, "findings.sarif"), os.path.join(export_dir, "findings.jsonl")]
+    budget = ScanBudget(seconds=time_budget or None)
+    # The time budget counts from the request, extraction included
+    budget.start()
+    # Shared with update_view through the state, which filters and sorts it
+    view = ResultsView(pd.DataFrame(columns=RESULT_COLUMNS))
+    view.apply(sort_by="Severity")
 
-    # Defensive fallback
-    if isinstance(llm_response, list):
-        return gr.update(value=llm_response, headers=["Error"])
+    def outputs(done: bool, first: bool = False):
+        if done and len(view.df) == 0:
+            view.extend(pd.DataFrame([DEFAULT_OUTPUT_ROW]))
+        options = view.filter_options()
+        # Only a new scan resets the filter values and the page
+        reset = {"value": []} if first else {}
 
-    parsed_df = parse_response_to_dataframe(llm_response)
-    styled_df = style_dataframe(parsed_df)
-    return styled_df
+        html, number, info = render(view, view.current_page)
+        return (
+            view,
+            html,
+            gr.update(choices=options.get("Type", []), **reset),
+            gr.update(choices=options.get("Severity", []), **reset),
+            gr.update(choices=options.get("File", []), **reset),
+            number if first else gr.update(),
+            info,
+            exports if done else None,
+            scan_report(budget, done),
+        )
+
+    yield outputs(done=False, first=True)
+
+    # Findings are exported and shown as each chunk finishes. Archive members
+    # are read lazily, so the whole scan runs inside the limits handler.
+    try:
+        with open_zip_files(uploaded_zip_path(zip_file)) as code_files:
+            resolver = RegionResolver(code_files)
+            with SarifFindingsWriter(exports[0], resolver) as sarif, \
+                    JsonlFindingsWriter(exports[1], resolver) as jsonl:
+                for chunk, llm_response in iter_evaluate_files(code_files, budget=budget):
+                    # Indexed while the chunk content is still loaded
+                    resolver.add(chunk.files)
+                    findings = parse_findings(llm_response)
+                    sarif.write(findings)
+                    jsonl.write(findings)
+                    view.extend(pd.DataFrame(findings))
+                    yield outputs(done=False)
+    except UnsafeZipError as e:
+        raise gr.Error(f"The uploaded ZIP was rejected: {e}")
+
+    yield outputs(done=True)
+
+
+def update_view(view, types, severities, files, sort_by, reverse):
+    """
+    Re-filters and re-sorts the stored results and renders the first page.
+    """
+    if view is None:
+        return render(view, 1)
+
+    view.apply(
+        filters={"Type": types, "Severity": severities, "File": files},
+        sort_by=sort_by,
+        ascending=not reverse,
+    )
+    return render(view, 1)
 
 
 def clear_inputs():
     """
-    Clears the uploaded ZIP file and resets the DataFrame output.
-    Sends a dummy row to reset scroll/width behavior.
+    Clears the uploaded ZIP file and resets the results view.
     """
-    headers = ["Type", "Weakness", "Severity", "File", "Code", "Justification"]
-    dummy = [[""] * len(headers)]
-    return None, gr.update(value=dummy, headers=headers)
+    return (
+        None,
+        None,
+        "",
+        gr.update(choices=[], value=[]),
+        gr.update(choices=[], value=[]),
+        gr.update(choices=[], value=[]),
+        1,
+        "",
+        None,
+        "",
+    )
 
 
-with gr.Blocks() as demo:
+# Uploads are processed in place; Gradio deletes cached uploads older than an hour
+with gr.Blocks(delete_cache=(600, 3600)) as demo:
     gr.Markdown("# Source Code LLM ISO 5055 Evaluation 🤖")
     gr.Markdown(
         "### Upload a ZIP file containing source code for analysis based on ISO/IEC 5055:2021 using an LLM."
@@ -45,26 +154,75 @@ with gr.Blocks() as demo:
         " The supported languages are: Python, Java, C, C++, JavaScript, TypeScript, Go, Ruby, PHP, Swift, Kotlin, Rust."
     )
 
+    # Results are kept server-side; only the visible page is sent to the browser
+    view_state = gr.State(None)
+
     # File upload
     zip_input = gr.File(label="Upload ZIP File", file_types=[".zip"])
 
+    # Zero scans the whole project
+    time_budget = gr.Number(label="Time budget (seconds, 0 for no limit)", value=0, minimum=0, precision=0)
+
     # Action buttons in a row below the input
     with gr.Row():
         upload_btn = gr.Button("Upload & Evaluate", variant="primary")
         clear_btn = gr.Button("Clear")
 
-    # Output DataFrame
-    df_output = gr.Dataframe(
-        label="LLM Evaluation Results",
-        interactive=False,
-        headers=["Type", "Weakness", "Severity", "File", "Code", "Justification"],
-        value=[],
-    )
+    # Filters and sorting
+    with gr.Row():
+        type_filter = gr.Dropdown(label="Type", choices=[], multiselect=True)
+        severity_filter = gr.Dropdown(label="Severity", choices=[], multiselect=True)
+        file_filter = gr.Dropdown(label="File", choices=[], multiselect=True)
+        sort_by = gr.Dropdown(label="Sort by", choices=SORT_COLUMNS, value="Severity")
+        reverse = gr.Checkbox(label="Reverse order", value=False)
+
+    # Output table (one page)
+    results_html = gr.HTML(label="LLM Evaluation Results")
+
+    # Pagination
+    with gr.Row():
+        prev_btn = gr.Button("◀ Previous")
+        page_number = gr.Number(label="Page", value=1, precision=0, minimum=1)
+        next_btn = gr.Button("Next ▶")
+    page_label = gr.Markdown()
+    scan_label = gr.Markdown()
+
+    # Findings export
+    download = gr.File(label="Download findings (SARIF / JSONL)", file_count="multiple", interactive=False)
 
     # Upload button event
-    upload_btn.click(fn=process_zip_and_display, inputs=zip_input, outputs=df_output)
+    upload_btn.click(
+        fn=process_zip_and_display,
+        inputs=[zip_input, time_budget],
+        outputs=[view_state, results_html, type_filter, severity_filter, file_filter, page_number, page_label, download, scan_label],
+    )
+
+    # Filter and sort events
+    for control in (type_filter, severity_filter, file_filter, sort_by, reverse):
+        control.change(
+            fn=update_view,
+            inputs=[view_state, type_filter, severity_filter, file_filter, sort_by, reverse],
+            outputs=[results_html, page_number, page_label],
+        )
+
+    # Pagination events
+    page_number.submit(fn=render, inputs=[view_state, page_number], outputs=[results_html, page_number, page_label])
+    prev_btn.click(
+        fn=lambda view, number: render(view, (number or 1) - 1),
+        inputs=[view_state, page_number],
+        outputs=[results_html, page_number, page_label],
+    )
+    next_btn.click(
+        fn=lambda view, number: render(view, (number or 1) + 1),
+        inputs=[view_state, page_number],
+        outputs=[results_html, page_number, page_label],
+    )
 
     # Clear button event
-    clear_btn.click(fn=clear_inputs, inputs=[], outputs=[zip_input, df_output])
+    clear_btn.click(
+        fn=clear_inputs,
+        inputs=[],
+        outputs=[zip_input, view_state, results_html, type_filter, severity_filter, file_filter, page_number, page_label, download, scan_label],
+    )
 
-demo.launch(share=True)
+demo.launch(share=True, max_file_size=MAX_ARCHIVE_SIZE)
@@ -0,0 +1,362 @@
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import time
+import traceback
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cascade import call_evaluator
+
+logger = logging.getLogger("batch_scan")
+logger.setLevel(logging.INFO)
+if not logger.hasHandlers():
+    handler = logging.StreamHandler()
+    formatter = logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+STATUS_FILE = "status.json"
+SUMMARY_FILE = "summary.json"
+
+# Shared LLM concurrency budget, set in every worker by init_worker
+_llm_budget = None
+
+
+class BudgetedEvaluator:
+    def __init__(self, evaluator, budget, retries: int = 3, backoff: float = 10.0) -> None:
+        """
+        Wrap an evaluator so that calls across all worker processes share a
+        global concurrency budget, retrying failed calls with exponential backoff.
+        :param evaluator: evaluator exposing evaluate(input_variables=...)
+        :param budget: semaphore shared between processes, or None for no limit
+        :param retries: int, retries per call after the first attempt
+        :param backoff: float, initial wait in seconds between retries
+        """
+        self.evaluator = evaluator
+        self.model = evaluator.model
+        self.system_prompt = evaluator.system_prompt
+        self.budget = budget
+        self.retries: int = retries
+        self.backoff: float = backoff
+
+    def evaluate(self, input_variables: dict[str, str]) -> str:
+        return self.call(input_variables)[0]
+
+    def call(self, input_variables: dict[str, str], max_output_tokens: int | None = None) -> tuple[str, dict, str | None]:
+        """
+        Send a request within the budget, with retries.
+        :return: tuple of the response, its token usage and its finish reason
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                if self.budget is None:
+                    return call_evaluator(self.evaluator, input_variables, max_output_tokens)
+                with self.budget:
+                    return call_evaluator(self.evaluator, input_variables, max_output_tokens)
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                wait = self.backoff * 2 ** attempt
+                logger.warning(f"LLM call failed ({e}), retrying in {wait:.0f}s")
+                time.sleep(wait)
+
+
+def target_kind(target: str) -> str:
+    """
+    Classifies a scan target.
+
+    Args:
+        target (str): ZIP path, directory or 'owner/repo'.
+
+    Returns:
+        str: "zip", "directory" or "github".
+    """
+    if os.path.isdir(target):
+        return "directory"
+    if os.path.isfile(target) and target.lower().endswith(".zip"):
+        return "zip"
+    if re.fullmatch(r"[\w.-]+/[\w.-]+", target):
+        return "github"
+    raise ValueError(f"Unknown target {target!r}: expected a ZIP, a directory or owner/repo")
+
+
+def report_dir_name(target: str) -> str:
+    """
+    Builds a stable, filesystem-safe report directory name for a target.
+
+    Args:
+        target (str): Scan target.
+
+    Returns:
+        str: Directory name.
+    """
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "_", target.rstrip("/\\"))[-60:].strip("_")
+    digest = hashlib.sha1(target.encode("utf-8")).hexdigest()[:8]
+    return f"{slug}-{digest}"
+
+
+def write_json_atomic(path: str, data: dict) -> None:
+    """
+    Writes JSON through a temporary file and a rename, so a crash never
+    leaves a half-written file behind.
+
+    Args:
+        path (str): Destination path.
+        data (dict): Data to write.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_status(report_dir: str) -> dict | None:
+    path = os.path.join(report_dir, STATUS_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def init_worker(budget) -> None:
+    """
+    Process pool initializer: stores the shared LLM budget in the worker and
+    builds its model clients before the first project, so that every project
+    of the worker reuses the same open connections.
+    """
+    global _llm_budget
+    _llm_budget = budget
+
+    from core import warmup_evaluators
+
+    warmup_evaluators(verbose=False)
+
+
+def scan_project(
+    target: str,
+    report_dir: str,
+    verbose: bool = False,
+    time_budget: float | None = None,
+    token_budget: int | None = None,
+) -> dict:
+    """
+    Scans one project and writes its SARIF/JSONL report and status file.
+    Runs inside a worker process.
+
+    Args:
+        target (str): ZIP path, directory or 'owner/repo'.
+        report_dir (str): Directory receiving the project report.
+        verbose (bool): Whether to print processing info.
+        time_budget (float): Seconds per project; lower-risk chunks beyond it are skipped.
+        token_budget (int): Tokens per project; lower-risk chunks beyond it are skipped.
+
+    Returns:
+        dict: The project status.
+    """
+    # Imported here so that the parent process never configures the LLM SDK
+    from core import (
+        get_evaluator,
+        iter_evaluate_files,
+        load_directory_files,
+        load_github_files,
+        open_zip_files,
+        parse_findings,
+    )
+    from exporter import JsonlFindingsWriter, RegionResolver, SarifFindingsWriter
+    from scheduler import ScanBudget
+
+    os.makedirs(report_dir, exist_ok=True)
+    start = time.time()
+    status = {"target": target, "status": "running", "started": start}
+    # The time budget counts from the request, loading included
+    budget = ScanBudget(seconds=time_budget, tokens=token_budget)
+    budget.start()
+
+    try:
+        kind = target_kind(target)
+        # The archive stays open for the lazy file contents until the scan ends
+        with ExitStack() as stack:
+            if kind == "zip":
+                code_files = stack.enter_context(open_zip_files(target, verbose))
+            elif kind == "directory":
+                code_files = load_directory_files(target, verbose)
+            else:
+                code_files = load_github_files(target, verbose)
+
+            evaluator = BudgetedEvaluator(get_evaluator(), _llm_budget)
+            resolver = RegionResolver(code_files)
+            chunks = 0
+
+            sarif = stack.enter_context(SarifFindingsWriter(os.path.join(report_dir, "findings.sarif"), resolver))
+            jsonl = stack.enter_context(JsonlFindingsWriter(os.path.join(report_dir, "findings.jsonl"), resolver))
+            for chunk, response in iter_evaluate_files(code_files, verbose=verbose, evaluator=evaluator, budget=budget):
+                # Indexed while the chunk content is still loaded
+                resolver.add(chunk.files)
+                findings = parse_findings(response)
+                sarif.write(findings)
+                jsonl.write(findings)
+                chunks += 1
+
+        status.update(
+            status="done",
+            kind=kind,
+            files=len(code_files),
+            chunks=chunks,
+            findings=jsonl.count,
+            tokens=budget.used_tokens,
+            unscanned=budget.report()["unscanned"],
+        )
+    except Exception as e:
+        status.update(status="failed", error=str(e), traceback=traceback.format_exc())
+
+    status["seconds"] = time.time() - start
+    write_json_atomic(os.path.join(report_dir, STATUS_FILE), status)
+    return status
+
+
+def write_summary(out_dir: str, targets: list[str]) -> dict:
+    """
+    Aggregates the status files of all targets into summary.json.
+
+    Args:
+        out_dir (str): Output directory.
+        targets (list[str]): Scan targets.
+
+    Returns:
+        dict: The summary.
+    """
+    projects = []
+    for target in targets:
+        status = read_status(os.path.join(out_dir, report_dir_name(target)))
+        projects.append(status or {"target": target, "status": "pending"})
+
+    summary = {
+        "projects": len(projects),
+        "done": sum(1 for p in projects if p["status"] == "done"),
+        "failed": sum(1 for p in projects if p["status"] == "failed"),
+        "pending": sum(1 for p in projects if p["status"] not in ("done", "failed")),
+        "findings": sum(p.get("findings", 0) for p in projects),
+        "seconds": sum(p.get("seconds", 0.0) for p in projects),
+        "unscanned_files": sum(len(p.get("unscanned", [])) for p in projects),
+        "results": [
+            {key: value for key, value in p.items() if key not in ("traceback", "unscanned")}
+            | {"report": report_dir_name(p["target"])}
+            for p in projects
+        ],
+    }
+    write_json_atomic(os.path.join(out_dir, SUMMARY_FILE), summary)
+    return summary
+
+
+def run_batch(
+    targets: list[str],
+    out_dir: str,
+    workers: int = 4,
+    llm_concurrency: int = 4,
+    retry_failed: bool = False,
+    verbose: bool = False,
+    time_budget: float | None = None,
+    token_budget: int | None = None,
+) -> dict:
+    """
+    Scans many projects over a process pool. Projects already reported as
+    done in out_dir are skipped, so an interrupted batch can be restarted.
+
+    Args:
+        targets (list[str]): ZIP paths, directories or 'owner/repo' names.
+        out_dir (str): Output directory for reports and the summary.
+        workers (int): Number of worker processes.
+        llm_concurrency (int): Maximum concurrent LLM calls across all workers.
+        retry_failed (bool): Whether to rescan projects that previously failed.
+        verbose (bool): Whether to print processing info in workers.
+        time_budget (float): Seconds per project (default no limit).
+        token_budget (int): Tokens per project (default no limit).
+
+    Returns:
+        dict: The batch summary.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    targets = list(dict.fromkeys(targets))
+
+    pending = []
+    for target in targets:
+        status = read_status(os.path.join(out_dir, report_dir_name(target)))
+        if status and (status["status"] == "done" or (status["status"] == "failed" and not retry_failed)):
+            continue
+        pending.append(target)
+
+    logger.info(f"{len(targets) - len(pending)} projects already scanned, {len(pending)} to go")
+
+    budget = multiprocessing.get_context().BoundedSemaphore(llm_concurrency)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(budget,)) as pool:
+        futures = {
+            pool.submit(
+                scan_project,
+                target,
+                os.path.join(out_dir, report_dir_name(target)),
+                verbose,
+                time_budget,
+                token_budget,
+            ): target
+            for target in pending
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            target = futures[future]
+            try:
+                status = future.result()
+                logger.info(f"[{done}/{len(pending)}] {target}: {status['status']}")
+            except Exception as e:
+                # The worker process died; the project stays pending for the next run
+                logger.error(f"[{done}/{len(pending)}] {target}: worker crashed ({e})")
+            write_summary(out_dir, targets)
+
+    return write_summary(out_dir, targets)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Scan many projects with the LLM evaluator.")
+    parser.add_argument("targets", nargs="*", help="ZIP files, directories or owner/repo names.")
+    parser.add_argument("--targets-file", help="File with one target per line.")
+    parser.add_argument("--out", required=True, help="Output directory for reports.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes.")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="Concurrent LLM calls across workers.")
+    parser.add_argument("--retry-failed", action="store_true", help="Rescan previously failed projects.")
+    parser.add_argument("--time-budget", type=float, help="Seconds per project; lower-risk chunks beyond it are skipped.")
+    parser.add_argument("--token-budget", type=int, help="Tokens per project; lower-risk chunks beyond it are skipped.")
+    parser.add_argument("--verbose", action="store_true", help="Log per-file progress.")
+    args = parser.parse_args(argv)
+
+    targets = list(args.targets)
+    if args.targets_file:
+        with open(args.targets_file, "r", encoding="utf-8") as file:
+            targets.extend(line.strip() for line in file if line.strip() and not line.startswith("#"))
+
+    if not targets:
+        parser.error("no targets given")
+
+    summary = run_batch(
+        targets,
+        args.out,
+        workers=args.workers,
+        llm_concurrency=args.llm_concurrency,
+        retry_failed=args.retry_failed,
+        verbose=args.verbose,
+        time_budget=args.time_budget,
+        token_budget=args.token_budget,
+    )
+    logger.info(
+        f"Done: {summary['done']}, failed: {summary['failed']}, pending: {summary['pending']}, "
+        f"findings: {summary['findings']}"
+    )
+    return 0 if summary["failed"] == 0 and summary["pending"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
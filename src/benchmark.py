@@ -0,0 +1,572 @@
+import argparse
+import contextlib
+import gc
+import io
+import json
+import logging
+import math
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+
+from core import MODEL_REGISTRY, build_model_evaluator, parse_xml, send_code_to_llm, SUPPORTED_EXTENSIONS
+from file import File
+from results_view import ResultsView
+from snippet_index import SnippetIndex
+from styler import style_dataframe
+from test_case_data_load import read_all_test_cases
+from test_core import fuzzy_substring_match, check_response
+from zip_processor import ZipFileProcessor
+
+BENCHMARK_DIR = Path("analysis/benchmarks")
+BASELINE_PATH = BENCHMARK_DIR / "baseline.json"
+
+# Allowed relative slowdown (or memory growth) before a case is a regression
+DEFAULT_TOLERANCE = 0.25
+
+# Iterations of the calibration loop that throughputs are normalized by
+CALIBRATION_OPERATIONS = 500_000
+
+# Minimum duration of a timed run; faster cases are called repeatedly within
+# a run, so that timer resolution and scheduling noise stay small
+MIN_RUN_SECONDS = 0.2
+
+# Times the groups with a regression are run again before it is reported;
+# each case keeps its fastest run, so one slow moment of a shared machine
+# does not fail the comparison
+CONFIRM_RUNS = 2
+
+# Runs a new baseline is recorded from; each case keeps its median run, so
+# a single lucky run does not set a bar later runs cannot reach
+BASELINE_RUNS = 3
+
+SEED = 5055
+
+FULL_SIZES = {
+    "zip_processor": [100, 1_000, 10_000, 50_000],
+    "parse_xml": [10, 100, 1_000, 5_000],
+    "check_response": [10, 100, 1_000],
+    "read_all_test_cases": [10, 100, 500],
+    "style_dataframe": [100, 1_000, 10_000],
+    "results_view": [100, 1_000, 10_000, 100_000],
+    "snippet_index": [1_000, 10_000, 100_000, 500_000],
+    "model_clients": [10, 100, 1_000],
+}
+
+QUICK_SIZES = {
+    "zip_processor": [100, 1_000],
+    "parse_xml": [10, 100],
+    "check_response": [10, 100],
+    "read_all_test_cases": [10, 100],
+    "style_dataframe": [100, 1_000],
+    "results_view": [100, 1_000],
+    "snippet_index": [1_000, 10_000],
+    "model_clients": [10, 100],
+}
+
+SAMPLE_LINES = [
+    '$query = "SELECT * FROM users WHERE name = \'" . $_GET["name"] . "\'";',
+    'string query = "SELECT * FROM users WHERE id = " + userId;',
+    "echo '<div style=\"' . $tainted . '\">content</div>';",
+    "var password = ConfigurationManager.AppSettings[\"password\"];",
+    "Process.Start(\"cmd.exe\", \"/c \" + userInput);",
+    "$file = fopen($_POST['path'], 'r');",
+    "byte[] buffer = new byte[size]; stream.Read(buffer, 0, size + 1);",
+    "if (user != null) { return user.Name; } return user.Email;",
+]
+
+logger = logging.getLogger("benchmark")
+logger.setLevel(logging.INFO)
+if not logger.hasHandlers():
+    handler = logging.StreamHandler()
+    formatter = logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+
+def make_source_file(rng: random.Random, lines: int = 40) -> str:
+    """
+    Generates a synthetic source file built from realistic vulnerable lines.
+
+    Args:
+        rng (random.Random): Seeded random generator.
+        lines (int): Number of lines in the file.
+
+    Returns:
+        str: Synthetic source code.
+    """
+    body = [rng.choice(SAMPLE_LINES) for _ in range(lines)]
+    return "\n".join(["<?php", "// synthetic benchmark file"] + body)
+
+
+def make_synthetic_zip(path: Path, file_count: int, rng: random.Random) -> Path:
+    """
+    Writes a ZIP archive with a mix of source and non-source members.
+
+    Args:
+        path (Path): Destination ZIP path.
+        file_count (int): Number of members in the archive.
+        rng (random.Random): Seeded random generator.
+
+    Returns:
+        Path: The written ZIP path.
+    """
+    extensions = [ext.lstrip(".") for ext in SUPPORTED_EXTENSIONS] + ["md", "png", "json"]
+
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zip_ref:
+        for i in range(file_count):
+            extension = rng.choice(extensions)
+            zip_ref.writestr(
+                f"project/module_{i % 97}/file_{i}.{extension}",
+                make_source_file(rng, lines=rng.randint(5, 60)),
+            )
+
+    return path
+
+
+def make_llm_response(issue_count: int, rng: random.Random) -> str:
+    """
+    Generates an XML LLM response in the format requested by SYSTEM_PROMPT.
+
+    Args:
+        issue_count (int): Number of <Issue> elements.
+        rng (random.Random): Seeded random generator.
+
+    Returns:
+        str: Synthetic LLM response.
+    """
+    issues = []
+    for i in range(issue_count):
+        code = "\n".join(rng.choice(SAMPLE_LINES) for _ in range(rng.randint(1, 30)))
+        issues.append(
+            "  <Issue>\n"
+            f"    <Type>{rng.choice(['Security', 'Reliability', 'Maintainability'])}</Type>\n"
+            f"    <Weakness>CWE-{rng.choice([79, 89, 78, 22, 476])}</Weakness>\n"
+            "    <Description>Synthetic weakness &amp; description</Description>\n"
+            f"    <Severity>{rng.choice(['Critical', 'High', 'Medium', 'Low'])}</Severity>\n"
+            f"    <File>file_{i}.php</File>\n"
+            f"    <Code>{code.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')}</Code>\n"
+            "    <Justification>Untrusted data reaches a sensitive sink.</Justification>\n"
+            "  </Issue>"
+        )
+    return "```xml\n<Issues>\n" + "\n".join(issues) + "\n</Issues>\n```"
+
+
+def make_sard_tree(base_dir: Path, case_count: int, rng: random.Random) -> Path:
+    """
+    Writes a SARD-like test case tree: one directory per case with a SARIF
+    manifest and a single source file under 'src/'.
+
+    Args:
+        base_dir (Path): Root directory of the tree.
+        case_count (int): Number of test case directories.
+        rng (random.Random): Seeded random generator.
+
+    Returns:
+        Path: The tree root.
+    """
+    for i in range(case_count):
+        case_dir = base_dir / f"case_{i:05d}"
+        (case_dir / "src").mkdir(parents=True)
+        source = make_source_file(rng, lines=rng.randint(20, 120))
+        file_name = f"src/CWE_89__case_{i}.php"
+        (case_dir / file_name).write_text(source)
+
+        sarif = {
+            "runs": [{
+                "results": [{
+                    "ruleId": "CWE-89",
+                    "locations": [{
+                        "physicalLocation": {
+                            "artifactLocation": {"uri": file_name},
+                            "region": {"startLine": rng.randint(3, 20)},
+                        }
+                    }],
+                }]
+            }]
+        }
+        (case_dir / "manifest.sarif").write_text(json.dumps(sarif))
+
+    return base_dir
+
+
+def make_results_frame(row_count: int, rng: random.Random) -> pd.DataFrame:
+    """
+    Generates a DataFrame shaped like parse_response_to_dataframe output.
+
+    Args:
+        row_count (int): Number of issues.
+        rng (random.Random): Seeded random generator.
+
+    Returns:
+        pd.DataFrame: Synthetic results.
+    """
+    return pd.DataFrame(parse_xml(make_llm_response(row_count, rng)))
+
+
+def measure(fn, items: int, repeat: int = 5, min_seconds: float = MIN_RUN_SECONDS) -> dict:
+    """
+    Measures best-of-N wall time and peak traced memory of a callable.
+
+    A first untimed call sets how many calls each timed run makes, so that
+    every run lasts at least min_seconds; the time per call is the run time
+    divided by that count. Timing runs are not traced, since tracemalloc
+    distorts timings; one extra traced call records the peak Python
+    allocation.
+
+    Args:
+        fn: Zero-argument callable to benchmark.
+        items (int): Number of items processed per call, for throughput.
+        repeat (int): Number of timed runs.
+        min_seconds (float): Minimum duration of a timed run.
+
+    Returns:
+        dict: seconds, items_per_second and peak_memory_mb.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    fn()
+    first = time.perf_counter() - start
+    calls = max(1, math.ceil(min_seconds / first)) if first > 0 else 1000
+
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        timings.append((time.perf_counter() - start) / calls)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        "items": items,
+        "seconds": best,
+        "items_per_second": items / best if best > 0 else float("inf"),
+        "peak_memory_mb": peak / (1024 * 1024),
+    }
+
+
+def calibrate(repeat: int = 5) -> float:
+    """
+    Measures the speed of a fixed pure-Python loop on this machine, right now.
+    Throughputs are divided by it, so that a baseline recorded on another
+    machine, or under a different load, stays comparable.
+
+    Args:
+        repeat (int): Number of timed runs; the best one is kept.
+
+    Returns:
+        float: Loop iterations per second.
+    """
+    def loop():
+        total = 0
+        for i in range(CALIBRATION_OPERATIONS):
+            total += i * i % 7
+        return total
+
+    return measure(loop, items=CALIBRATION_OPERATIONS, repeat=repeat)["items_per_second"]
+
+
+def bench_zip_processor(sizes: list[int], work_dir: Path, rng: random.Random) -> dict:
+    results = {}
+    for size in sizes:
+        zip_path = make_synthetic_zip(work_dir / f"synthetic_{size}.zip", size, rng)
+        processor = ZipFileProcessor(zip_file_path=str(zip_path), logger=logger)
+        results[f"zip_processor[{size}]"] = measure(
+            lambda: [
+                file.content
+                for file in processor.get_all_files(allowed_extensions=list(SUPPORTED_EXTENSIONS))
+            ],
+            items=size,
+            repeat=1 if size > 10_000 else 3,
+        )
+    return results
+
+
+def bench_parse_xml(sizes: list[int], work_dir: Path, rng: random.Random) -> dict:
+    results = {}
+    for size in sizes:
+        response = make_llm_response(size, rng)
+        results[f"parse_xml[{size}]"] = measure(lambda: parse_xml(response), items=size)
+    return results
+
+
+def bench_check_response(sizes: list[int], work_dir: Path, rng: random.Random) -> dict:
+    results = {}
+    for size in sizes:
+        response_df = make_results_frame(size, rng)
+        test_case = {
+            "Weakness": "CWE-",
+            "Line": rng.choice(SAMPLE_LINES),
+            "File": "synthetic.php",
+        }
+
+        def run():
+            with contextlib.redirect_stdout(io.StringIO()):
+                check_response(response_df, test_case)
+
+        results[f"check_response[{size}]"] = measure(run, items=size)
+
+        lines = [rng.choice(SAMPLE_LINES) for _ in range(size)]
+        # A reversed line never matches, so every window is compared
+        needle = rng.choice(SAMPLE_LINES)[::-1]
+        results[f"fuzzy_substring_match[{size}]"] = measure(
+            lambda: [fuzzy_substring_match(needle, line, 0.8) for line in lines],
+            items=size,
+        )
+    return results
+
+
+def bench_read_all_test_cases(sizes: list[int], work_dir: Path, rng: random.Random) -> dict:
+    results = {}
+    for size in sizes:
+        tree = make_sard_tree(work_dir / f"sard_{size}", size, rng)
+
+        def run():
+            random.seed(SEED)
+            with contextlib.redirect_stdout(io.StringIO()):
+                read_all_test_cases(tree, max_dirs=size)
+
+        results[f"read_all_test_cases[{size}]"] = measure(run, items=size)
+    return results
+
+
+def bench_style_dataframe(sizes: list[int], work_dir: Path, rng: random.Random) -> dict:
+    results = {}
+    for size in sizes:
+        df = make_results_frame(size, rng)
+        # Styler is lazy; rendering is what Gradio pays for
+        results[f"style_dataframe[{size}]"] = measure(
+            lambda: style_dataframe(df).to_html(), items=size, repeat=1
+        )
+    return results
+
+
+def bench_results_view(sizes: list[int], work_dir: Path, rng: random.Random) -> dict:
+    results = {}
+    for size in sizes:
+        df = make_results_frame(size, rng)
+
+        def run():
+            view = ResultsView(df)
+            view.apply(filters={"Severity": ["Critical", "High"]}, sort_by="File")
+            view.render_page(1)
+
+        results[f"results_view[{size}]"] = measure(run, items=size)
+    return results
+
+
+def bench_snippet_index(sizes: list[int], work_dir: Path, rng: random.Random) -> dict:
+    results = {}
+    for size in sizes:
+        # Project of `size` lines spread over files of 500 lines
+        contents = [
+            "\n".join(
+                f"{rng.choice(SAMPLE_LINES)} // {rng.randrange(size)}"
+                for _ in range(min(500, size - start))
+            )
+            for start in range(0, size, 500)
+        ]
+        files = lambda: [File(path=f"src/file_{i}.php", content=content) for i, content in enumerate(contents)]
+        results[f"snippet_index_build[{size}]"] = measure(lambda: SnippetIndex(files()), items=size, repeat=1)
+
+        index = SnippetIndex(files())
+        snippets = []
+        for _ in range(100):
+            lines = rng.choice(contents).splitlines()
+            start = rng.randrange(len(lines))
+            snippets.append("\n".join(lines[start:start + 3]))
+        results[f"snippet_index_locate[{size}]"] = measure(
+            lambda: [index.locate(snippet) for snippet in snippets], items=len(snippets)
+        )
+    return results
+
+
+def bench_model_clients(sizes: list[int], work_dir: Path, rng: random.Random) -> dict:
+    results = {}
+    code = "\n".join(rng.choice(SAMPLE_LINES) for _ in range(50))
+    for size in sizes:
+        # Requests through the stub backend, with a client built per request
+        # (cold) or taken from the process-wide registry (pooled)
+        results[f"model_clients_cold[{size}]"] = measure(
+            lambda: [send_code_to_llm(code, False, build_model_evaluator("stub")) for _ in range(size)],
+            items=size,
+        )
+        results[f"model_clients_pooled[{size}]"] = measure(
+            lambda: [send_code_to_llm(code, False, MODEL_REGISTRY.get("stub")) for _ in range(size)],
+            items=size,
+        )
+        # Setup cost of a Gemini client alone; no request is sent
+        results[f"model_clients_gemini_build[{size}]"] = measure(
+            lambda: [build_model_evaluator("gemini-2.0-flash") for _ in range(size)],
+            items=size,
+            repeat=1,
+        )
+    return results
+
+
+BENCHMARKS = {
+    "zip_processor": bench_zip_processor,
+    "parse_xml": bench_parse_xml,
+    "check_response": bench_check_response,
+    "read_all_test_cases": bench_read_all_test_cases,
+    "style_dataframe": bench_style_dataframe,
+    "results_view": bench_results_view,
+    "snippet_index": bench_snippet_index,
+    "model_clients": bench_model_clients,
+}
+
+
+def run_benchmarks(only: list[str] | None = None, quick: bool = False) -> dict:
+    """
+    Runs the selected benchmark groups on freshly generated synthetic corpora.
+    Each measurement also gets a relative_speed: its throughput divided by
+    the calibration loop speed measured around its group.
+
+    Args:
+        only (list[str] | None): Benchmark groups to run (default all).
+        quick (bool): Use the reduced size matrix.
+
+    Returns:
+        dict: Measurements keyed by case name.
+    """
+    sizes = QUICK_SIZES if quick else FULL_SIZES
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix="llm-benchmark-") as tmp:
+        for name, bench in BENCHMARKS.items():
+            if only and name not in only:
+                continue
+            logger.info(f"Running {name} with sizes {sizes[name]}")
+            work_dir = Path(tmp) / name
+            work_dir.mkdir()
+            before = calibrate()
+            group = bench(sizes[name], work_dir, random.Random(SEED))
+            calibration = (before + calibrate()) / 2
+            for result in group.values():
+                result["group"] = name
+                result["relative_speed"] = result["items_per_second"] / calibration
+            results.update(group)
+
+    return results
+
+
+def compare_to_baseline(
+    results: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE
+) -> list[str]:
+    """
+    Compares measurements against a stored baseline. Speed is compared
+    through the calibrated relative_speed when both sides have it, so that
+    machine speed and load do not show up as regressions.
+
+    Args:
+        results (dict): Current measurements.
+        baseline (dict): Baseline measurements.
+        tolerance (float): Allowed relative regression.
+
+    Returns:
+        list[str]: Human-readable regression messages (empty if none).
+    """
+    regressions = []
+    for case, current in results.items():
+        reference = baseline.get(case)
+        if reference is None:
+            continue
+
+        if "relative_speed" in current and "relative_speed" in reference:
+            if current["relative_speed"] < reference["relative_speed"] * (1 - tolerance):
+                regressions.append(
+                    f"{case}: relative speed {current['relative_speed']:.3g} "
+                    f"< baseline {reference['relative_speed']:.3g} (calibrated)"
+                )
+        elif current["items_per_second"] < reference["items_per_second"] * (1 - tolerance):
+            regressions.append(
+                f"{case}: throughput {current['items_per_second']:.1f}/s "
+                f"< baseline {reference['items_per_second']:.1f}/s"
+            )
+
+        max_memory = reference["peak_memory_mb"] * (1 + tolerance)
+        if current["peak_memory_mb"] > max(max_memory, 1.0):
+            regressions.append(
+                f"{case}: peak memory {current['peak_memory_mb']:.1f} MB "
+                f"> baseline {reference['peak_memory_mb']:.1f} MB"
+            )
+
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the non-LLM hot paths.")
+    parser.add_argument("--quick", action="store_true", help="Run the reduced size matrix.")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Benchmark groups to run.")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Baseline JSON file.")
+    parser.add_argument("--update-baseline", action="store_true", help="Store results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed relative regression.")
+    args = parser.parse_args(argv)
+
+    if not args.update_baseline and not args.baseline.exists():
+        logger.error(f"No baseline at {args.baseline}; record one with --update-baseline and commit it")
+        return 1
+
+    results = run_benchmarks(only=args.only, quick=args.quick)
+
+    for case, result in results.items():
+        print(
+            f"{case:<32} {result['items_per_second']:>12.1f} items/s "
+            f"{result['seconds']:>9.4f} s {result['peak_memory_mb']:>9.2f} MB "
+            f"{result['relative_speed']:>9.3g} rel"
+        )
+
+    if args.update_baseline:
+        runs = [results] + [
+            run_benchmarks(only=args.only, quick=args.quick) for _ in range(BASELINE_RUNS - 1)
+        ]
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        for case in results:
+            measured = sorted((run[case] for run in runs), key=lambda result: result["relative_speed"])
+            baseline[case] = measured[len(measured) // 2]
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True))
+        logger.info(f"Baseline written to {args.baseline}")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    for _ in range(CONFIRM_RUNS):
+        regressed = {
+            result["group"]
+            for case, result in results.items()
+            if compare_to_baseline({case: result}, baseline, tolerance=args.tolerance)
+        }
+        if not regressed:
+            break
+        logger.info(f"Running {', '.join(sorted(regressed))} again to confirm regressions")
+        for case, result in run_benchmarks(only=sorted(regressed), quick=args.quick).items():
+            if result["relative_speed"] > results[case]["relative_speed"]:
+                results[case] = result
+
+    regressions = compare_to_baseline(results, baseline, tolerance=args.tolerance)
+    if regressions:
+        for regression in regressions:
+            logger.error(f"REGRESSION {regression}")
+        return 1
+
+    logger.info("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
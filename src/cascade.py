@@ -0,0 +1,203 @@
+import re
+import threading
+import time
+import logging
+
+from structured_output import split_json_array
+
+# Severities that make the triage model's findings worth a second opinion
+ESCALATION_SEVERITIES = ("Critical", "High", "Medium")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates a token count when the backend does not report usage.
+
+    Args:
+        text (str): Prompt or response text.
+
+    Returns:
+        int: Approximate number of tokens (4 characters per token).
+    """
+    return max(1, len(text) // 4)
+
+
+def call_evaluator(evaluator, input_variables: dict[str, str], max_output_tokens: int | None = None):
+    """
+    Sends one request and returns the usage and finish reason of that very
+    request. Evaluators exposing call() return them with the response, which
+    stays correct when several threads share the evaluator; for others they
+    are read from last_usage and last_finish_reason after the call.
+
+    Args:
+        evaluator: Evaluator exposing call() or evaluate().
+        input_variables (dict[str, str]): Prompt variables.
+        max_output_tokens (int): Output token limit (default: the evaluator's).
+
+    Returns:
+        tuple[str, dict, str | None]: Response, token usage (prompt_tokens,
+        output_tokens) and finish reason.
+    """
+    call = getattr(evaluator, "call", None)
+    if call is not None:
+        return call(input_variables, max_output_tokens)
+
+    if max_output_tokens is None:
+        response = evaluator.evaluate(input_variables=input_variables)
+    else:
+        response = evaluator.evaluate(input_variables=input_variables, max_output_tokens=max_output_tokens)
+    usage = dict(getattr(evaluator, "last_usage", None) or {})
+    return response, usage, getattr(evaluator, "last_finish_reason", None)
+
+
+def default_escalation_policy(response: str) -> bool:
+    """
+    Decides whether a triage response must be escalated to the next tier.
+
+    A response is escalated when it flags at least one issue of Medium or higher
+    severity, or when it is low-confidence: not a complete <Issues> document
+    (unparseable or truncated output).
+
+    Args:
+        response (str): Raw triage response.
+
+    Returns:
+        bool: True if the chunk must be evaluated by the next tier.
+    """
+    if not re.search(r"<Issues>.*</Issues>", response, re.DOTALL):
+        return True
+
+    if response.count("<Issue>") != response.count("</Issue>"):
+        return True
+
+    severities = re.findall(r"<Severity>(.*?)</Severity>", response, re.DOTALL)
+    return any(level in severity for severity in severities for level in ESCALATION_SEVERITIES)
+
+
+def json_escalation_policy(response: str) -> bool:
+    """
+    Escalation policy for structured (JSON) responses, with the same rules as
+    default_escalation_policy.
+
+    Args:
+        response (str): Raw triage response.
+
+    Returns:
+        bool: True if the chunk must be evaluated by the next tier.
+    """
+    if "[" not in response:
+        return True
+
+    issues, tail = split_json_array(response)
+    if tail.strip():
+        return True
+
+    return any(
+        isinstance(issue, dict) and any(level in str(issue.get("Severity", "")) for level in ESCALATION_SEVERITIES)
+        for issue in issues
+    )
+
+
+class ModelTier:
+    def __init__(self, name: str, evaluator) -> None:
+        """
+        Initialize a tier of the model ladder.
+        :param name: str, name used in stats (e.g. the model name)
+        :param evaluator: evaluator exposing system_prompt and evaluate()
+        """
+        self.name: str = name
+        self.evaluator = evaluator
+        self.calls: int = 0
+        self.seconds: float = 0.0
+        self.prompt_tokens: int = 0
+        self.output_tokens: int = 0
+        self.escalations: int = 0
+
+    def stats(self) -> dict:
+        return {
+            "tier": self.name,
+            "calls": self.calls,
+            "seconds": self.seconds,
+            "mean_latency": self.seconds / self.calls if self.calls else 0.0,
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "escalations": self.escalations,
+            "escalation_rate": self.escalations / self.calls if self.calls else 0.0,
+        }
+
+
+class ModelCascade:
+    def __init__(
+        self,
+        tiers: list[ModelTier],
+        escalation_policy=default_escalation_policy,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        """
+        Initialize a cascade that runs every request on the first (cheapest)
+        tier and escalates to the following tiers only when the policy asks to.
+        :param tiers: list of ModelTier, from cheapest to strongest
+        :param escalation_policy: callable(response) -> bool
+        :param logger: logging.Logger, optional logger for logging messages
+        """
+        if not tiers:
+            raise ValueError("A model cascade needs at least one tier.")
+
+        self.tiers: list[ModelTier] = tiers
+        self.escalation_policy = escalation_policy
+        self.logger: logging.Logger | None = logger
+        self.model = tiers[-1].evaluator.model
+        self.system_prompt: str = tiers[-1].evaluator.system_prompt
+        self._lock = threading.Lock()
+
+    def _log(self, message: str) -> None:
+        """
+        Log a message if a logger is provided.
+        :param message: str, message to log
+        """
+        if self.logger:
+            self.logger.info(message)
+
+    def _call(self, tier: ModelTier, input_variables: dict[str, str]) -> tuple[str, dict, str | None]:
+        start = time.perf_counter()
+        response, usage, finish_reason = call_evaluator(tier.evaluator, input_variables)
+        elapsed = time.perf_counter() - start
+
+        prompt_tokens = usage.get("prompt_tokens") or estimate_tokens(
+            tier.evaluator.system_prompt.format(**input_variables)
+        )
+        output_tokens = usage.get("output_tokens") or estimate_tokens(response)
+
+        with self._lock:
+            tier.calls += 1
+            tier.seconds += elapsed
+            tier.prompt_tokens += prompt_tokens
+            tier.output_tokens += output_tokens
+
+        return response, {"prompt_tokens": prompt_tokens, "output_tokens": output_tokens}, finish_reason
+
+    def call(self, input_variables: dict[str, str], max_output_tokens: int | None = None) -> tuple[str, dict, str | None]:
+        """
+        Run a request through the tiers.
+        :return: tuple of the response, the usage of every tier that ran and the last finish reason
+        """
+        totals = {"prompt_tokens": 0, "output_tokens": 0}
+        for i, tier in enumerate(self.tiers):
+            response, usage, finish_reason = self._call(tier, input_variables)
+            totals["prompt_tokens"] += usage["prompt_tokens"]
+            totals["output_tokens"] += usage["output_tokens"]
+
+            is_last = i == len(self.tiers) - 1
+            if is_last or not self.escalation_policy(response):
+                return response, totals, finish_reason
+
+            with self._lock:
+                tier.escalations += 1
+            self._log(f"Escalating from {tier.name} to {self.tiers[i + 1].name}")
+
+    def evaluate(self, input_variables: dict[str, str]) -> str:
+        return self.call(input_variables)[0]
+
+    @property
+    def stats(self) -> list[dict]:
+        return [tier.stats() for tier in self.tiers]
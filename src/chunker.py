@@ -0,0 +1,111 @@
+from file import File
+
+# Roughly 15k tokens of code per request, leaving room for the standard text
+DEFAULT_CHUNK_CHARS = 60_000
+
+
+def format_file(file: File) -> str:
+    """
+    Formats a file the way it is presented to the LLM.
+
+    Args:
+        file (File): File to format.
+
+    Returns:
+        str: File header followed by the file content.
+    """
+    return f"File name: {file.path}\n{file.content or ''}\n"
+
+
+def format_numbered_file(file: File) -> str:
+    """
+    Formats a file with its line numbers, for responses that refer to line
+    ranges instead of echoing code.
+
+    Args:
+        file (File): File to format.
+
+    Returns:
+        str: File header followed by the numbered lines.
+    """
+    lines = (file.content or "").splitlines()
+    numbered = "\n".join(f"{number}| {line}" for number, line in enumerate(lines, start=1))
+    return f"File name: {file.path}\n{numbered}\n"
+
+
+def formatted_size(file: File) -> int:
+    """
+    Gets the formatted size of a file, in characters, without loading the
+    content of a file already measured.
+
+    Args:
+        file (File): File to measure.
+
+    Returns:
+        int: Approximate length of format_file(file).
+    """
+    return len(f"File name: {file.path}\n\n") + file.size
+
+
+class Chunk:
+    def __init__(self, files: list[File] | None = None) -> None:
+        """
+        Initialize a chunk, a group of files evaluated in a single LLM request.
+        :param files: list of File objects in the chunk
+        """
+        self.files: list[File] = files or []
+        self.size: int = sum(formatted_size(file) for file in self.files)
+
+    def add(self, file: File) -> None:
+        """
+        Add a file to the chunk.
+        :param file: File to add
+        """
+        self.files.append(file)
+        self.size += formatted_size(file)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(format_file(file) for file in self.files)
+
+    @property
+    def numbered_text(self) -> str:
+        return "\n".join(format_numbered_file(file) for file in self.files)
+
+    def release(self) -> None:
+        """
+        Drop the loaded content of the chunk files that can be reloaded.
+        """
+        for file in self.files:
+            file.release()
+
+    def __repr__(self):
+        return f"Chunk(files={len(self.files)}, size={self.size})"
+
+
+def build_chunks(files: list[File], max_chars: int = DEFAULT_CHUNK_CHARS) -> list[Chunk]:
+    """
+    Packs files, in order, into chunks of at most max_chars characters.
+    A file larger than max_chars gets a chunk of its own.
+
+    Args:
+        files (list[File]): Files to pack.
+        max_chars (int): Character budget per chunk.
+
+    Returns:
+        list[Chunk]: Chunks covering every file exactly once.
+    """
+    chunks: list[Chunk] = []
+    current = Chunk()
+
+    for file in files:
+        size = formatted_size(file)
+        if current.files and current.size + size > max_chars:
+            chunks.append(current)
+            current = Chunk()
+        current.add(file)
+
+    if current.files:
+        chunks.append(current)
+
+    return chunks
@@ -0,0 +1,463 @@
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from cascade import call_evaluator, estimate_tokens
+from chunker import build_chunks, format_numbered_file
+from core import (
+    COMPACT_OUTPUT,
+    MAX_CONTINUATIONS,
+    MODEL_REGISTRY,
+    STRUCTURED_OUTPUT,
+    STRUCTURED_PARSER,
+    build_model_evaluator,
+    build_replay_evaluator,
+    parse_xml,
+    standard_text,
+    with_continuations,
+)
+from evaluator_registry import EvaluatorRegistry
+from file import File
+from output_control import continuation_evaluators, expand_line_ranges
+from system_prompt import SYSTEM_PROMPT, STRUCTURED_SYSTEM_PROMPT, COMPACT_SYSTEM_PROMPT
+from test_case_data_load import read_all_test_cases
+from test_configuration import CSHARP_TEST_DIR, JAVA_TEST_DIR, PHP_TEST_DIR
+from test_core import check_response
+
+# Configure logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+if not logger.hasHandlers():
+    handler = logging.StreamHandler()
+    formatter = logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+REPORT_DIR = Path("analysis/benchmarks/configs")
+
+SEED = 5055
+
+CORPORA = {
+    "csharp": CSHARP_TEST_DIR,
+    "php": PHP_TEST_DIR,
+    "java": JAVA_TEST_DIR,
+}
+
+# Prompt variants: (template, response parser, structured output, compact output)
+PROMPTS = {
+    "xml": (SYSTEM_PROMPT, parse_xml, False, False),
+    "structured": (STRUCTURED_SYSTEM_PROMPT, lambda response: STRUCTURED_PARSER.parse(response), True, False),
+    "compact": (COMPACT_SYSTEM_PROMPT, parse_xml, False, True),
+}
+
+# USD per million (prompt, output) tokens; other models are priced at 0
+PRICES = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+}
+
+# One test case per request, formatted as test_cases.py does (replayable)
+SINGLE_CASE = 0
+
+# Evaluators of the prompt variants other than the configured one, keyed by
+# (model, structured, compact); the configured variant uses MODEL_REGISTRY
+VARIANT_REGISTRY = EvaluatorRegistry(lambda key: build_model_evaluator(*key))
+
+REPORT_COLUMNS = [
+    "language", "model", "prompt", "chunk_chars", "concurrency", "continuations",
+    "test_cases", "requests", "errors", "accuracy", "relaxed_accuracy", "findings",
+    "latency_p50", "latency_p95", "latency_p99", "wall_seconds",
+    "requests_per_second", "tokens_per_second", "prompt_tokens", "output_tokens",
+    "cost_usd", "cost_per_finding", "cost_per_hit", "truncation_rate",
+]
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """
+    Linearly interpolated percentile.
+
+    Args:
+        values (list[float]): Samples.
+        q (float): Percentile, between 0 and 100.
+
+    Returns:
+        float | None: The percentile, or None without samples.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def request_cost(model: str, prompt_tokens: int, output_tokens: int) -> float:
+    prompt_price, output_price = PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + output_tokens * output_price) / 1_000_000
+
+
+def build_requests(test_cases: list[dict], chunk_chars: int, numbered: bool = False) -> list[tuple[str, list[int], list[File]]]:
+    """
+    Groups test cases into requests.
+
+    Args:
+        test_cases (list[dict]): Test cases of one corpus.
+        chunk_chars (int): Maximum characters of code per request, or
+            SINGLE_CASE for one test case per request as in test_cases.py.
+        numbered (bool): Whether to number the code lines, for compact output.
+
+    Returns:
+        list[tuple[str, list[int], list[File]]]: Code of each request with
+        the indices of its test cases and their files.
+    """
+    if chunk_chars == SINGLE_CASE:
+        requests = []
+        for i, case in enumerate(test_cases):
+            file = File(path="File 1", content=case["Source"])
+            code = format_numbered_file(file) if numbered else "File name: File 1\n" + case["Source"]
+            requests.append((code, [i], [file]))
+        return requests
+
+    files = [
+        File(path=f"case_{i}/{os.path.basename(case['File'])}", content=case["Source"])
+        for i, case in enumerate(test_cases)
+    ]
+    positions = {file.path: i for i, file in enumerate(files)}
+    return [
+        (chunk.numbered_text if numbered else chunk.text, [positions[file.path] for file in chunk.files], chunk.files)
+        for chunk in build_chunks(files, max_chars=chunk_chars)
+    ]
+
+
+def findings_of_case(findings: list[dict], test_case: dict, index: int, shared: bool) -> pd.DataFrame:
+    """
+    Selects the findings reported for one test case of a request.
+
+    Args:
+        findings (list[dict]): Findings of the whole request.
+        test_case (dict): Test case to check.
+        index (int): Position of the test case in the corpus.
+        shared (bool): Whether the request held several test cases.
+
+    Returns:
+        pd.DataFrame: Findings with Weakness and Code columns.
+    """
+    if shared:
+        prefix = f"case_{index}/"
+        findings = [finding for finding in findings if prefix in str(finding.get("File") or "")]
+    return pd.DataFrame(findings, columns=["Weakness", "Code"]).fillna("").reset_index(drop=True)
+
+
+class ConfigurationRun:
+    def __init__(
+        self,
+        language: str,
+        model: str,
+        prompt: str,
+        chunk_chars: int,
+        concurrency: int,
+        continuations: int = MAX_CONTINUATIONS,
+    ) -> None:
+        """
+        Initialize one point of the benchmark matrix.
+        :param language: str, corpus name (key of CORPORA)
+        :param model: str, model name as in LLM_MODEL_LADDER, or 'replay'
+        :param prompt: str, prompt variant (key of PROMPTS)
+        :param chunk_chars: int, characters of code per request, or SINGLE_CASE
+        :param concurrency: int, concurrent requests
+        :param continuations: int, continuation requests allowed per truncated response (0 disables them)
+        """
+        self.language = language
+        self.model = model
+        self.prompt = prompt
+        self.chunk_chars = chunk_chars
+        self.concurrency = concurrency
+        self.continuations = continuations
+        self._evaluator = None
+
+    @property
+    def settings(self) -> dict:
+        return {
+            "language": self.language,
+            "model": self.model,
+            "prompt": self.prompt,
+            "chunk_chars": self.chunk_chars,
+            "concurrency": self.concurrency,
+            "continuations": self.continuations,
+        }
+
+    def evaluator(self):
+        """
+        Evaluator of this configuration, built as build_evaluator does: the
+        shared model evaluator from the registry, wrapped in continuations.
+        Usage is returned per call, so it is shared by the concurrent requests.
+        """
+        if self._evaluator is None:
+            template, _, structured, compact = PROMPTS[self.prompt]
+            if self.model == "replay":
+                llm = build_replay_evaluator(template)
+            elif (structured, compact) == (STRUCTURED_OUTPUT, COMPACT_OUTPUT):
+                llm = MODEL_REGISTRY.get(self.model)
+            else:
+                llm = VARIANT_REGISTRY.get((self.model, structured, compact))
+            self._evaluator = with_continuations(llm, self.continuations, structured, compact)
+        return self._evaluator
+
+    def send(self, code: str) -> dict:
+        """
+        Sends one request and measures it.
+        :param code: str, code snippet of the request
+        :return: dict with the response (or error), latency and token usage
+        """
+        evaluator = self.evaluator()
+        payload = {"standard": standard_text(), "code_snippet": code}
+        start = time.perf_counter()
+        try:
+            response, usage, _ = call_evaluator(evaluator, payload)
+            error = None
+        except Exception as e:
+            response, usage, error = "", {}, f"{type(e).__name__}: {e}"
+        latency = time.perf_counter() - start
+
+        usage = usage or {}
+        prompt_tokens = usage.get("prompt_tokens") or estimate_tokens(evaluator.system_prompt.format(**payload))
+        output_tokens = usage.get("output_tokens") or estimate_tokens(response)
+        return {
+            "response": response,
+            "error": error,
+            "latency": latency,
+            "prompt_tokens": prompt_tokens,
+            "output_tokens": output_tokens,
+        }
+
+    def run(self, test_cases: list[dict]) -> tuple[dict, list[dict]]:
+        """
+        Evaluates a corpus with this configuration.
+        :param test_cases: list of test case dicts from read_all_test_cases
+        :return: tuple of the summary row and the per-request records
+        """
+        _, parse, _, compact = PROMPTS[self.prompt]
+        requests = build_requests(test_cases, self.chunk_chars, numbered=compact)
+        self.evaluator()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            measured = list(pool.map(lambda request: self.send(request[0]), requests))
+        wall_seconds = time.perf_counter() - start
+
+        records = []
+        hits = relaxed_hits = findings_count = 0
+        for (code, indices, files), result in zip(requests, measured):
+            response = expand_line_ranges(result["response"], files) if compact else result["response"]
+            findings = parse(response) if response else []
+            findings_count += len(findings)
+
+            request_hits = 0
+            for index in indices:
+                response_df = findings_of_case(findings, test_cases[index], index, len(indices) > 1)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    hit, llm_code = check_response(response_df, test_cases[index])
+                hits += hit
+                relaxed_hits += llm_code != ""
+                request_hits += hit
+
+            records.append({
+                **self.settings,
+                "test_cases": len(indices),
+                "chars": len(code),
+                "latency": round(result["latency"], 4),
+                "prompt_tokens": result["prompt_tokens"],
+                "output_tokens": result["output_tokens"],
+                "findings": len(findings),
+                "hits": request_hits,
+                "error": result["error"],
+            })
+
+        return self.summarize(records, len(test_cases), hits, relaxed_hits, findings_count, wall_seconds), records
+
+    def summarize(
+        self,
+        records: list[dict],
+        total: int,
+        hits: int,
+        relaxed_hits: int,
+        findings: int,
+        wall_seconds: float,
+    ) -> dict:
+        latencies = [record["latency"] for record in records if record["error"] is None]
+        prompt_tokens = sum(record["prompt_tokens"] for record in records)
+        output_tokens = sum(record["output_tokens"] for record in records)
+        cost = request_cost(self.model, prompt_tokens, output_tokens)
+        metrics = [wrapper.metrics() for wrapper in continuation_evaluators(self.evaluator())]
+        return {
+            **self.settings,
+            "test_cases": total,
+            "requests": len(records),
+            "errors": sum(record["error"] is not None for record in records),
+            "accuracy": hits * 100 / total if total else None,
+            "relaxed_accuracy": relaxed_hits * 100 / total if total else None,
+            "findings": findings,
+            "latency_p50": percentile(latencies, 50),
+            "latency_p95": percentile(latencies, 95),
+            "latency_p99": percentile(latencies, 99),
+            "wall_seconds": wall_seconds,
+            "requests_per_second": len(records) / wall_seconds if wall_seconds else None,
+            "tokens_per_second": output_tokens / wall_seconds if wall_seconds else None,
+            "prompt_tokens": prompt_tokens,
+            "output_tokens": output_tokens,
+            "cost_usd": cost,
+            "cost_per_finding": cost / findings if findings else None,
+            "cost_per_hit": cost / hits if hits else None,
+            "truncation_rate": metrics[0]["truncation_rate"] if metrics else None,
+        }
+
+
+def load_corpus(language: str, max_cases: int) -> list[dict]:
+    """
+    Loads the same sample of a corpus for every configuration.
+    """
+    random.seed(SEED)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return read_all_test_cases(CORPORA[language], max_dirs=max_cases)
+
+
+def run_matrix(
+    languages: list[str],
+    models: list[str],
+    prompts: list[str],
+    chunk_sizes: list[int],
+    concurrencies: list[int],
+    max_cases: int,
+    out_dir: Path,
+    continuations: list[int] | None = None,
+) -> pd.DataFrame:
+    """
+    Runs every configuration of the matrix on every corpus and writes
+    requests.jsonl, report.csv and report.md to out_dir.
+
+    Returns:
+        pd.DataFrame: One summary row per corpus and configuration.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    continuations = continuations if continuations is not None else [MAX_CONTINUATIONS]
+    rows = []
+
+    with open(out_dir / "requests.jsonl", "w", encoding="utf-8") as requests_file:
+        for language in languages:
+            test_cases = load_corpus(language, max_cases)
+            logger.info(f"Loaded {len(test_cases)} {language} test cases")
+
+            matrix = itertools.product(models, prompts, chunk_sizes, concurrencies, continuations)
+            for model, prompt, chunk_chars, concurrency, max_continuations in matrix:
+                run = ConfigurationRun(language, model, prompt, chunk_chars, concurrency, max_continuations)
+                summary, records = run.run(test_cases)
+                for record in records:
+                    requests_file.write(json.dumps(record) + "\n")
+                rows.append(summary)
+                logger.info(
+                    f"{language} {model} {prompt} chunk={chunk_chars} concurrency={concurrency} "
+                    f"continuations={max_continuations}: "
+                    f"accuracy {summary['accuracy'] or 0:.1f}%, p95 {summary['latency_p95'] or 0:.2f}s, "
+                    f"{summary['errors']} errors"
+                )
+
+    report = pd.DataFrame(rows, columns=REPORT_COLUMNS)
+    report.to_csv(out_dir / "report.csv", index=False)
+    (out_dir / "report.md").write_text(format_report(report), encoding="utf-8")
+    return report
+
+
+def format_report(report: pd.DataFrame) -> str:
+    """
+    Formats the comparison report as Markdown, one table per corpus, with
+    the configurations sorted by accuracy and then by p95 latency.
+    """
+    columns = [
+        "model", "prompt", "chunk_chars", "concurrency", "continuations", "accuracy", "latency_p50",
+        "latency_p95", "latency_p99", "tokens_per_second", "cost_per_finding", "errors",
+    ]
+    lines = ["# LLM configuration benchmark", ""]
+    for language, group in report.groupby("language", sort=False):
+        group = group.sort_values(["accuracy", "latency_p95"], ascending=[False, True])
+        lines += [f"## {language}", "", "| " + " | ".join(columns) + " |", "|" + "---|" * len(columns)]
+        for _, row in group.iterrows():
+            cells = []
+            for column in columns:
+                value = row[column]
+                if pd.isna(value):
+                    cells.append("-")
+                elif isinstance(value, float):
+                    cells.append(f"{value:.6f}" if column == "cost_per_finding" else f"{value:.2f}")
+                else:
+                    cells.append(str(value))
+            lines.append("| " + " | ".join(cells) + " |")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def split_list(value: str, cast=str) -> list:
+    return [cast(item.strip()) for item in value.split(",") if item.strip()]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare LLM configurations (model, prompt, chunk size, concurrency) "
+        "by latency, throughput, cost and accuracy on the test case corpora."
+    )
+    parser.add_argument("--languages", default="csharp,php,java", help="Corpora to run, among csharp, php and java.")
+    parser.add_argument("--models", default="gemini-2.0-flash", help="Models; 'stub' and 'replay' (LLM_REPLAY_CASSETTE) work offline.")
+    parser.add_argument("--prompts", default="xml", help=f"Prompt variants, among {', '.join(PROMPTS)}.")
+    parser.add_argument("--chunk-chars", default="0", help="Characters of code per request; 0 sends one test case per request.")
+    parser.add_argument("--concurrency", default="1", help="Concurrent requests.")
+    parser.add_argument(
+        "--continuations",
+        default=str(MAX_CONTINUATIONS),
+        help="Continuation requests allowed per truncated response; 0 sends each request once.",
+    )
+    parser.add_argument("--max-cases", type=int, default=50, help="Test cases per corpus.")
+    parser.add_argument("--out", default=None, help="Report directory (default analysis/benchmarks/configs/<timestamp>).")
+    args = parser.parse_args(argv)
+
+    languages = split_list(args.languages)
+    prompts = split_list(args.prompts)
+    for name, values, allowed in (("language", languages, CORPORA), ("prompt", prompts, PROMPTS)):
+        unknown = [value for value in values if value not in allowed]
+        if unknown:
+            parser.error(f"unknown {name}: {', '.join(unknown)}")
+
+    models = split_list(args.models)
+    if "replay" in models and not os.getenv("LLM_REPLAY_CASSETTE"):
+        parser.error("the replay model needs LLM_REPLAY_CASSETTE")
+
+    out_dir = Path(args.out) if args.out else REPORT_DIR / time.strftime("%Y%m%d-%H%M%S")
+    report = run_matrix(
+        languages=languages,
+        models=models,
+        prompts=prompts,
+        chunk_sizes=split_list(args.chunk_chars, int),
+        concurrencies=split_list(args.concurrency, int),
+        max_cases=args.max_cases,
+        out_dir=out_dir,
+        continuations=split_list(args.continuations, int),
+    )
+    print(format_report(report))
+    print(f"Report written to {out_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,21 +2,40 @@ import os
 import json
 import re
 import logging
-import tempfile
-import shutil
+import time
+from contextlib import contextmanager
+from functools import lru_cache
 
 import PyPDF2
 import pandas as pd
+import requests
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
-from zip_processor import ZipFileProcessor
-from llm_evaluator import LLMEvaluator, GenAIEvaluator
-from system_prompt import SYSTEM_PROMPT
+from file import File
+from zip_processor import MAX_ARCHIVE_SIZE as DEFAULT_MAX_ARCHIVE_SIZE, ZipFileProcessor
+from github_fetch import GitHubRepositoryFetcher
+from evaluator_registry import EvaluatorRegistry
+from llm_evaluator import LLMEvaluator, GenAIEvaluator, StubEvaluator
+from replay_evaluator import Cassette, RecordingEvaluator, ReplayEvaluator
+from cascade import ModelCascade, ModelTier, call_evaluator, estimate_tokens, json_escalation_policy
+from chunker import Chunk, build_chunks, DEFAULT_CHUNK_CHARS
+from import_graph import build_graph_chunks, file_references
+from diff_scanner import DiffScan, DEFAULT_CONTEXT_LINES, parse_unified_diff
+from output_control import (
+    DEFAULT_MAX_CONTINUATIONS,
+    ContinuationEvaluator,
+    continuation_evaluators,
+    expand_line_ranges,
+)
+from scheduler import ScanBudget, prepare_files, prioritize_chunks
+from self_consistency import SelfConsistencyEvaluator
+from work_queue import collect_results, enqueue_chunks, open_work_queue
+from structured_output import ParsedResponse, StructuredOutputParser, to_gemini_schema
+from system_prompt import SYSTEM_PROMPT, STRUCTURED_SYSTEM_PROMPT, COMPACT_SYSTEM_PROMPT
 import google.generativeai as genai
 
 # Load environment variables
 load_dotenv()
-genai.configure(api_key=os.getenv("API_KEY"))
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -30,6 +49,13 @@ if not logger.hasHandlers():
 # Constants
 RESOURCES_PATH = "resources/"
 
+# Models from the cheapest to the strongest, e.g. "gemini-2.0-flash-lite,gemini-2.0-flash"
+MODEL_LADDER = [
+    name.strip()
+    for name in os.getenv("LLM_MODEL_LADDER", "gemini-2.0-flash").split(",")
+    if name.strip()
+]
+
 SUPPORTED_EXTENSIONS = [
     ".py",  # Python
     ".cs",  # C#
@@ -61,6 +87,38 @@ DEFAULT_OUTPUT_ROW = {
     "Justification": "None",
 }
 
+# Optional fields of consensus findings, kept when they are serialized to XML
+CONSENSUS_FIELDS = {"Votes": int, "Confidence": float}
+
+# "graph" packs files along import-graph communities, "sequential" keeps ZIP order
+CHUNKING = os.getenv("LLM_CHUNKING", "graph")
+
+# Work queue URL (sqlite:///queue.db or redis://...); when set, chunks are
+# enqueued and evaluated by work_queue.py workers instead of in-process
+WORK_QUEUE = os.getenv("LLM_WORK_QUEUE")
+
+# Ask for schema-constrained JSON instead of XML
+STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "0") == "1"
+
+# Report line ranges instead of code, expanded locally from the files (XML only)
+COMPACT_OUTPUT = os.getenv("LLM_COMPACT_OUTPUT", "0") == "1" and not STRUCTURED_OUTPUT
+
+if STRUCTURED_OUTPUT:
+    ACTIVE_SYSTEM_PROMPT = STRUCTURED_SYSTEM_PROMPT
+elif COMPACT_OUTPUT:
+    ACTIVE_SYSTEM_PROMPT = COMPACT_SYSTEM_PROMPT
+else:
+    ACTIVE_SYSTEM_PROMPT = SYSTEM_PROMPT
+
+# Continuation requests completing a truncated response; 0 disables output control
+MAX_CONTINUATIONS = int(os.getenv("LLM_MAX_CONTINUATIONS", str(DEFAULT_MAX_CONTINUATIONS)))
+
+# Cheap model used to repair invalid structured responses
+REPAIR_MODEL = os.getenv("LLM_REPAIR_MODEL", "gemini-2.0-flash-lite")
+
+# Largest ZIP archive accepted, in compressed bytes
+MAX_ARCHIVE_SIZE = int(os.getenv("LLM_MAX_ARCHIVE_SIZE", str(DEFAULT_MAX_ARCHIVE_SIZE)))
+
 
 def extract_standard_text() -> str:
     """
@@ -87,31 +145,265 @@ def extract_standard_text() -> str:
 
     return combined_text
 
-# Preloaded standard text
-STANDARD_TEXT = extract_standard_text()
+@lru_cache(maxsize=None)
+def standard_text() -> str:
+    """
+    Returns the standard text, extracted from the PDFs on first use only, so
+    that importing this module (e.g. for a benchmark) does not parse them.
+    """
+    return extract_standard_text()
+
+
+def __getattr__(name: str):
+    # STANDARD_TEXT stays importable, and is loaded when first imported
+    if name == "STANDARD_TEXT":
+        return standard_text()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def uploaded_zip_path(gradio_file) -> str:
+    """
+    Gets the path of an uploaded ZIP file, so it is processed in place
+    instead of being copied. Gradio owns the uploaded file and removes it
+    with its cache.
+
+    Args:
+        gradio_file: Uploaded file from Gradio (a path or a file object).
+
+    Returns:
+        str: Path to the uploaded ZIP file.
+    """
+    return getattr(gradio_file, "name", gradio_file)
+
+@lru_cache(maxsize=None)
+def load_cassette(path: str) -> Cassette:
+    """
+    Loads a record/replay cassette once per process.
+
+    Args:
+        path (str): Path to the cassette JSONL file.
+
+    Returns:
+        Cassette: The loaded cassette.
+    """
+    return Cassette(path)
+
+
+_genai_configured_pid: int | None = None
+
+
+def configure_genai() -> None:
+    """
+    Configures the GenAI SDK on the first use of a Gemini model in a process.
+    A forked child reconfigures it, so that it opens its own connections
+    instead of sharing the ones of its parent.
+    """
+    global _genai_configured_pid
+    if _genai_configured_pid != os.getpid():
+        genai.configure(api_key=os.getenv("API_KEY"))
+        _genai_configured_pid = os.getpid()
+
+
+def build_evaluator():
+    """
+    Builds the evaluator used by send_code_to_llm.
+
+    Set LLM_REPLAY_CASSETTE to serve recorded responses offline (tuned with
+    LLM_REPLAY_LATENCY, LLM_REPLAY_JITTER, LLM_REPLAY_ERROR_RATE and
+    LLM_REPLAY_SEED), or LLM_RECORD_CASSETTE to record live Gemini calls.
+    When LLM_MODEL_LADDER lists several models, they are chained in a
+    ModelCascade from the cheapest to the strongest. Each model gets output
+    budgets sized to its input and completes truncated responses with up to
+    LLM_MAX_CONTINUATIONS continuation requests.
+
+    Returns:
+        An evaluator exposing evaluate(input_variables=...).
+    """
+    if os.getenv("LLM_REPLAY_CASSETTE"):
+        return with_continuations(build_replay_evaluator(ACTIVE_SYSTEM_PROMPT))
+
+    tiers = []
+    for model_name in MODEL_LADDER:
+        llm = MODEL_REGISTRY.get(model_name)
+
+        # Recorded below the continuations, so every part is replayed as sent
+        record_path = os.getenv("LLM_RECORD_CASSETTE")
+        if record_path:
+            llm = RecordingEvaluator(llm, load_cassette(record_path))
+
+        tiers.append(ModelTier(model_name, with_continuations(llm)))
+
+    if len(tiers) == 1:
+        return tiers[0].evaluator
+
+    if STRUCTURED_OUTPUT:
+        return ModelCascade(tiers, escalation_policy=json_escalation_policy, logger=logger)
+
+    return ModelCascade(tiers, logger=logger)
+
+
+def with_continuations(
+    llm,
+    max_continuations: int = MAX_CONTINUATIONS,
+    structured: bool = STRUCTURED_OUTPUT,
+    compact: bool = COMPACT_OUTPUT,
+):
+    """
+    Wraps a model evaluator in a ContinuationEvaluator, unless
+    max_continuations is 0.
+
+    Args:
+        llm: Evaluator accepting evaluate(input_variables, max_output_tokens).
+        max_continuations (int): Continuation requests allowed per request (default LLM_MAX_CONTINUATIONS).
+        structured (bool): Whether responses are JSON arrays (default LLM_STRUCTURED_OUTPUT).
+        compact (bool): Whether issues carry line ranges (default LLM_COMPACT_OUTPUT).
+
+    Returns:
+        The wrapped evaluator, or llm itself.
+    """
+    if max_continuations <= 0:
+        return llm
+    return ContinuationEvaluator(
+        llm,
+        max_continuations=max_continuations,
+        structured=structured,
+        compact=compact,
+        logger=logger,
+    )
 
 
-def save_uploaded_zip(gradio_file) -> str:
+def build_replay_evaluator(system_prompt: str) -> ReplayEvaluator:
     """
-    Saves a Gradio file object to a temporary ZIP file.
+    Builds an evaluator serving the LLM_REPLAY_CASSETTE responses, with the
+    LLM_REPLAY_* latency, jitter and error settings.
 
     Args:
-        gradio_file: Uploaded file object from Gradio.
+        system_prompt (str): Prompt template the cassette was recorded with.
 
     Returns:
-        str: Path to the saved temporary ZIP file.
+        ReplayEvaluator: The replay evaluator.
     """
-    temp_path = tempfile.NamedTemporaryFile(suffix=".zip", delete=False).name
-    shutil.copy(gradio_file.name, temp_path)
-    return temp_path
+    latency = os.getenv("LLM_REPLAY_LATENCY")
+    seed = os.getenv("LLM_REPLAY_SEED")
+    return ReplayEvaluator(
+        cassette=load_cassette(os.environ["LLM_REPLAY_CASSETTE"]),
+        system_prompt=system_prompt,
+        latency=float(latency) if latency else None,
+        jitter=float(os.getenv("LLM_REPLAY_JITTER", "0")),
+        error_rate=float(os.getenv("LLM_REPLAY_ERROR_RATE", "0")),
+        seed=int(seed) if seed else None,
+    )
+
+
+def build_model_evaluator(model_name: str, structured: bool = STRUCTURED_OUTPUT, compact: bool = COMPACT_OUTPUT):
+    """
+    Builds the evaluator for a single model of the ladder.
+
+    Gemini model names use the GenAI SDK; names prefixed with "ollama/" use a
+    local model through LangChain. "stub" (or "stub/<name>") answers every
+    prompt with an empty report after LLM_STUB_LATENCY seconds, to measure
+    the local overhead of requests.
 
-def send_code_to_llm(code: str, verbose: bool = True) -> str:
+    Args:
+        model_name (str): Model name, e.g. "gemini-2.0-flash" or "ollama/qwen2.5-coder".
+        structured (bool): Whether to ask for JSON instead of XML (default LLM_STRUCTURED_OUTPUT).
+        compact (bool): Whether to ask for line ranges instead of code (default LLM_COMPACT_OUTPUT).
+
+    Returns:
+        An evaluator exposing evaluate(input_variables=...).
+    """
+    if structured:
+        system_prompt = STRUCTURED_SYSTEM_PROMPT
+    elif compact:
+        system_prompt = COMPACT_SYSTEM_PROMPT
+    else:
+        system_prompt = SYSTEM_PROMPT
+
+    if model_name == "stub" or model_name.startswith("stub/"):
+        return StubEvaluator(
+            system_prompt=system_prompt,
+            response="[]" if structured else "<Issues>\n</Issues>",
+            latency=float(os.getenv("LLM_STUB_LATENCY", "0")),
+        )
+
+    if model_name.startswith("ollama/"):
+        from langchain_community.chat_models import ChatOllama
+
+        return LLMEvaluator(
+            model=ChatOllama(model=model_name.removeprefix("ollama/")),
+            system_prompt=system_prompt,
+            max_tokens_param="num_predict",
+        )
+
+    configure_genai()
+    if structured:
+        return GenAIEvaluator(
+            model=genai.GenerativeModel(model_name),
+            system_prompt=STRUCTURED_SYSTEM_PROMPT,
+            generation_config={
+                "response_mime_type": "application/json",
+                "response_schema": to_gemini_schema(STRUCTURED_PARSER.schema),
+            },
+        )
+
+    return GenAIEvaluator(
+        model=genai.GenerativeModel(model_name),
+        system_prompt=system_prompt,
+    )
+
+
+# Model evaluators, built once per process and model and reused by every request
+MODEL_REGISTRY = EvaluatorRegistry(build_model_evaluator)
+
+
+@lru_cache(maxsize=None)
+def get_evaluator():
+    """
+    Returns the process-wide evaluator, built once by build_evaluator().
+    """
+    return build_evaluator()
+
+
+def warmup_evaluators(verbose: bool = True) -> list[dict]:
+    """
+    Builds the evaluators of the model ladder in this process and opens their
+    connections with a cheap call, so that the first chunk does not pay for
+    it. Also serves as a health check of the configured backends.
+
+    Args:
+        verbose (bool): Whether to log the health of each model (default True).
+
+    Returns:
+        list[dict]: Per model: key, ok, build_seconds, warmup_seconds and error.
+    """
+    if os.getenv("LLM_REPLAY_CASSETTE"):
+        get_evaluator()
+        return []
+
+    report = MODEL_REGISTRY.warmup(MODEL_LADDER)
+    get_evaluator()
+
+    if verbose:
+        for status in report:
+            if status["ok"]:
+                logger.info(
+                    f"Model {status['key']} ready "
+                    f"(build {status['build_seconds']:.3f}s, warmup {status['warmup_seconds']:.3f}s)"
+                )
+            else:
+                logger.warning(f"Model {status['key']} unavailable: {status['error']}")
+
+    return report
+
+
+def send_code_to_llm(code: str, verbose: bool = True, evaluator=None) -> str:
     """
     Sends source code to an LLM for evaluation.
 
     Args:
         code (str): Source code to evaluate.
         verbose (bool): Whether to print processing info (default True).
+        evaluator: Evaluator to use instead of get_evaluator() (default None).
 
     Returns:
         str: Raw response from the LLM.
@@ -130,18 +422,112 @@ def send_code_to_llm(code: str, verbose: bool = True) -> str:
     # payload = {"standard": STANDARD_TEXT, "code_snippet": code}
     # response = llm.evaluate(payload)
 
-    llm = GenAIEvaluator(
-        model=genai.GenerativeModel("gemini-2.0-flash"),
-        system_prompt=SYSTEM_PROMPT,
-    )
-    payload = {"standard": STANDARD_TEXT, "code_snippet": code}
-    response = llm.evaluate(input_variables=payload)
-    
+    response, _ = send_code_with_usage(code, verbose, evaluator=evaluator)
+    return response
+
+
+def send_code_with_usage(code: str, verbose: bool = True, evaluator=None) -> tuple[str, dict]:
+    """
+    Sends source code to an LLM for evaluation, returning the token usage of
+    this request (safe when several threads share the evaluator).
+
+    Args:
+        code (str): Source code to evaluate.
+        verbose (bool): Whether to print processing info (default True).
+        evaluator: Evaluator to use instead of get_evaluator() (default None).
+
+    Returns:
+        tuple[str, dict]: Raw response from the LLM and its token usage.
+    """
+    llm = evaluator or get_evaluator()
+    payload = {"standard": standard_text(), "code_snippet": code}
+    response, usage, _ = call_evaluator(llm, payload)
+
     if verbose:
         logger.info(f"LLM response: {response}")
 
+    return response, usage
+
+
+def send_chunk_to_llm(chunk: Chunk, verbose: bool = True, evaluator=None) -> str:
+    """
+    Sends a chunk of files to an LLM for evaluation. With LLM_COMPACT_OUTPUT,
+    the files are sent with line numbers and the line ranges of the response
+    are expanded back into code from the chunk files.
+
+    Args:
+        chunk (Chunk): Chunk to evaluate.
+        verbose (bool): Whether to print processing info (default True).
+        evaluator: Evaluator to use instead of get_evaluator() (default None).
+
+    Returns:
+        str: LLM response, with code in every issue.
+    """
+    response, _ = send_chunk_with_usage(chunk, verbose, evaluator=evaluator)
     return response
 
+
+def send_chunk_with_usage(chunk: Chunk, verbose: bool = True, evaluator=None) -> tuple[str, dict]:
+    """
+    Same as send_chunk_to_llm, also returning the token usage of the request.
+
+    Returns:
+        tuple[str, dict]: LLM response, with code in every issue, and its token usage.
+    """
+    if not COMPACT_OUTPUT:
+        return send_code_with_usage(chunk.text, verbose, evaluator=evaluator)
+
+    response, usage = send_code_with_usage(chunk.numbered_text, verbose, evaluator=evaluator)
+    return expand_line_ranges(response, chunk.files), usage
+
+
+def send_chunk_to_llm_with_consensus(
+    chunk: Chunk,
+    samples: int = 5,
+    quorum: int | None = None,
+    verbose: bool = True,
+    evaluator=None,
+) -> pd.DataFrame:
+    """
+    Sends a chunk of files to an LLM up to `samples` times concurrently, and
+    keeps the issues a quorum of samples agree on (self-consistency voting);
+    no more samples are sent once the vote is decided. With
+    LLM_COMPACT_OUTPUT, the files are sent with line numbers and every sample
+    is expanded back into code before voting.
+
+    Args:
+        chunk (Chunk): Chunk to evaluate.
+        samples (int): Maximum number of samples (default 5).
+        quorum (int | None): Votes needed to keep an issue (default majority).
+        verbose (bool): Whether to print processing info (default True).
+        evaluator: Evaluator to use instead of get_evaluator() (default None).
+
+    Returns:
+        pd.DataFrame: Accepted issues with "Votes" and "Confidence" columns.
+    """
+    if verbose:
+        logger.info(f"Sending code to LLM for evaluation with {samples} samples...")
+
+    def parse(response: str) -> list[dict]:
+        if COMPACT_OUTPUT:
+            response = expand_line_ranges(response, chunk.files)
+        return parse_findings(response)
+
+    consensus = SelfConsistencyEvaluator(
+        evaluator=evaluator or get_evaluator(),
+        parse=parse,
+        samples=samples,
+        quorum=quorum,
+        logger=logger if verbose else None,
+    )
+    code = chunk.numbered_text if COMPACT_OUTPUT else chunk.text
+    payload = {"standard": standard_text(), "code_snippet": code}
+    findings = consensus.evaluate_findings(input_variables=payload)
+
+    # No placeholder row: it would be stored and scored as a "None" issue
+    return pd.DataFrame(findings, columns=[*DEFAULT_OUTPUT_ROW, *CONSENSUS_FIELDS])
+
+
 def evaluate_zip(zip_path: str, verbose: bool = True) -> str:
     """
     Evaluates source code files in a ZIP archive using an LLM.
@@ -153,18 +539,381 @@ def evaluate_zip(zip_path: str, verbose: bool = True) -> str:
     Returns:
         str: Raw response from the LLM.
     """
-    zip_processor = ZipFileProcessor(zip_file_path=zip_path, logger=logger)
-    code_files = zip_processor.get_all_files(
-        allowed_extensions=SUPPORTED_EXTENSIONS, verbose=verbose
+    with open_zip_files(zip_path, verbose) as code_files:
+        return evaluate_files(code_files, verbose)
+
+
+def evaluate_diff(
+    diff: str,
+    zip_path: str | None = None,
+    repository: str | None = None,
+    ref: str = "master",
+    context: int = DEFAULT_CONTEXT_LINES,
+    verbose: bool = True,
+    evaluator=None,
+) -> list[dict]:
+    """
+    Evaluates only the code changed by a unified diff. The new side of each
+    patched file is rebuilt from the base tree (a ZIP archive or a GitHub
+    ref), and the windows around the changed lines are sent in one request.
+
+    Args:
+        diff (str): Unified diff against the base tree.
+        zip_path (str): ZIP archive of the base tree (default None).
+        repository (str): GitHub repository 'owner/repo' of the base tree (default None).
+        ref (str): Branch, tag or commit of the GitHub base tree (default "master").
+        context (int): Context lines kept around each change.
+        verbose (bool): Whether to print processing info (default True).
+        evaluator: Evaluator to use instead of get_evaluator() (default None).
+
+    Returns:
+        list[dict]: Findings with their new-side "Path", "Start Line" and
+        "End Line", and "In Diff" telling whether they overlap a changed line.
+    """
+    patches = [
+        patch for patch in parse_unified_diff(diff)
+        if patch.new_path and patch.new_path.endswith(tuple(SUPPORTED_EXTENSIONS))
+    ]
+    bases = load_diff_bases(patches, zip_path, repository, ref, verbose)
+    scan = DiffScan(patches, bases, context=context)
+    windows = scan.window_files()
+
+    if not windows:
+        return []
+
+    if verbose:
+        logger.info(f"Evaluating {len(windows)} changed regions in {len(scan.windows)} files")
+
+    # The windows are small, so they normally fit a single request
+    findings = []
+    for chunk in build_chunks(windows):
+        response = send_chunk_to_llm(chunk, verbose, evaluator=evaluator)
+        for finding in parse_findings(response):
+            path, start, end = scan.locate(finding.get("File"), finding.get("Code"))
+            findings.append({
+                **finding,
+                "Path": path,
+                "Start Line": start,
+                "End Line": end,
+                "In Diff": scan.touches_change(path, start, end),
+            })
+
+    return findings
+
+
+def load_diff_bases(
+    patches: list,
+    zip_path: str | None = None,
+    repository: str | None = None,
+    ref: str = "master",
+    verbose: bool = True,
+) -> dict[str, str | None]:
+    """
+    Loads the base content of the files touched by a diff, and nothing else.
+
+    Args:
+        patches (list[FilePatch]): Parsed diff.
+        zip_path (str): ZIP archive of the base tree (default None).
+        repository (str): GitHub repository 'owner/repo' of the base tree (default None).
+        ref (str): Branch, tag or commit of the GitHub base tree (default "master").
+        verbose (bool): Whether to print processing info (default True).
+
+    Returns:
+        dict[str, str | None]: Base content per old path, None when the file
+        was not found in the base tree.
+    """
+    old_paths = [patch.old_path for patch in patches if patch.old_path]
+    bases: dict[str, str | None] = dict.fromkeys(old_paths)
+
+    if zip_path is not None:
+        # Archives usually wrap the tree in a top-level directory
+        with ZipFileProcessor(zip_file_path=zip_path, logger=logger, max_archive_size=MAX_ARCHIVE_SIZE) as zip_processor:
+            files = zip_processor.get_all_files(allowed_extensions=SUPPORTED_EXTENSIONS, verbose=False)
+            for old_path in old_paths:
+                match = next(
+                    (file for file in files
+                     if file.path == old_path or file.path.endswith("/" + old_path)),
+                    None,
+                )
+                if match is not None:
+                    bases[old_path] = match.content
+
+    elif repository is not None:
+        fetcher = GitHubRepositoryFetcher(
+            repository=repository, token=os.getenv("GITHUB_TOKEN"), logger=logger
+        )
+        for old_path in old_paths:
+            try:
+                bases[old_path] = fetcher.get_file_content(old_path, branch=ref, verbose=verbose)
+            except requests.HTTPError as e:
+                logger.warning(f"Base file {old_path} not found at {ref}: {e}")
+
+    missing = [path for path, content in bases.items() if content is None]
+    if verbose and missing:
+        logger.info(f"Scanning {len(missing)} files from the diff hunks only: {missing}")
+
+    return bases
+
+
+@contextmanager
+def open_zip_files(zip_path: str, verbose: bool = True):
+    """
+    Loads the supported source code files from a ZIP archive, keeping the
+    archive open for the lazy file contents until the context exits.
+
+    Members are decompressed when first used; iter_evaluate_files reads them
+    all before the first chunk is sent, so an archive whose real inflated
+    sizes exceed the limits raises UnsafeZipError before any file is scanned.
+
+    Args:
+        zip_path (str): Path to the ZIP archive.
+        verbose (bool): Whether to print processing info (default True).
+
+    Yields:
+        list[File]: Source code files found in the archive.
+    """
+    with ZipFileProcessor(zip_file_path=zip_path, logger=logger, max_archive_size=MAX_ARCHIVE_SIZE) as zip_processor:
+        code_files = zip_processor.get_all_files(
+            allowed_extensions=SUPPORTED_EXTENSIONS, verbose=verbose
+        )
+        yield code_files
+
+
+def load_directory_files(directory: str, verbose: bool = True) -> list[File]:
+    """
+    Loads the supported source code files from a directory tree. Contents
+    are read from disk when first used.
+
+    Args:
+        directory (str): Root directory.
+        verbose (bool): Whether to print processing info (default True).
+
+    Returns:
+        list[File]: Source code files found under the directory.
+    """
+    code_files = []
+
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for filename in sorted(files):
+            if not filename.endswith(tuple(SUPPORTED_EXTENSIONS)):
+                continue
+
+            file_path = os.path.join(root, filename)
+            code_files.append(
+                File.from_path(file_path, path=os.path.relpath(file_path, directory))
+            )
+
+    if verbose:
+        logger.info(f"Found {len(code_files)} files in directory: {directory}")
+
+    return code_files
+
+
+def load_github_files(repository: str, verbose: bool = True) -> list[File]:
+    """
+    Loads the supported source code files from a GitHub repository.
+
+    Args:
+        repository (str): Repository in the format 'owner/repo'.
+        verbose (bool): Whether to print processing info (default True).
+
+    Returns:
+        list[File]: Source code files found in the repository.
+    """
+    fetcher = GitHubRepositoryFetcher(
+        repository=repository, token=os.getenv("GITHUB_TOKEN"), logger=logger
+    )
+    return fetcher.get_all_files(
+        allowed_extensions=[ext.lstrip(".") for ext in SUPPORTED_EXTENSIONS],
+        verbose=verbose,
     )
 
+
+def evaluate_files(code_files: list[File], verbose: bool = True) -> str:
+    """
+    Evaluates already loaded source code files using an LLM.
+
+    Args:
+        code_files (list[File]): Files to evaluate.
+        verbose (bool): Whether to print processing info (default True).
+
+    Returns:
+        str: Raw response from the LLM. With LLM_STRUCTURED_OUTPUT, the
+        issues of all chunks are merged into a single JSON array.
+    """
     if not code_files:
         return json.dumps([{"Error": "No source code files found."}])
 
-    code_combined = "\n".join(str(code_files))
+    responses = [
+        response for _, response in iter_evaluate_files(code_files, verbose=verbose)
+    ]
+    if STRUCTURED_OUTPUT:
+        # Parsed once here; parse_findings returns these issues as they are
+        return ParsedResponse([issue for response in responses for issue in STRUCTURED_PARSER.parse(response)])
+    return "\n".join(responses)
 
-    response = send_code_to_llm(code_combined, verbose)
-    return response
+
+def iter_evaluate_files(
+    code_files: list[File],
+    verbose: bool = True,
+    max_chars: int = DEFAULT_CHUNK_CHARS,
+    evaluator=None,
+    budget: ScanBudget | None = None,
+):
+    """
+    Evaluates source code files chunk by chunk, riskiest chunks first,
+    yielding each response as soon as it is available. With a budget, the
+    chunks that no longer fit are skipped and recorded in the budget report.
+    The budget clock starts here unless the caller started it earlier, so
+    reading, chunking and scoring the files count against it.
+
+    Args:
+        code_files (list[File]): Files to evaluate.
+        verbose (bool): Whether to print processing info (default True).
+        max_chars (int): Character budget per chunk.
+        evaluator: Evaluator to use instead of get_evaluator() (default None).
+        budget (ScanBudget): Time/token budget and scan report (default None).
+
+    Yields:
+        tuple[Chunk, str]: The evaluated chunk and the raw LLM response.
+    """
+    if budget is None:
+        budget = ScanBudget()
+    budget.start()
+
+    prepare_files(code_files)
+    if CHUNKING == "graph":
+        chunks = build_graph_chunks(code_files, max_chars=max_chars)
+    else:
+        chunks = build_chunks(code_files, max_chars=max_chars)
+
+    scheduled = prioritize_chunks(chunks)
+
+    if verbose:
+        logger.info(f"Evaluating {len(code_files)} files in {len(chunks)} chunks")
+
+    budget.overhead_tokens = budget.overhead_tokens or estimate_tokens(ACTIVE_SYSTEM_PROMPT + standard_text())
+
+    if WORK_QUEUE:
+        # Jobs are leased in enqueue order, so workers follow the priorities
+        yield from iter_queued_chunks(scheduled, verbose, budget=budget)
+        return
+
+    evaluator = evaluator or get_evaluator()
+
+    for chunk, score in scheduled:
+        reason = budget.admit(chunk)
+        if reason is not None:
+            budget.skip(chunk, score, reason)
+            continue
+
+        start = time.monotonic()
+        response, usage = send_chunk_with_usage(chunk, verbose, evaluator=evaluator)
+        tokens = (usage.get("prompt_tokens") or budget.predicted_tokens(chunk)) + (
+            usage.get("output_tokens") or estimate_tokens(response)
+        )
+        budget.record(chunk, score, time.monotonic() - start, tokens)
+
+        yield chunk, response
+        # Keep at most one chunk of file contents in memory
+        chunk.release()
+
+    if verbose and budget.skipped:
+        report = budget.report()
+        logger.info(
+            f"Budget reached: {report['skipped_chunks']} chunks ({len(report['unscanned'])} files) left unscanned"
+        )
+
+    if verbose and isinstance(evaluator, ModelCascade):
+        for tier_stats in evaluator.stats:
+            logger.info(f"Cascade tier stats: {tier_stats}")
+
+    if verbose:
+        for llm in continuation_evaluators(evaluator):
+            logger.info(f"Output control metrics ({llm.model}): {llm.metrics()}")
+
+    if verbose and STRUCTURED_OUTPUT:
+        logger.info(f"Structured output metrics: {STRUCTURED_PARSER.metrics()}")
+
+
+def iter_queued_chunks(
+    scheduled: list[tuple[Chunk, float]],
+    verbose: bool = True,
+    batch: str | None = None,
+    budget: ScanBudget | None = None,
+):
+    """
+    Enqueues chunks on the LLM_WORK_QUEUE queue and yields their responses
+    as workers complete them, in completion order. With a budget, chunks
+    beyond the token budget (predicted from their size) are not enqueued,
+    and the chunks not completed when the time budget runs out are skipped.
+    Whenever collection stops early (time budget, failed job, or the caller
+    closing the generator), the jobs not collected yet are cancelled, so
+    workers do not spend tokens on results nobody reads.
+
+    Args:
+        scheduled (list[tuple[Chunk, float]]): Chunks to evaluate, with their risk score.
+        verbose (bool): Whether to print processing info (default True).
+        batch (str): Batch id, reused to resume a batch (default: a new id).
+        budget (ScanBudget): Time/token budget and scan report (default None).
+
+    Yields:
+        tuple[Chunk, str]: The evaluated chunk and the raw LLM response.
+    """
+    if budget is None:
+        budget = ScanBudget()
+    budget.start()
+
+    chunks = []
+    scores = {}
+    reserved = 0
+    for chunk, score in scheduled:
+        predicted = budget.predicted_tokens(chunk)
+        if budget.tokens is not None and budget.used_tokens + reserved + predicted > budget.tokens:
+            budget.skip(chunk, score, "token budget")
+            continue
+        reserved += predicted
+        chunks.append(chunk)
+        scores[id(chunk)] = score
+
+    queue = open_work_queue(WORK_QUEUE)
+    batch, jobs = enqueue_chunks(queue, chunks, batch, numbered=COMPACT_OUTPUT)
+
+    if verbose:
+        logger.info(f"Enqueued {len(jobs)} chunks as batch {batch} on {WORK_QUEUE}")
+
+    remaining = None if budget.seconds is None else max(0.0, budget.seconds - budget.elapsed)
+    collected = set()
+    last = time.monotonic()
+    try:
+        for job_id, response in collect_results(queue, batch, jobs, timeout=remaining):
+            collected.add(job_id)
+            chunk = jobs[job_id]
+            now = time.monotonic()
+            tokens = budget.predicted_tokens(chunk) + estimate_tokens(response)
+            budget.record(chunk, scores[id(chunk)], now - last, tokens)
+            last = now
+
+            if COMPACT_OUTPUT:
+                response = expand_line_ranges(response, chunk.files)
+            yield chunk, response
+    except TimeoutError:
+        for job_id, chunk in jobs.items():
+            if job_id not in collected:
+                budget.skip(chunk, scores[id(chunk)], "time budget")
+    finally:
+        uncollected = [job_id for job_id in jobs if job_id not in collected]
+        if uncollected:
+            cancelled = queue.cancel(batch, uncollected)
+            if verbose:
+                logger.info(f"Cancelled {cancelled} pending jobs of batch {batch}")
+
+    if verbose and budget.skipped:
+        report = budget.report()
+        logger.info(
+            f"Budget reached: {report['skipped_chunks']} chunks ({len(report['unscanned'])} files) left unscanned"
+        )
 
 
 def parse_json(s):
@@ -215,9 +964,94 @@ def parse_xml(s: str) -> list:
             else:
                 parsed[field] = None
 
+        # Votes and Confidence of stored consensus findings
+        for field, convert in CONSENSUS_FIELDS.items():
+            match = re.search(rf"<{field}>(.*?)</{field}>", issue, re.DOTALL)
+            if match:
+                try:
+                    parsed[field] = convert(match.group(1).strip())
+                except ValueError:
+                    pass
+
         parsed_issues.append(parsed)
 
     return parsed_issues
+
+
+@lru_cache(maxsize=None)
+def get_repair_model():
+    """
+    Returns the process-wide model used for structured output repairs.
+    """
+    configure_genai()
+    return genai.GenerativeModel(REPAIR_MODEL)
+
+
+def reask_repair_model(prompt: str) -> str:
+    """
+    Sends a small repair prompt to the cheap repair model.
+
+    Args:
+        prompt (str): Repair prompt (never the full evaluation prompt).
+
+    Returns:
+        str: Raw repair response.
+    """
+    return get_repair_model().generate_content(prompt).text
+
+
+# Forked children must not reuse the clients of their parent
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=get_evaluator.cache_clear)
+    os.register_at_fork(after_in_child=get_repair_model.cache_clear)
+
+
+STRUCTURED_PARSER = StructuredOutputParser(
+    fields=list(DEFAULT_OUTPUT_ROW.keys()),
+    reask=reask_repair_model,
+    logger=logger,
+)
+
+
+def parse_findings(response: str) -> list[dict]:
+    """
+    Parses a raw LLM response into a list of issues, using the structured
+    output parser (with repairs) when LLM_STRUCTURED_OUTPUT is enabled and
+    the XML parser otherwise.
+
+    Args:
+        response (str): Raw LLM response.
+
+    Returns:
+        list[dict]: Parsed issues.
+    """
+    if STRUCTURED_OUTPUT:
+        return STRUCTURED_PARSER.parse(response)
+    return parse_xml(response)
+
+
+def findings_to_xml(findings: list[dict]) -> str:
+    """
+    Serializes findings back into the XML format requested from the LLM.
+
+    Args:
+        findings (list[dict]): Findings with DEFAULT_OUTPUT_ROW keys, and
+            optionally CONSENSUS_FIELDS.
+
+    Returns:
+        str: XML document that parse_xml reads back.
+    """
+    issues = []
+    for finding in findings:
+        fields = []
+        extra = [field for field in CONSENSUS_FIELDS if finding.get(field) is not None]
+        for field in [*DEFAULT_OUTPUT_ROW.keys(), *extra]:
+            value = str(finding.get(field) or "")
+            value = value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+            fields.append(f"    <{field}>{value}</{field}>")
+        issues.append("  <Issue>\n" + "\n".join(fields) + "\n  </Issue>")
+    return "<Issues>\n" + "\n".join(issues) + "\n</Issues>"
+
     
 def parse_response_to_dataframe(response: str) -> pd.DataFrame:
     """
@@ -230,7 +1064,7 @@ def parse_response_to_dataframe(response: str) -> pd.DataFrame:
         pd.DataFrame: Parsed DataFrame or fallback error information.
     """
     try:
-        parsed = parse_xml(response)
+        parsed = parse_findings(response)
 
         if len(parsed) == 0:
             # If no issues found, return an empty DataFrame
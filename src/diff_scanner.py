@@ -0,0 +1,285 @@
+import re
+
+from file import File
+from snippet_index import SnippetIndex
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+# Suffix added to the name of each context window
+WINDOW_SUFFIX = re.compile(r"\s*\(lines \d+-\d+\)")
+
+# Lines of unchanged code kept around each change
+DEFAULT_CONTEXT_LINES = 10
+
+
+class Hunk:
+    def __init__(self, old_start: int, old_length: int, new_start: int, new_length: int) -> None:
+        """
+        Initialize a unified diff hunk.
+        :param old_start: int, first line of the hunk on the base side (1-based)
+        :param old_length: int, number of base lines covered
+        :param new_start: int, first line of the hunk on the new side (1-based)
+        :param new_length: int, number of new lines covered
+        """
+        self.old_start: int = old_start
+        self.old_length: int = old_length
+        self.new_start: int = new_start
+        self.new_length: int = new_length
+        self.lines: list[tuple[str, str]] = []
+
+    def changed_lines(self) -> list[int]:
+        """
+        Get the new-side line numbers touched by the hunk. A pure deletion is
+        reported at the new-side line where it happened.
+        :return: list of 1-based line numbers
+        """
+        changed = []
+        line = self.new_start
+        for tag, _ in self.lines:
+            if tag == "+":
+                changed.append(line)
+                line += 1
+            elif tag == " ":
+                line += 1
+            elif tag == "-":
+                changed.append(max(1, line))
+        return sorted(set(changed))
+
+
+class FilePatch:
+    def __init__(self, old_path: str | None, new_path: str | None) -> None:
+        """
+        Initialize the patch of a single file.
+        :param old_path: str, base path, or None for added files
+        :param new_path: str, new path, or None for deleted files
+        """
+        self.old_path: str | None = old_path
+        self.new_path: str | None = new_path
+        self.hunks: list[Hunk] = []
+
+    def apply(self, base: str | None) -> list[str]:
+        """
+        Build the new-side lines by applying the hunks to the base content.
+        Without a base, only the lines covered by the hunks are known and the
+        rest is left empty.
+        :param base: str, base file content, or None if unavailable
+        :return: list of new-side lines
+        """
+        if base is None:
+            size = max((hunk.new_start + hunk.new_length - 1 for hunk in self.hunks), default=0)
+            lines = [""] * size
+            for hunk in self.hunks:
+                line = hunk.new_start
+                for tag, text in hunk.lines:
+                    if tag in ("+", " "):
+                        lines[line - 1] = text
+                        line += 1
+            return lines
+
+        base_lines = base.splitlines()
+        new_lines: list[str] = []
+        position = 0
+
+        for hunk in self.hunks:
+            start = max(hunk.old_start - 1, 0) if hunk.old_length else hunk.old_start
+            new_lines.extend(base_lines[position:start])
+            new_lines.extend(text for tag, text in hunk.lines if tag in ("+", " "))
+            position = start + hunk.old_length
+
+        new_lines.extend(base_lines[position:])
+        return new_lines
+
+
+def strip_prefix(path: str) -> str | None:
+    if path == "/dev/null":
+        return None
+    path = path.split("\t")[0].strip()
+    return path[2:] if path.startswith(("a/", "b/")) else path
+
+
+def parse_unified_diff(diff: str) -> list[FilePatch]:
+    """
+    Parses a unified diff (git or plain diff -u) into file patches.
+
+    Args:
+        diff (str): Unified diff text.
+
+    Returns:
+        list[FilePatch]: One patch per modified file.
+    """
+    patches: list[FilePatch] = []
+    patch: FilePatch | None = None
+    hunk: Hunk | None = None
+    old_path: str | None = None
+
+    for line in diff.splitlines():
+        if line.startswith("--- ") and (hunk is None or hunk_done(hunk)):
+            old_path = strip_prefix(line[4:])
+            hunk = None
+            continue
+
+        if line.startswith("+++ ") and (hunk is None or hunk_done(hunk)):
+            patch = FilePatch(old_path, strip_prefix(line[4:]))
+            patches.append(patch)
+            hunk = None
+            continue
+
+        match = HUNK_HEADER.match(line)
+        if match and patch is not None:
+            old_start, old_length, new_start, new_length = match.groups()
+            hunk = Hunk(
+                int(old_start),
+                int(old_length) if old_length is not None else 1,
+                int(new_start),
+                int(new_length) if new_length is not None else 1,
+            )
+            patch.hunks.append(hunk)
+            continue
+
+        if hunk is not None and line[:1] in ("+", "-", " ") and not hunk_done(hunk):
+            hunk.lines.append((line[:1], line[1:]))
+        elif hunk is not None and line == "" and not hunk_done(hunk):
+            # Some tools strip the trailing space of empty context lines
+            hunk.lines.append((" ", ""))
+
+    return patches
+
+
+def hunk_done(hunk: Hunk) -> bool:
+    old = sum(1 for tag, _ in hunk.lines if tag in ("-", " "))
+    new = sum(1 for tag, _ in hunk.lines if tag in ("+", " "))
+    return old >= hunk.old_length and new >= hunk.new_length
+
+
+def context_windows(changed: list[int], line_count: int, context: int) -> list[tuple[int, int]]:
+    """
+    Merges changed lines into windows of surrounding context.
+
+    Args:
+        changed (list[int]): Changed new-side line numbers.
+        line_count (int): Number of lines in the new file.
+        context (int): Context lines on each side.
+
+    Returns:
+        list[tuple[int, int]]: Inclusive 1-based (start, end) windows.
+    """
+    windows: list[tuple[int, int]] = []
+    for line in sorted(changed):
+        start = max(1, line - context)
+        end = min(max(line_count, 1), line + context)
+        if windows and start <= windows[-1][1] + 1:
+            windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+        else:
+            windows.append((start, end))
+    return windows
+
+
+class DiffScan:
+    def __init__(
+        self,
+        patches: list[FilePatch],
+        bases: dict[str, str | None],
+        context: int = DEFAULT_CONTEXT_LINES,
+    ) -> None:
+        """
+        Initialize a diff scan: the new side of every patched file is rebuilt
+        from its base, and only the windows around the changed lines are sent
+        to the LLM.
+        :param patches: list of FilePatch, parsed diff
+        :param bases: dict mapping old paths to base contents (None if unknown)
+        :param context: int, context lines kept around each change
+        """
+        self.new_lines: dict[str, list[str]] = {}
+        self.changed: dict[str, set[int]] = {}
+        self.windows: dict[str, list[tuple[int, int]]] = {}
+        self._index: SnippetIndex | None = None
+
+        for patch in patches:
+            if patch.new_path is None or not patch.hunks:
+                continue
+
+            base = bases.get(patch.old_path) if patch.old_path else ""
+            lines = patch.apply(base)
+            changed = {line for hunk in patch.hunks for line in hunk.changed_lines()}
+
+            self.new_lines[patch.new_path] = lines
+            self.changed[patch.new_path] = changed
+            self.windows[patch.new_path] = context_windows(sorted(changed), len(lines), context)
+
+    def window_files(self) -> list[File]:
+        """
+        Get the context windows as files, named after the new-side line range
+        they cover.
+        :return: list of File objects
+        """
+        files = []
+        for path, windows in self.windows.items():
+            extension = path.split(".")[-1] if "." in path else ""
+            for start, end in windows:
+                files.append(
+                    File(
+                        path=f"{path} (lines {start}-{end})",
+                        extension=extension,
+                        content="\n".join(self.new_lines[path][start - 1:end]),
+                    )
+                )
+        return files
+
+    def candidate_paths(self, file_field: str | None) -> list[str]:
+        """
+        Get the patched paths a reported File field may refer to.
+        :param file_field: str, File field reported by the LLM
+        :return: list of matching paths
+        """
+        paths = []
+        for name in (file_field or "").split(","):
+            name = WINDOW_SUFFIX.sub("", name).strip()
+            if name in self.new_lines:
+                paths.append(name)
+            elif name:
+                basename = name.replace("\\", "/").split("/")[-1]
+                paths.extend(p for p in self.new_lines if p.split("/")[-1] == basename)
+        return paths
+
+    @property
+    def index(self) -> SnippetIndex:
+        """
+        Snippet index of the new sides, built on first use.
+        """
+        if self._index is None:
+            self._index = SnippetIndex(
+                [File(path=path, content="\n".join(lines)) for path, lines in self.new_lines.items()]
+            )
+        return self._index
+
+    def in_window(self, path: str, line: int) -> bool:
+        return any(start <= line <= end for start, end in self.windows.get(path, []))
+
+    def locate(self, file_field: str | None, code: str | None) -> tuple[str | None, int | None, int | None]:
+        """
+        Map a finding to new-side line numbers through the snippet index, as
+        the exporters do. Among equally good matches, those in the reported
+        file and then those inside the scanned windows are preferred.
+        :param file_field: str, File field reported by the LLM
+        :param code: str, Code field reported by the LLM
+        :return: tuple (path, start_line, end_line); unknown parts are None
+        """
+        paths = self.candidate_paths(file_field)
+        names = ",".join(WINDOW_SUFFIX.sub("", name) for name in (file_field or "").split(","))
+        match = self.index.locate(code, names, prefer=self.in_window)
+        if match is not None:
+            return match.path, match.start, match.end
+
+        return (paths[0] if paths else None), None, None
+
+    def touches_change(self, path: str | None, start: int | None, end: int | None) -> bool:
+        """
+        Check whether a line range overlaps the lines changed by the diff.
+        :param path: str, patched path
+        :param start: int, first line of the range
+        :param end: int, last line of the range
+        :return: bool
+        """
+        if path not in self.changed or start is None:
+            return False
+        return any(start <= line <= (end or start) for line in self.changed[path])
@@ -0,0 +1,75 @@
+import os
+import threading
+import time
+
+
+class EvaluatorRegistry:
+    def __init__(self, factory) -> None:
+        """
+        Initialize a registry of long-lived evaluators, built once per process
+        and per key, and shared by every request of that process. Clients
+        inherited through a fork hold connections of the parent, so the
+        registry empties itself in forked children and they build their own.
+        :param factory: callable(key) -> evaluator
+        """
+        self.factory = factory
+        self._evaluators: dict = {}
+        self._lock = threading.Lock()
+        self.build_seconds: dict = {}
+
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self.reset)
+
+    def get(self, key):
+        """
+        Get the evaluator of a key, building it on first use.
+        :param key: hashable key passed to the factory (e.g. a model name)
+        :return: evaluator
+        """
+        evaluator = self._evaluators.get(key)
+        if evaluator is not None:
+            return evaluator
+
+        with self._lock:
+            if key not in self._evaluators:
+                start = time.perf_counter()
+                self._evaluators[key] = self.factory(key)
+                self.build_seconds[key] = time.perf_counter() - start
+            return self._evaluators[key]
+
+    def reset(self) -> None:
+        """
+        Drop every evaluator; they are rebuilt on next use.
+        """
+        self._lock = threading.Lock()
+        self._evaluators = {}
+        self.build_seconds = {}
+
+    def warmup(self, keys) -> list[dict]:
+        """
+        Build the evaluators of the given keys and open their connections with
+        a cheap call, reporting the health of each backend.
+        :param keys: iterable of keys
+        :return: list of dicts with key, ok, build_seconds, warmup_seconds and error
+        """
+        report = []
+        for key in keys:
+            status = {"key": key, "ok": True, "build_seconds": None, "warmup_seconds": None, "error": None}
+            try:
+                evaluator = self.get(key)
+                status["build_seconds"] = self.build_seconds.get(key)
+                start = time.perf_counter()
+                warmup = getattr(evaluator, "warmup", None)
+                if warmup is not None:
+                    warmup()
+                status["warmup_seconds"] = time.perf_counter() - start
+            except Exception as e:
+                status.update(ok=False, error=str(e))
+            report.append(status)
+        return report
+
+    def __contains__(self, key) -> bool:
+        return key in self._evaluators
+
+    def __len__(self) -> int:
+        return len(self._evaluators)
@@ -0,0 +1,238 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from collections.abc import Iterable
+
+from file import File
+from snippet_index import SnippetIndex
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_VERSION = "2.1.0"
+TOOL_NAME = "llm-iso-5055"
+TOOL_URI = "https://github.com/EnriqueVilchezL/llm-iso-5055"
+
+SEVERITY_LEVELS = {
+    "Critical": "error",
+    "High": "error",
+    "Medium": "warning",
+    "Low": "note",
+}
+
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "llm-iso-5055-exports")
+
+
+class RegionResolver:
+    def __init__(self, files: list[File] | None = None) -> None:
+        """
+        Initialize a resolver mapping reported File/Code fields to file regions.
+        File lines are indexed once, so that each lookup is independent of the
+        project size, but only when first needed: either as the files of each
+        evaluated chunk are added, while their content is still loaded, or
+        all at once on the first resolve if none were added.
+        :param files: list of File objects the findings refer to
+        """
+        self.files: dict[str, File] = {}
+        self.by_name: dict[str, list[str]] = defaultdict(list)
+        self._index: SnippetIndex | None = None
+        self._indexed: set[int] = set()
+
+        for file in files or []:
+            self.files[file.path] = file
+            self.by_name[os.path.basename(file.path)].append(file.path)
+
+    def add(self, files: list[File]) -> None:
+        """
+        Index files not indexed yet, e.g. those of a chunk just evaluated.
+        :param files: list of File objects
+        """
+        if self._index is None:
+            self._index = SnippetIndex()
+        for file in files:
+            if id(file) not in self._indexed:
+                self._indexed.add(id(file))
+                self._index.add(file)
+
+    @property
+    def index(self) -> SnippetIndex:
+        if self._index is None:
+            self.add(list(self.files.values()))
+        return self._index
+
+    def candidate_paths(self, file_field: str | None) -> list[str]:
+        """
+        Get the known paths a reported File field may refer to.
+        :param file_field: str, comma-separated file names reported by the LLM
+        :return: list of matching paths
+        """
+        paths = []
+        for name in (file_field or "").split(","):
+            name = name.strip()
+            if not name:
+                continue
+            if name in self.files:
+                paths.append(name)
+            else:
+                paths.extend(self.by_name.get(os.path.basename(name), []))
+        return paths
+
+    def resolve(self, file_field: str | None, code: str | None) -> tuple[str | None, int | None, int | None]:
+        """
+        Resolve a finding to a path and a 1-based line range.
+        :param file_field: str, File field reported by the LLM
+        :param code: str, Code field reported by the LLM
+        :return: tuple (path, start_line, end_line); unknown parts are None
+        """
+        match = self.index.locate(code, file_field)
+        if match is not None:
+            return match.path, match.start, match.end
+
+        paths = self.candidate_paths(file_field)
+        return (paths[0] if paths else None), None, None
+
+
+class FindingsWriter(ABC):
+    def __init__(self, path: str, resolver: RegionResolver | None = None) -> None:
+        """
+        Initialize a writer that streams findings to a file as they arrive.
+        :param path: str, output file path
+        :param resolver: RegionResolver used to attach file regions
+        """
+        self.path: str = path
+        self.resolver: RegionResolver = resolver or RegionResolver()
+        self.count: int = 0
+        self._file = open(path, "w", encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def write(self, findings: Iterable[dict]) -> None:
+        """
+        Write a batch of findings (e.g. the issues of one evaluated chunk).
+        :param findings: iterable of finding dicts with DEFAULT_OUTPUT_ROW keys
+        """
+        for finding in findings:
+            path, start, end = self.resolver.resolve(finding.get("File"), finding.get("Code"))
+            self._write_one(finding, path, start, end)
+            self.count += 1
+        self._file.flush()
+
+    @abstractmethod
+    def _write_one(self, finding: dict, path: str | None, start: int | None, end: int | None) -> None:
+        """
+        Write one finding with its resolved region.
+        """
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+class JsonlFindingsWriter(FindingsWriter):
+    def _write_one(self, finding, path, start, end) -> None:
+        record = dict(finding)
+        record["Path"] = path
+        record["Start Line"] = start
+        record["End Line"] = end
+        # A snippet that matches no line of the project was made up by the LLM
+        record["Hallucinated"] = bool(finding.get("Code")) and start is None
+        self._file.write(json.dumps(record) + "\n")
+
+
+class SarifFindingsWriter(FindingsWriter):
+    def __init__(self, path: str, resolver: RegionResolver | None = None) -> None:
+        """
+        Initialize a SARIF 2.1.0 writer. Results are written as they arrive;
+        the tool section, with the rules seen, is written on close.
+        :param path: str, output file path
+        :param resolver: RegionResolver used to attach file regions
+        """
+        super().__init__(path, resolver)
+        self.rules: dict[str, str] = {}
+        self._file.write(
+            '{"version": "%s", "$schema": "%s", "runs": [{"results": [\n'
+            % (SARIF_VERSION, SARIF_SCHEMA)
+        )
+
+    def _write_one(self, finding, path, start, end) -> None:
+        rule_id = finding.get("Weakness") or "None"
+        self.rules.setdefault(rule_id, finding.get("Description") or rule_id)
+
+        level = "warning"
+        for severity, sarif_level in SEVERITY_LEVELS.items():
+            if severity in (finding.get("Severity") or ""):
+                level = sarif_level
+                break
+
+        result = {
+            "ruleId": rule_id,
+            "level": level,
+            "message": {"text": finding.get("Justification") or finding.get("Description") or rule_id},
+            "properties": {
+                "type": finding.get("Type"),
+                "severity": finding.get("Severity"),
+                "hallucinated": bool(finding.get("Code")) and start is None,
+            },
+        }
+
+        if path or finding.get("File"):
+            physical_location = {"artifactLocation": {"uri": path or finding.get("File")}}
+            region = {}
+            if start is not None:
+                region["startLine"] = start
+                region["endLine"] = end
+            if finding.get("Code"):
+                region["snippet"] = {"text": finding["Code"]}
+            if region:
+                physical_location["region"] = region
+            result["locations"] = [{"physicalLocation": physical_location}]
+
+        separator = ",\n" if self.count else ""
+        self._file.write(separator + json.dumps(result))
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+
+        tool = {
+            "driver": {
+                "name": TOOL_NAME,
+                "informationUri": TOOL_URI,
+                "rules": [
+                    {"id": rule_id, "shortDescription": {"text": description}}
+                    for rule_id, description in self.rules.items()
+                ],
+            }
+        }
+        self._file.write('\n], "tool": %s}]}\n' % json.dumps(tool))
+        super().close()
+
+
+def new_export_dir(max_age: float = 3600.0) -> str:
+    """
+    Creates a fresh directory for export files and removes export
+    directories older than max_age seconds.
+
+    Args:
+        max_age (float): Age in seconds after which old exports are deleted.
+
+    Returns:
+        str: Path to the new directory.
+    """
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    now = time.time()
+
+    for entry in os.scandir(EXPORT_DIR):
+        try:
+            if entry.is_dir() and now - entry.stat().st_mtime > max_age:
+                shutil.rmtree(entry.path, ignore_errors=True)
+        except OSError:
+            continue
+
+    return tempfile.mkdtemp(prefix="findings-", dir=EXPORT_DIR)
@@ -1,14 +1,132 @@
+import hashlib
+import os
+
+
 class File:
-    def __init__(self, path: str, extension: str = None, content: str = None):
+    __slots__ = ("path", "extension", "_content", "_loader", "_keep", "_size", "_hash", "_derived")
+
+    def __init__(
+        self,
+        path: str,
+        extension: str = None,
+        content: str = None,
+        loader=None,
+        keep_loaded: bool = False,
+    ):
         """
         Initialize a File object.
+        The content is either given directly or loaded on first access from its
+        source (zip member, GitHub blob, disk) through the loader.
         :param path: str, path to the file
         :param extension: str, file extension
         :param content: str, file content
+        :param loader: callable returning the content as str or UTF-8 bytes
+        :param keep_loaded: bool, if True, never release the loaded content
+            (e.g. when loading it again means another download)
         """
         self.path = path
         self.extension = extension
-        self.content = content
+        self._content = content
+        self._loader = loader
+        self._keep = keep_loaded
+        self._size = None if content is None else len(content)
+        self._hash = None
+        self._derived: dict | None = None
+
+    @classmethod
+    def from_path(cls, file_path: str, path: str = None) -> "File":
+        """
+        Create a File whose content is read from disk on first access.
+        :param file_path: str, path on disk
+        :param path: str, path to report (default file_path)
+        :return: File
+        """
+        def load() -> bytes:
+            with open(file_path, "rb") as file:
+                return file.read()
+
+        return cls(
+            path=path or file_path,
+            extension=file_path.split(".")[-1] if "." in os.path.basename(file_path) else "",
+            loader=load,
+        )
+
+    @property
+    def content(self) -> str:
+        if self._content is None and self._loader is not None:
+            content = self._loader()
+            if isinstance(content, (bytes, bytearray, memoryview)):
+                content = bytes(content).decode("utf-8")
+            self._content = content
+            self._size = len(content)
+        return self._content
+
+    @content.setter
+    def content(self, value: str) -> None:
+        self._content = value
+        self._size = None if value is None else len(value)
+        self._hash = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._content is not None
+
+    @property
+    def size(self) -> int:
+        """
+        Length of the content in characters, measured on the first load and
+        kept when the content is released. Content loaded only to measure it
+        is released again.
+        """
+        if self._size is None:
+            loaded = self.loaded
+            self._size = len(self.content or "")
+            if not loaded:
+                self.release()
+        return self._size
+
+    @property
+    def content_hash(self) -> str:
+        """
+        SHA-256 of the content, computed once.
+        """
+        if self._hash is None:
+            self._hash = hashlib.sha256((self.content or "").encode("utf-8")).hexdigest()
+        return self._hash
+
+    def derive(self, key: str, compute):
+        """
+        Get a value derived from the content (e.g. a risk score), computed
+        once and kept when the content is released. Content loaded only to
+        compute it is released again.
+        :param key: str, name of the derived value
+        :param compute: callable(content) -> value
+        :return: the derived value
+        """
+        if self._derived is not None and key in self._derived:
+            return self._derived[key]
+
+        loaded = self.loaded
+        value = compute(self.content or "")
+        if self._derived is None:
+            self._derived = {}
+        self._derived[key] = value
+        if not loaded:
+            self.release()
+        return value
+
+    def has_derived(self, key: str) -> bool:
+        return self._derived is not None and key in self._derived
+
+    def release(self) -> None:
+        """
+        Drop the loaded content if it can be loaded again from its source.
+        """
+        if self._loader is not None and not self._keep:
+            self._content = None
 
     def __repr__(self):
-        return f"File(path={self.path}, extension={self.extension}, content={self.content})"
+        return (
+            f"File(path={self.path}, extension={self.extension}, "
+            f"size={self._size}, loaded={self.loaded})"
+        )
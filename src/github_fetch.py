@@ -1,6 +1,7 @@
 import requests
 import logging
 from collections import deque
+from functools import partial
 
 from file import File
 
@@ -29,6 +30,8 @@ class GitHubRepositoryFetcher:
         self.headers: dict[str, str] = (
             {"Authorization": f"token {self.token}"} if token else {}
         )
+        # One keep-alive connection pool for the listing and every lazy download
+        self.session: requests.Session = requests.Session()
 
     def _log(self, message: str) -> None:
         """
@@ -60,7 +63,7 @@ class GitHubRepositoryFetcher:
             current_path = queue.popleft()
 
             # Fetch the contents of the current directory
-            response = requests.get(
+            response = self.session.get(
                 url.format(repository=self.repository, path=current_path),
                 headers=self.headers,
             )
@@ -84,7 +87,15 @@ class GitHubRepositoryFetcher:
             file_extension: str | None = (
                 file_path.split(".")[-1] if "." in file_path else None
             )
-            file_objects.append(File(path=file_path, extension=file_extension))
+            # Contents are downloaded when first used, and only once
+            file_objects.append(
+                File(
+                    path=file_path,
+                    extension=file_extension,
+                    loader=partial(self.get_file_content, file_path, verbose=verbose),
+                    keep_loaded=True,
+                )
+            )
 
         return file_objects
 
@@ -110,9 +121,6 @@ class GitHubRepositoryFetcher:
             and any(file.extension.endswith(ext) for ext in allowed_extensions)
         ]
 
-        for file in filtered_files:
-            file.content = self.get_file_content(file.path, verbose=verbose)
-
         if verbose:
             if allowed_extensions:
                 self._log(
@@ -140,7 +148,7 @@ class GitHubRepositoryFetcher:
         if verbose:
             self._log(f"Fetching file from {url}")
 
-        response = requests.get(url, headers=self.headers)
+        response = self.session.get(url, headers=self.headers)
         response.raise_for_status()
 
         if verbose:
@@ -0,0 +1,340 @@
+import os
+import re
+from collections import defaultdict, deque
+
+from chunker import Chunk, DEFAULT_CHUNK_CHARS, formatted_size
+from file import File
+
+# Import/include patterns per file extension. Each pattern captures a module
+# reference that resolve_reference() maps to files of the project.
+IMPORT_PATTERNS: dict[str, list[re.Pattern]] = {
+    "py": [
+        re.compile(r"^\s*from\s+(\.*[\w.]*)\s+import\b", re.MULTILINE),
+        re.compile(r"^\s*import\s+([\w.]+)", re.MULTILINE),
+    ],
+    "c": [re.compile(r'^\s*#\s*include\s+"([^"]+)"', re.MULTILINE)],
+    "java": [re.compile(r"^\s*import\s+(?:static\s+)?([\w.]+)\s*;", re.MULTILINE)],
+    "kt": [re.compile(r"^\s*import\s+([\w.]+)", re.MULTILINE)],
+    "cs": [re.compile(r"^\s*using\s+(?:static\s+)?([\w.]+)\s*;", re.MULTILINE)],
+    "js": [
+        re.compile(r"""\bfrom\s+['"]([^'"]+)['"]"""),
+        re.compile(r"""\brequire\s*\(\s*['"]([^'"]+)['"]\s*\)"""),
+        re.compile(r"""\bimport\s*\(\s*['"]([^'"]+)['"]\s*\)"""),
+    ],
+    "go": [re.compile(r'^\s*(?:import\s+)?(?:\w+\s+)?"([\w./-]+)"\s*$', re.MULTILINE)],
+    "rs": [
+        re.compile(r"^\s*(?:pub\s+)?mod\s+(\w+)\s*;", re.MULTILINE),
+        re.compile(r"^\s*(?:pub\s+)?use\s+((?:crate|super|self)::[\w:]+)", re.MULTILINE),
+    ],
+    "php": [
+        re.compile(r"""\b(?:include|require)(?:_once)?\s*\(?\s*['"]([^'"]+)['"]"""),
+        re.compile(r"^\s*use\s+([\w\\]+)", re.MULTILINE),
+    ],
+    "rb": [re.compile(r"""^\s*require(?:_relative)?\s*\(?\s*['"]([^'"]+)['"]""", re.MULTILINE)],
+}
+
+# Extensions sharing the same import syntax
+PATTERN_ALIASES = {
+    "h": "c", "cpp": "c", "hpp": "c", "cc": "c", "hh": "c",
+    "ts": "js", "kts": "kt",
+}
+
+# C# files are linked through the namespaces they declare
+NAMESPACE_PATTERN = re.compile(r"^\s*namespace\s+([\w.]+)", re.MULTILINE)
+
+
+def strip_extension(path: str) -> str:
+    base, _ = os.path.splitext(path)
+    return base
+
+
+def extract_references(file: File, content: str) -> list[str]:
+    """
+    Extracts the raw module references of a file.
+
+    Args:
+        file (File): File being parsed.
+        content (str): File content.
+
+    Returns:
+        list[str]: Module references.
+    """
+    extension = PATTERN_ALIASES.get(file.extension, file.extension)
+    references = []
+    for pattern in IMPORT_PATTERNS.get(extension, []):
+        references.extend(pattern.findall(content))
+    return references
+
+
+def file_references(file: File) -> tuple[list[str], list[str]]:
+    """
+    Gets the module references of a file and, for C#, the namespaces it
+    declares. They are computed once per file and kept when its content is
+    released.
+
+    Args:
+        file (File): File to parse.
+
+    Returns:
+        tuple[list[str], list[str]]: Module references and declared namespaces.
+    """
+    def parse(content: str) -> tuple[list[str], list[str]]:
+        namespaces = NAMESPACE_PATTERN.findall(content) if file.extension == "cs" else []
+        return extract_references(file, content), namespaces
+
+    return file.derive("references", parse)
+
+
+class ImportGraph:
+    def __init__(self, files: list[File]) -> None:
+        """
+        Initialize an undirected dependency graph between project files, built
+        from their import/include statements (see file_references). Nodes are
+        the positions of the files in the list, so that files sharing a path
+        (e.g. from two sources) are all kept.
+        :param files: list of File objects
+        """
+        self.files: list[File] = list(files)
+        self.edges: dict[int, set[int]] = {node: set() for node in range(len(self.files))}
+
+        # Every suffix of every path (without extension) -> files, e.g.
+        # "src/app/models/user" is reachable as "user", "models/user", ...
+        self._suffixes: dict[str, list[int]] = defaultdict(list)
+        self._namespaces: dict[str, list[int]] = defaultdict(list)
+        # Same for directories, for languages importing packages (Go)
+        self._directories: dict[str, list[int]] = defaultdict(list)
+
+        for node, file in enumerate(self.files):
+            parts = strip_extension(file.path).replace("\\", "/").split("/")
+            for i in range(len(parts)):
+                self._suffixes["/".join(parts[i:])].append(node)
+            for i in range(len(parts) - 1):
+                self._directories["/".join(parts[i:-1])].append(node)
+
+        references = {}
+        for node, file in enumerate(self.files):
+            references[node], namespaces = file_references(file)
+            for namespace in namespaces:
+                self._namespaces[namespace].append(node)
+
+        for node, refs in references.items():
+            for reference in refs:
+                for target in self.resolve_reference(node, reference):
+                    if target != node:
+                        self.edges[node].add(target)
+                        self.edges[target].add(node)
+
+    def _lookup(self, stem: str) -> list[int]:
+        stem = stem.strip("/")
+        if not stem:
+            return []
+        return (
+            self._suffixes.get(stem, [])
+            + self._suffixes.get(f"{stem}/index", [])
+            + self._suffixes.get(f"{stem}/__init__", [])
+        )
+
+    def _directory_parts(self, node: int) -> list[str]:
+        return [part for part in os.path.dirname(self.files[node].path.replace("\\", "/")).split("/") if part]
+
+    def _closest(self, node: int, candidates: list[int]) -> list[int]:
+        """
+        Keep the candidates whose directory is closest to the importing file,
+        so that a common name (e.g. utils) links to the nearest match only.
+        :param node: int, importing file
+        :param candidates: list of matching files
+        :return: list of the closest candidates
+        """
+        if len(candidates) < 2:
+            return candidates
+        origin = self._directory_parts(node)
+
+        def distance(candidate: int) -> int:
+            parts = self._directory_parts(candidate)
+            common = 0
+            for a, b in zip(origin, parts):
+                if a != b:
+                    break
+                common += 1
+            return len(origin) + len(parts) - 2 * common
+
+        distances = {candidate: distance(candidate) for candidate in candidates}
+        best = min(distances.values())
+        return [candidate for candidate in candidates if distances[candidate] == best]
+
+    def resolve_reference(self, node: int, reference: str) -> list[int]:
+        """
+        Resolve a module reference to project files. A reference matching
+        several files resolves to the ones in the closest directories.
+        :param node: int, position of the importing file
+        :param reference: str, module reference found in the file
+        :return: list of matching file positions (empty for external modules)
+        """
+        path = self.files[node].path
+        directory = os.path.dirname(path)
+        extension = PATTERN_ALIASES.get(self.files[node].extension, self.files[node].extension)
+
+        # A namespace spans all the files declaring it
+        if extension == "cs" and reference in self._namespaces:
+            return self._namespaces[reference]
+
+        return self._closest(node, self._resolve(directory, extension, reference))
+
+    def _resolve(self, directory: str, extension: str, reference: str) -> list[int]:
+        # Relative paths (JS/TS, PHP, C includes, Ruby require_relative)
+        if reference.startswith(".") and ("/" in reference or extension != "py"):
+            stem = strip_extension(os.path.normpath(os.path.join(directory, reference)))
+            return self._lookup(stem.replace("\\", "/"))
+
+        if extension == "py" and reference.startswith("."):
+            level = len(reference) - len(reference.lstrip("."))
+            base = directory
+            for _ in range(level - 1):
+                base = os.path.dirname(base)
+            module = reference.lstrip(".").replace(".", "/")
+            if not module:
+                # from . import x: the package itself
+                return self._lookup(f"{base}/__init__".replace("\\", "/"))
+            return self._lookup(os.path.join(base, module).replace("\\", "/"))
+
+        if extension == "rs":
+            module = reference.split("::")
+            if module[0] in ("crate", "super", "self"):
+                module = module[1:]
+            # use crate::a::b::Item may point at a/b.rs or a.rs
+            for end in range(len(module), 0, -1):
+                found = self._lookup("/".join(module[:end])) or self._lookup("/".join(module[:end] + ["mod"]))
+                if found:
+                    return found
+            return []
+
+        if extension == "js":
+            # Bare specifiers are packages
+            return []
+
+        if extension == "go":
+            # Module paths end with the package directory inside the project
+            parts = reference.split("/")
+            for i in range(len(parts)):
+                found = self._directories.get("/".join(parts[i:]))
+                if found:
+                    return found
+            return []
+
+        if extension in ("c", "php", "rb"):
+            return self._lookup(strip_extension(reference).replace("\\", "/"))
+
+        # Dotted module names (Python, Java, Kotlin, C# without namespace match)
+        module = reference.replace("\\", "/").replace(".", "/")
+        while module:
+            found = self._lookup(module)
+            if found:
+                return found
+            if "/" not in module:
+                break
+            module = module.rsplit("/", 1)[0]
+        return []
+
+    def communities(self, max_iterations: int = 20) -> list[list[int]]:
+        """
+        Find communities with deterministic label propagation. Files are visited
+        in path order and ties go to the smallest label, so results are stable.
+        :param max_iterations: int, maximum number of propagation rounds
+        :return: list of communities, each a list of file positions in breadth-first order
+        """
+        # Labels are ranks in path order, so ties go to the smallest path
+        order = sorted(self.edges, key=lambda node: (self.files[node].path, node))
+        rank = {node: i for i, node in enumerate(order)}
+        labels = {node: rank[node] for node in self.edges}
+
+        for _ in range(max_iterations):
+            changed = False
+            for node in order:
+                if not self.edges[node]:
+                    continue
+                counts: dict[int, int] = defaultdict(int)
+                for neighbor in self.edges[node]:
+                    counts[labels[neighbor]] += 1
+                best = max(counts.values())
+                label = min(label for label, count in counts.items() if count == best)
+                if label != labels[node] and counts.get(labels[node], 0) < best:
+                    labels[node] = label
+                    changed = True
+            if not changed:
+                break
+
+        groups: dict[int, set[int]] = defaultdict(set)
+        for node in order:
+            groups[labels[node]].add(node)
+
+        return [self._bfs_order(members, rank) for members in groups.values()]
+
+    def _bfs_order(self, members: set[int], rank: dict[int, int]) -> list[int]:
+        """
+        Order a community breadth-first from its most connected file, so that
+        splitting it keeps neighbours together.
+        :param members: set of file positions in the community
+        :param rank: dict of file position -> rank in path order
+        :return: list of file positions
+        """
+        ordered = []
+        seen = set()
+        for start in sorted(members, key=lambda node: (-len(self.edges[node]), rank[node])):
+            if start in seen:
+                continue
+            queue = deque([start])
+            seen.add(start)
+            while queue:
+                node = queue.popleft()
+                ordered.append(node)
+                for neighbor in sorted(self.edges[node] & members, key=rank.__getitem__):
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        queue.append(neighbor)
+        return ordered
+
+
+def build_graph_chunks(files: list[File], max_chars: int = DEFAULT_CHUNK_CHARS) -> list[Chunk]:
+    """
+    Packs files into chunks along import-graph communities: related files are
+    kept in the same chunk when they fit, and communities are combined with
+    first-fit decreasing packing to keep the number of chunks low.
+
+    Args:
+        files (list[File]): Files to pack.
+        max_chars (int): Character budget per chunk.
+
+    Returns:
+        list[Chunk]: Chunks covering every file exactly once.
+    """
+    graph = ImportGraph(files)
+
+    # Communities larger than the budget are split along their BFS order
+    groups: list[list[File]] = []
+    for community in graph.communities():
+        group: list[File] = []
+        size = 0
+        for node in community:
+            file = graph.files[node]
+            file_size = formatted_size(file)
+            if group and size + file_size > max_chars:
+                groups.append(group)
+                group, size = [], 0
+            group.append(file)
+            size += file_size
+        if group:
+            groups.append(group)
+
+    groups.sort(key=lambda group: (-sum(formatted_size(file) for file in group), group[0].path))
+
+    chunks: list[Chunk] = []
+    for group in groups:
+        group_size = sum(formatted_size(file) for file in group)
+        target = next((chunk for chunk in chunks if chunk.size + group_size <= max_chars), None)
+        if target is None:
+            target = Chunk()
+            chunks.append(target)
+        for file in group:
+            target.add(file)
+
+    return chunks
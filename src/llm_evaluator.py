@@ -1,22 +1,131 @@
+import time
+
 from langchain_google_genai import ChatGoogleGenerativeAI
 import google.generativeai as genai
 
+# Provider finish reasons meaning the output hit its token limit
+LENGTH_FINISH_REASONS = {"MAX_TOKENS", "length"}
+
+
 class LLMEvaluator:
-    def __init__(self, model: ChatGoogleGenerativeAI, system_prompt: str):
+    def __init__(self, model: ChatGoogleGenerativeAI, system_prompt: str, max_tokens_param: str | None = None):
         self.model = model
         self.system_prompt = system_prompt
+        # Invocation keyword limiting the output (e.g. "num_predict" for Ollama)
+        self.max_tokens_param = max_tokens_param
+        self.last_usage: dict[str, int] = {}
+        self.last_finish_reason: str | None = None
+
+    def evaluate(self, input_variables: dict[str, str], max_output_tokens: int | None = None) -> str:
+        response, self.last_usage, self.last_finish_reason = self.call(input_variables, max_output_tokens)
+        return response
 
-    def evaluate(self, input_variables: dict[str, str]) -> str:
+    def call(self, input_variables: dict[str, str], max_output_tokens: int | None = None) -> tuple[str, dict, str | None]:
+        """
+        Send one request.
+        :return: tuple of the response, its token usage and its finish reason
+        """
         formatted_prompt = self.system_prompt.format(**input_variables)
-        response = self.model.invoke(formatted_prompt)
-        return str(response.content)
+        model = self.model
+        if max_output_tokens and self.max_tokens_param:
+            model = model.bind(**{self.max_tokens_param: max_output_tokens})
+        response = model.invoke(formatted_prompt)
+        usage = getattr(response, "usage_metadata", None) or {}
+        metadata = getattr(response, "response_metadata", None) or {}
+        reason = metadata.get("done_reason") or metadata.get("finish_reason")
+        return (
+            str(response.content),
+            {"prompt_tokens": usage.get("input_tokens", 0), "output_tokens": usage.get("output_tokens", 0)},
+            "length" if reason in LENGTH_FINISH_REASONS else reason,
+        )
+
+    def warmup(self) -> None:
+        """
+        Open the connection (and load a local model) with a one-word prompt.
+        """
+        self.model.invoke("ping")
     
 class GenAIEvaluator:
-    def __init__(self, model, system_prompt: str):
+    def __init__(self, model, system_prompt: str, generation_config: dict | None = None):
         self.model = model
         self.system_prompt = system_prompt
+        self.generation_config = generation_config
+        self.last_usage: dict[str, int] = {}
+        self.last_finish_reason: str | None = None
+
+    def evaluate(self, input_variables: dict[str, str], max_output_tokens: int | None = None) -> str:
+        response, self.last_usage, self.last_finish_reason = self.call(input_variables, max_output_tokens)
+        return response
+
+    def call(self, input_variables: dict[str, str], max_output_tokens: int | None = None) -> tuple[str, dict, str | None]:
+        """
+        Send one request.
+        :return: tuple of the response, its token usage and its finish reason
+        """
+        formatted_prompt = self.system_prompt.format(**input_variables)
+        generation_config = self.generation_config
+        if max_output_tokens:
+            generation_config = {**(generation_config or {}), "max_output_tokens": max_output_tokens}
+        response = self.model.generate_content(
+            formatted_prompt, generation_config=generation_config
+        )
+        usage = getattr(response, "usage_metadata", None)
+        reason = getattr(response.candidates[0].finish_reason, "name", None) if response.candidates else None
+        return (
+            response.text,
+            {
+                "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+                "output_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+            },
+            "length" if reason in LENGTH_FINISH_REASONS else reason,
+        )
+
+    def warmup(self) -> None:
+        """
+        Open the connection with a token count, which generates nothing.
+        """
+        self.model.count_tokens("ping")
+
+
+class StubEvaluator:
+    def __init__(self, system_prompt: str, response: str = "<Issues>\n</Issues>", latency: float = 0.0):
+        """
+        Initialize an evaluator that answers every prompt with a fixed response,
+        so the local cost of a request (prompt building, client setup) can be
+        measured without any backend.
+        :param system_prompt: str, prompt template formatted on every call
+        :param response: str, response returned for every prompt
+        :param latency: float, seconds to sleep per call
+        """
+        self.model = "stub"
+        self.system_prompt = system_prompt
+        self.response = response
+        self.latency = latency
+        self.last_usage: dict[str, int] = {}
+        self.last_finish_reason: str | None = None
+
+    def evaluate(self, input_variables: dict[str, str], max_output_tokens: int | None = None) -> str:
+        response, self.last_usage, self.last_finish_reason = self.call(input_variables, max_output_tokens)
+        return response
 
-    def evaluate(self, input_variables: dict[str, str]) -> str:
+    def call(self, input_variables: dict[str, str], max_output_tokens: int | None = None) -> tuple[str, dict, str | None]:
+        """
+        Answer one request.
+        :return: tuple of the response, its token usage and its finish reason
+        """
         formatted_prompt = self.system_prompt.format(**input_variables)
-        response = self.model.generate_content(formatted_prompt)
-        return response.text
\ No newline at end of file
+        if self.latency:
+            time.sleep(self.latency)
+        response = self.response
+        finish_reason = "stop"
+        if max_output_tokens and len(response) > max_output_tokens * 4:
+            response = response[:max_output_tokens * 4]
+            finish_reason = "length"
+        usage = {
+            "prompt_tokens": len(formatted_prompt) // 4,
+            "output_tokens": len(response) // 4,
+        }
+        return response, usage, finish_reason
+
+    def warmup(self) -> None:
+        pass
@@ -0,0 +1,365 @@
+import json
+import logging
+import re
+import threading
+
+from cascade import call_evaluator, estimate_tokens
+from file import File
+from structured_output import split_json_array
+
+# Output budget per request, sized to the code it carries
+MIN_OUTPUT_TOKENS = 1024
+MAX_OUTPUT_TOKENS = 8192
+# Output tokens allowed per token of code; compact responses hold no code
+OUTPUT_RATIO = 0.6
+COMPACT_OUTPUT_RATIO = 0.25
+
+DEFAULT_MAX_CONTINUATIONS = 2
+
+# Lines of code restored for a compact line range, as the full prompt allows
+MAX_EXPANDED_LINES = 30
+
+ISSUE_BLOCK = re.compile(r"<Issue>.*?</Issue>", re.DOTALL)
+LINE_RANGE = re.compile(r"^\s*L?(\d+)\s*(?:[-:]\s*L?(\d+))?\s*$")
+
+# Header of each file in a code snippet (see chunker.format_file)
+FILE_HEADER = re.compile(r"^File name: (.*)$", re.MULTILINE)
+# File fields of the issues of a response, complete or cut off
+XML_FILE_FIELD = re.compile(r"<File>(.*?)(?:</File>|$)", re.DOTALL)
+JSON_FILE_FIELD = re.compile(r'"File"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+# Characters of code kept in the summary of a reported issue
+SUMMARY_CODE_CHARS = 40
+
+# Sent instead of the standard, which continuations leave out
+CONTINUATION_STANDARD = "(Same rules as the request being continued; not repeated here.)"
+
+CONTINUATION_NOTE = """
+
+# Continuation
+Your previous response was cut off. Only the files it had not finished are given above. The following issues were already reported and must not be repeated:
+{reported}
+
+Report only the remaining issues, in the same format, and end the response properly."""
+
+
+def output_budget(code: str, compact: bool = False) -> int:
+    """
+    Sizes the output token limit of a request to the code it carries.
+
+    Args:
+        code (str): Code snippet of the request.
+        compact (bool): Whether issues report line ranges instead of code.
+
+    Returns:
+        int: Maximum output tokens.
+    """
+    ratio = COMPACT_OUTPUT_RATIO if compact else OUTPUT_RATIO
+    return max(MIN_OUTPUT_TOKENS, min(MAX_OUTPUT_TOKENS, int(estimate_tokens(code) * ratio)))
+
+
+def xml_field(block: str, field: str) -> str:
+    match = re.search(rf"<{field}>(.*?)</{field}>", block, re.DOTALL)
+    return match.group(1).strip() if match else ""
+
+
+def complete_issues(response: str, structured: bool = False) -> tuple[list, bool]:
+    """
+    Splits a response into its complete issues and tells whether it was cut
+    off (an <Issue> or the document left open, or an undecodable JSON tail).
+
+    Args:
+        response (str): Raw LLM response.
+        structured (bool): Whether the response is a JSON array instead of XML.
+
+    Returns:
+        tuple[list, bool]: The complete issues (XML blocks or dicts) and
+        whether the response looks truncated.
+    """
+    if structured:
+        items, tail = split_json_array(response)
+        return items, bool(tail.strip())
+
+    blocks = ISSUE_BLOCK.findall(response)
+    tail = response[response.rfind("</Issue>"):] if blocks else response
+    truncated = "<Issue>" in tail or ("<Issues>" in response and "</Issues>" not in response)
+    return blocks, truncated
+
+
+def issue_key(issue, structured: bool = False) -> tuple[str, str, str]:
+    """
+    Identifies an issue by weakness, file and whitespace-normalized code.
+    """
+    if structured:
+        issue = issue if isinstance(issue, dict) else {"Code": str(issue)}
+        fields = [str(issue.get(name) or "") for name in ("Weakness", "File", "Code")]
+    else:
+        fields = [xml_field(issue, name) for name in ("Weakness", "File", "Code")]
+    weakness, file, code = fields
+    return weakness, file, " ".join(code.split())
+
+
+def summarize_issue(issue, structured: bool = False) -> str:
+    weakness, file, code = issue_key(issue, structured)
+    return f"- {weakness} in {file}: {code[:SUMMARY_CODE_CHARS]}"
+
+
+def split_code_files(code: str) -> list[tuple[str, str]]:
+    """
+    Splits a code snippet into its files, at their "File name:" headers.
+
+    Args:
+        code (str): Code snippet of a request.
+
+    Returns:
+        list[tuple[str, str]]: (path, formatted file) pairs in snippet order;
+        a snippet without headers is a single file with an empty path.
+    """
+    headers = list(FILE_HEADER.finditer(code))
+    if not headers:
+        return [("", code)]
+    ends = [header.start() for header in headers[1:]] + [len(code)]
+    return [(header.group(1).strip(), code[header.start():end]) for header, end in zip(headers, ends)]
+
+
+def unfinished_files(code: str, response: str, structured: bool = False) -> str:
+    """
+    Gets the part of a code snippet a truncated response had not finished:
+    the file the response was reporting on when it was cut off, and every
+    file after it. Issues are reported file by file, so the files before it
+    are taken as done.
+
+    Args:
+        code (str): Code snippet of the request.
+        response (str): Truncated response.
+        structured (bool): Whether the response is a JSON array instead of XML.
+
+    Returns:
+        str: Code snippet of the unfinished files (the whole snippet if the
+        last reported file is unknown).
+    """
+    pattern = JSON_FILE_FIELD if structured else XML_FILE_FIELD
+    fields = [field.strip() for field in pattern.findall(response) if field.strip()]
+    parts = split_code_files(code)
+    if not fields or len(parts) < 2:
+        return code
+
+    files = [File(path=path) for path, _ in parts]
+    last = find_file(files, fields[-1])
+    if last is None:
+        return code
+    return "".join(text for _, text in parts[files.index(last):])
+
+
+def merge_issues(issues: list, structured: bool = False) -> str:
+    """
+    Rebuilds a complete response from the issues of all its parts.
+    """
+    if structured:
+        return json.dumps(issues)
+    return "<Issues>\n" + "\n".join(issues) + "\n</Issues>"
+
+
+class ContinuationEvaluator:
+    def __init__(
+        self,
+        evaluator,
+        max_continuations: int = DEFAULT_MAX_CONTINUATIONS,
+        structured: bool = False,
+        compact: bool = False,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        """
+        Wrap a model evaluator so that every request gets an output budget
+        sized to its input, and a truncated response is completed by
+        continuation requests. A continuation leaves the standard out and
+        only carries the files the response had not finished, with a short
+        list of the issues already reported in them (weakness, file and the
+        start of the code), so its prompt shrinks from one continuation to the
+        next; the issues of all parts are merged into one response.
+        :param evaluator: evaluator accepting evaluate(input_variables, max_output_tokens)
+        :param max_continuations: int, continuation requests allowed per request
+        :param structured: bool, if True, responses are JSON arrays instead of XML
+        :param compact: bool, if True, issues carry line ranges instead of code
+        :param logger: logging.Logger, optional logger for logging messages
+        """
+        self.evaluator = evaluator
+        self.model = evaluator.model
+        self.system_prompt: str = evaluator.system_prompt
+        self.max_continuations: int = max_continuations
+        self.structured: bool = structured
+        self.compact: bool = compact
+        self.logger: logging.Logger | None = logger
+        self.last_usage: dict[str, int] = {}
+        self._metrics: dict[str, int] = {
+            "responses": 0,
+            "truncated": 0,
+            "continuations": 0,
+            "recovered_issues": 0,
+            "incomplete": 0,
+        }
+        self._lock = threading.Lock()
+
+    def _log(self, message: str) -> None:
+        """
+        Log a message if a logger is provided.
+        :param message: str, message to log
+        """
+        if self.logger:
+            self.logger.info(message)
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._metrics[name] += amount
+
+    def _call(self, input_variables: dict[str, str], max_output_tokens: int) -> tuple[str, dict, bool]:
+        """
+        Send one request.
+        :return: tuple of the response, its token usage and whether it hit the output limit
+        """
+        response, usage, finish_reason = call_evaluator(self.evaluator, input_variables, max_output_tokens)
+        return response, usage, finish_reason == "length"
+
+    def evaluate(self, input_variables: dict[str, str]) -> str:
+        response, self.last_usage, _ = self.call(input_variables)
+        return response
+
+    def call(self, input_variables: dict[str, str], max_output_tokens: int | None = None) -> tuple[str, dict, str | None]:
+        """
+        Send a request, continuing it while it is truncated. The output
+        budget is sized to the code; max_output_tokens is not used.
+        :return: tuple of the merged response, the usage of all parts and
+            "length" if it was still truncated after the last continuation
+        """
+        code = input_variables.get("code_snippet", "")
+        budget = output_budget(code, self.compact)
+
+        response, usage, at_limit = self._call(input_variables, budget)
+        totals = {
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "output_tokens": usage.get("output_tokens", 0),
+        }
+        issues, truncated = complete_issues(response, self.structured)
+        truncated = truncated or at_limit
+        self._count("responses")
+
+        if not truncated:
+            return response, totals, "stop"
+
+        self._count("truncated")
+        seen = {issue_key(issue, self.structured) for issue in issues}
+
+        for attempt in range(self.max_continuations):
+            code = unfinished_files(code, response, self.structured)
+            remaining = [File(path=path) for path, _ in split_code_files(code)]
+            # Issues of the files left out cannot be reported again
+            reported = "\n".join(
+                summarize_issue(issue, self.structured)
+                for issue in issues
+                if find_file(remaining, issue_key(issue, self.structured)[1]) is not None
+            ) or "(none)"
+            continuation = {**input_variables, "code_snippet": code + CONTINUATION_NOTE.format(reported=reported)}
+            if "standard" in continuation:
+                continuation["standard"] = CONTINUATION_STANDARD
+            self._count("continuations")
+            self._log(f"Response truncated after {len(issues)} issues, continuation {attempt + 1}")
+
+            response, usage, at_limit = self._call(continuation, budget)
+            totals["prompt_tokens"] += usage.get("prompt_tokens", 0)
+            totals["output_tokens"] += usage.get("output_tokens", 0)
+
+            new_issues, truncated = complete_issues(response, self.structured)
+            for issue in new_issues:
+                key = issue_key(issue, self.structured)
+                if key not in seen:
+                    seen.add(key)
+                    issues.append(issue)
+                    self._count("recovered_issues")
+
+            if not (truncated or at_limit):
+                finish_reason = "stop"
+                break
+        else:
+            self._count("incomplete")
+            finish_reason = "length"
+
+        return merge_issues(issues, self.structured), totals, finish_reason
+
+    def metrics(self) -> dict:
+        with self._lock:
+            metrics = dict(self._metrics)
+        responses = metrics["responses"] or 1
+        metrics["truncation_rate"] = metrics["truncated"] / responses
+        return metrics
+
+
+def continuation_evaluators(evaluator):
+    """
+    Finds the ContinuationEvaluators of a (possibly wrapped) evaluator.
+
+    Args:
+        evaluator: Evaluator, cascade or wrapper exposing .evaluator.
+
+    Yields:
+        ContinuationEvaluator: Each one found.
+    """
+    if isinstance(evaluator, ContinuationEvaluator):
+        yield evaluator
+        return
+    for tier in getattr(evaluator, "tiers", None) or []:
+        yield from continuation_evaluators(tier.evaluator)
+    inner = getattr(evaluator, "evaluator", None)
+    if inner is not None:
+        yield from continuation_evaluators(inner)
+
+
+def find_file(files: list[File], file_field: str | None) -> File | None:
+    """
+    Finds the file an issue refers to among the files of its request.
+    """
+    name = (file_field or "").split(",")[0].strip().replace("\\", "/")
+    for file in files:
+        if file.path == name:
+            return file
+    for file in files:
+        path = file.path.replace("\\", "/")
+        if name and (path.endswith("/" + name) or name.endswith("/" + path)):
+            return file
+    return files[0] if len(files) == 1 else None
+
+
+def expand_line_ranges(response: str, files: list[File]) -> str:
+    """
+    Replaces the line ranges of a compact response with the code of those
+    lines, read locally from the files of the request, so that the response
+    reads like a full one. Issues whose file or range cannot be resolved are
+    left as they are.
+
+    Args:
+        response (str): Compact XML response.
+        files (list[File]): Files of the request.
+
+    Returns:
+        str: Response with code in every resolved <Code> element.
+    """
+    def expand(match: re.Match) -> str:
+        block = match.group(0)
+        line_range = LINE_RANGE.match(xml_field(block, "Code"))
+        file = find_file(files, xml_field(block, "File"))
+        if line_range is None or file is None:
+            return block
+
+        lines = (file.content or "").splitlines()
+        start = int(line_range.group(1))
+        end = int(line_range.group(2) or start)
+        start, end = max(1, min(start, end)), min(len(lines), max(start, end))
+        if start > end:
+            return block
+
+        code = lines[start - 1:min(end, start + MAX_EXPANDED_LINES - 1)]
+        if end - start + 1 > MAX_EXPANDED_LINES:
+            code.append("...")
+        text = "\n".join(code).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        return re.sub(r"<Code>.*?</Code>", lambda _: f"<Code>{text}</Code>", block, count=1, flags=re.DOTALL)
+
+    return ISSUE_BLOCK.sub(expand, response)
@@ -0,0 +1,253 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+from cascade import call_evaluator
+
+
+def prompt_hash(prompt: str) -> str:
+    """
+    Hashes a fully formatted prompt.
+
+    Args:
+        prompt (str): Prompt as sent to the model.
+
+    Returns:
+        str: Hex SHA-256 digest of the prompt.
+    """
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class ReplayMissError(LookupError):
+    """Raised when a prompt has no recorded response."""
+
+
+class InjectedLLMError(RuntimeError):
+    """Raised by ReplayEvaluator to simulate a failing LLM call."""
+
+
+class Cassette:
+    def __init__(self, path: str | None = None) -> None:
+        """
+        Initialize a cassette of recorded LLM exchanges, backed by a JSONL file.
+        Each line holds a prompt hash, the response text, the call latency and,
+        when known, the finish reason (e.g. "length" for a cut-off response).
+        :param path: str, optional JSONL file to load from and append to
+        """
+        self.path: str | None = path
+        self.entries: dict[str, list[dict]] = {}
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries.setdefault(entry["prompt_hash"], []).append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self.entries.values())
+
+    def add(
+        self,
+        prompt_hash: str,
+        response: str,
+        latency: float | None = None,
+        finish_reason: str | None = None,
+    ) -> None:
+        """
+        Record a response, appending it to the backing file if there is one.
+        :param prompt_hash: str, hash of the formatted prompt
+        :param response: str, raw response text
+        :param latency: float, call latency in seconds, if known
+        :param finish_reason: str, why the model stopped, if known
+        """
+        entry = {"prompt_hash": prompt_hash, "response": response, "latency": latency}
+        if finish_reason is not None:
+            entry["finish_reason"] = finish_reason
+
+        with self._lock:
+            self.entries.setdefault(prompt_hash, []).append(entry)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as file:
+                    file.write(json.dumps(entry) + "\n")
+
+    def get(self, prompt_hash: str, index: int = 0) -> dict | None:
+        """
+        Get a recorded exchange. Prompts recorded several times (e.g. one per
+        benchmark iteration) are cycled through by index.
+        :param prompt_hash: str, hash of the formatted prompt
+        :param index: int, which recording to return
+        :return: dict with response and latency, or None if never recorded
+        """
+        entries = self.entries.get(prompt_hash)
+        if not entries:
+            return None
+        return entries[index % len(entries)]
+
+    def import_results_csv(
+        self,
+        csv_path: str,
+        system_prompt: str,
+        standard: str,
+        code_prefix: str = "File name: File 1\n",
+        code_suffix: str = "\n",
+    ) -> int:
+        """
+        Import the 'LLM Complete Response' column of a test_cases.py results CSV.
+        Prompts are rebuilt the same way test_cases.py builds them.
+        :param csv_path: str, path to a test_cases_iter_*_results.csv file
+        :param system_prompt: str, prompt template used for the run
+        :param standard: str, standard text used for the run
+        :param code_prefix: str, text prepended to each test case source
+        :param code_suffix: str, text appended to each test case source
+        :return: int, number of imported exchanges
+        """
+        csv.field_size_limit(sys.maxsize)
+        imported = 0
+
+        with open(csv_path, "r", encoding="utf-8", newline="") as file:
+            for row in csv.DictReader(file):
+                code = row.get("Test Case Code")
+                response = row.get("LLM Complete Response")
+                if code is None or response is None:
+                    continue
+
+                prompt = system_prompt.format(
+                    standard=standard, code_snippet=code_prefix + code + code_suffix
+                )
+                self.add(prompt_hash(prompt), response)
+                imported += 1
+
+        return imported
+
+
+class RecordingEvaluator:
+    def __init__(self, evaluator, cassette: Cassette):
+        """
+        Wrap an evaluator and record every exchange into a cassette. Wrap the
+        model evaluator itself, so that each part of a continued response is
+        recorded with its finish reason and replays can reproduce truncation.
+        :param evaluator: evaluator exposing system_prompt and evaluate()
+        :param cassette: Cassette, where exchanges are recorded
+        """
+        self.evaluator = evaluator
+        self.model = evaluator.model
+        self.system_prompt = evaluator.system_prompt
+        self.cassette = cassette
+        self.last_usage: dict[str, int] = {}
+        self.last_finish_reason: str | None = None
+
+    def evaluate(self, input_variables: dict[str, str], max_output_tokens: int | None = None) -> str:
+        response, self.last_usage, self.last_finish_reason = self.call(input_variables, max_output_tokens)
+        return response
+
+    def call(self, input_variables: dict[str, str], max_output_tokens: int | None = None) -> tuple[str, dict, str | None]:
+        """
+        Send one request and record it.
+        :return: tuple of the response, its token usage and its finish reason
+        """
+        formatted_prompt = self.system_prompt.format(**input_variables)
+        start = time.perf_counter()
+        response, usage, finish_reason = call_evaluator(self.evaluator, input_variables, max_output_tokens)
+        latency = time.perf_counter() - start
+        self.cassette.add(prompt_hash(formatted_prompt), response, latency, finish_reason)
+        return response, usage, finish_reason
+
+
+class ReplayEvaluator:
+    def __init__(
+        self,
+        cassette: Cassette,
+        system_prompt: str,
+        latency: float | None = None,
+        latency_scale: float = 1.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        default_latency: float = 0.0,
+        seed: int | None = None,
+        sleep=time.sleep,
+    ):
+        """
+        Serve recorded responses with synthetic latency, jitter and errors.
+        :param cassette: Cassette, recorded exchanges
+        :param system_prompt: str, prompt template, as for GenAIEvaluator
+        :param latency: float, fixed latency in seconds overriding recorded ones
+        :param latency_scale: float, multiplier applied to recorded latencies
+        :param jitter: float, uniform jitter in seconds added to the latency
+        :param error_rate: float, probability of raising InjectedLLMError
+        :param default_latency: float, latency for exchanges recorded without one
+        :param seed: int, seed for jitter and error injection
+        :param sleep: callable used to wait, replaceable for simulated clocks
+        """
+        self.model = None
+        self.system_prompt = system_prompt
+        self.last_finish_reason: str | None = None
+        self.cassette = cassette
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.default_latency = default_latency
+        self.sleep = sleep
+        self._random = random.Random(seed)
+        self._calls: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def evaluate(self, input_variables: dict[str, str], max_output_tokens: int | None = None) -> str:
+        response, _, self.last_finish_reason = self.call(input_variables, max_output_tokens)
+        return response
+
+    def call(self, input_variables: dict[str, str], max_output_tokens: int | None = None) -> tuple[str, dict, str | None]:
+        """
+        Serve the recorded response of a prompt. The output limit is ignored;
+        the recorded finish reason is reported, so truncated recordings are
+        continued the same way as live ones. No usage is recorded.
+        :return: tuple of the response, an empty usage and the recorded finish reason
+        """
+        formatted_prompt = self.system_prompt.format(**input_variables)
+        key = prompt_hash(formatted_prompt)
+
+        with self._lock:
+            index = self._calls.get(key, 0)
+            self._calls[key] = index + 1
+            jitter = self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+            fail = self._random.random() < self.error_rate
+
+        entry = self.cassette.get(key, index)
+        if entry is None:
+            raise ReplayMissError(f"No recorded response for prompt {key[:12]}")
+
+        if self.latency is not None:
+            latency = self.latency
+        elif entry.get("latency") is not None:
+            latency = entry["latency"] * self.latency_scale
+        else:
+            latency = self.default_latency
+        self.sleep(max(0.0, latency + jitter))
+
+        if fail:
+            raise InjectedLLMError(f"Injected failure for prompt {key[:12]}")
+
+        return entry["response"], {}, entry.get("finish_reason")
+
+
+if __name__ == "__main__":
+    from core import standard_text
+    from system_prompt import SYSTEM_PROMPT
+
+    parser = argparse.ArgumentParser(description="Build a replay cassette from results CSVs.")
+    parser.add_argument("csv_files", nargs="+", help="test_cases.py results CSV files.")
+    parser.add_argument("--out", required=True, help="Cassette JSONL file to append to.")
+    args = parser.parse_args()
+
+    cassette = Cassette(args.out)
+    for csv_file in args.csv_files:
+        count = cassette.import_results_csv(csv_file, SYSTEM_PROMPT, standard_text())
+        print(f"Imported {count} responses from {csv_file}")
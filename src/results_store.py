@@ -0,0 +1,256 @@
+import argparse
+import hashlib
+import re
+import uuid
+from pathlib import Path
+
+import polars as pl
+
+# Columns written by test_cases.py for every test case
+RESULT_COLUMNS = [
+    "Test Case Weakness",
+    "Test Case File",
+    "Test Case Code",
+    "Test Case Line",
+    "LLM Hit CWE",
+    "LLM Hit Code",
+    "LLM Code",
+    "LLM Complete Response",
+]
+
+# Large text columns, stored once in the side table and referenced by hash
+TEXT_COLUMNS = ["Test Case Code", "LLM Complete Response"]
+
+PARTITION_COLUMNS = ["language", "model", "iteration"]
+
+ITERATION_CSV = re.compile(r"test_cases_iter_(\d+)_results\.csv$")
+
+
+def text_hash(text: str | None) -> str | None:
+    return None if text is None else hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def partition_value(value) -> str:
+    """
+    Makes a partition value safe for a directory name (e.g. 'ollama/llama3').
+    """
+    return re.sub(r"[^\w.,+-]", "_", str(value))
+
+
+class ResultsStore:
+    def __init__(self, root: str | Path) -> None:
+        """
+        Initialize a results store rooted at a directory:
+        runs/language=<l>/model=<m>/iteration=<n>/part-0.parquet holds one row
+        per test case without the large texts, texts/*.parquet maps text hashes
+        to texts, and summary.parquet / summary_weakness.parquet hold the hit
+        counts per run (and per weakness), refreshed on every write.
+        :param root: str or Path, store directory
+        """
+        self.root: Path = Path(root)
+        self.runs_dir: Path = self.root / "runs"
+        self.texts_dir: Path = self.root / "texts"
+        self.summary_path: Path = self.root / "summary.parquet"
+        self.weakness_summary_path: Path = self.root / "summary_weakness.parquet"
+        # Hashes of the stored texts, read from disk on the first write only
+        self._text_hashes: set[str] | None = None
+
+    def write_run(self, results, language: str, model: str, iteration: int, refresh: bool = True) -> Path:
+        """
+        Store the results of one benchmark iteration, replacing any previous
+        results of the same language, model and iteration.
+        :param results: polars DataFrame or dict of columns with RESULT_COLUMNS
+        :param language: str, test case language (e.g. 'php')
+        :param model: str, model (or model ladder) used for the run
+        :param iteration: int, iteration number
+        :param refresh: bool, if True, recompute the summary tables
+        :return: Path, written partition file
+        """
+        df = pl.DataFrame(results)
+
+        texts = []
+        for column in TEXT_COLUMNS:
+            values = df[column].cast(pl.Utf8).to_list()
+            hashes = [text_hash(value) for value in values]
+            texts.extend(zip(hashes, values))
+            df = df.with_columns(pl.Series(f"{column} Hash", hashes, dtype=pl.Utf8)).drop(column)
+
+        self._write_texts(texts)
+
+        partition = (
+            self.runs_dir
+            / f"language={partition_value(language)}"
+            / f"model={partition_value(model)}"
+            / f"iteration={int(iteration)}"
+        )
+        partition.mkdir(parents=True, exist_ok=True)
+        path = partition / "part-0.parquet"
+        df.write_parquet(path)
+
+        if refresh:
+            self.refresh_summary()
+        return path
+
+    def _write_texts(self, texts: list[tuple[str | None, str | None]]) -> None:
+        """
+        Append the texts whose hash is not stored yet. The stored hashes are
+        kept in memory, so a write does not rescan the texts table.
+        :param texts: list of (hash, text) pairs
+        """
+        if self._text_hashes is None:
+            self._text_hashes = set()
+            if self._has_files(self.texts_dir):
+                self._text_hashes.update(self.texts().select("hash").collect()["hash"].to_list())
+
+        new = {}
+        for hash_, text in texts:
+            if hash_ is not None and hash_ not in self._text_hashes and hash_ not in new:
+                new[hash_] = text
+
+        if new:
+            self.texts_dir.mkdir(parents=True, exist_ok=True)
+            pl.DataFrame(
+                {"hash": list(new), "text": list(new.values())},
+                schema={"hash": pl.Utf8, "text": pl.Utf8},
+            ).write_parquet(self.texts_dir / f"part-{uuid.uuid4().hex}.parquet")
+            self._text_hashes.update(new)
+
+    @staticmethod
+    def _has_files(directory: Path) -> bool:
+        return directory.exists() and any(directory.rglob("*.parquet"))
+
+    def runs(
+        self,
+        language: str | None = None,
+        model: str | None = None,
+        iteration: int | None = None,
+    ) -> pl.LazyFrame:
+        """
+        Scan the stored results, with the texts left as hashes. Filters on the
+        partition columns only read the matching files.
+        :param language: str, optional language filter
+        :param model: str, optional model filter
+        :param iteration: int, optional iteration filter
+        :return: pl.LazyFrame with the result columns and language/model/iteration
+        """
+        if not self._has_files(self.runs_dir):
+            raise FileNotFoundError(f"No results stored in {self.runs_dir}")
+
+        frame = pl.scan_parquet(str(self.runs_dir / "**" / "*.parquet"), hive_partitioning=True)
+        if language is not None:
+            frame = frame.filter(pl.col("language") == partition_value(language))
+        if model is not None:
+            frame = frame.filter(pl.col("model") == partition_value(model))
+        if iteration is not None:
+            frame = frame.filter(pl.col("iteration") == iteration)
+        return frame
+
+    def texts(self) -> pl.LazyFrame:
+        return pl.scan_parquet(str(self.texts_dir / "*.parquet"))
+
+    def with_texts(self, frame: pl.LazyFrame, columns: list[str] = TEXT_COLUMNS) -> pl.LazyFrame:
+        """
+        Join texts back into scanned results.
+        :param frame: pl.LazyFrame from runs()
+        :param columns: list of text columns to restore
+        :return: pl.LazyFrame with the requested text columns
+        """
+        for column in columns:
+            frame = frame.join(
+                self.texts().rename({"hash": f"{column} Hash", "text": column}),
+                on=f"{column} Hash",
+                how="left",
+            )
+        return frame
+
+    def refresh_summary(self) -> None:
+        """
+        Recompute the hit counts per run and per run and weakness.
+        """
+        runs = self.runs()
+        counts = [
+            pl.len().alias("test_cases"),
+            pl.col("LLM Hit Code").sum().alias("hits_code"),
+            pl.col("LLM Hit CWE").sum().alias("hits_cwe"),
+        ]
+
+        runs.group_by(PARTITION_COLUMNS).agg(counts).sort(PARTITION_COLUMNS).collect().write_parquet(self.summary_path)
+        runs.group_by(PARTITION_COLUMNS + ["Test Case Weakness"]).agg(counts).sort(
+            PARTITION_COLUMNS + ["Test Case Weakness"]
+        ).collect().write_parquet(self.weakness_summary_path)
+
+    def summary(self, by_weakness: bool = False) -> pl.LazyFrame:
+        """
+        Get the precomputed hit counts.
+        :param by_weakness: bool, if True, one row per run and weakness
+        :return: pl.LazyFrame with test_cases, hits_code and hits_cwe columns
+        """
+        return pl.scan_parquet(self.weakness_summary_path if by_weakness else self.summary_path)
+
+    def accuracy(
+        self,
+        by: list[str] | None = None,
+        relaxed: bool = False,
+        language: str | None = None,
+        model: str | None = None,
+    ) -> pl.DataFrame:
+        """
+        Accuracy (in %) from the summary tables, grouped by any of language,
+        model, iteration and 'Test Case Weakness'.
+        :param by: list of grouping columns (default language and iteration)
+        :param relaxed: bool, if True, count CWE hits instead of code hits
+        :param language: str, optional language filter
+        :param model: str, optional model filter
+        :return: pl.DataFrame with the grouping columns and Accuracy
+        """
+        by = by or ["language", "iteration"]
+        frame = self.summary(by_weakness="Test Case Weakness" in by)
+        if language is not None:
+            frame = frame.filter(pl.col("language") == partition_value(language))
+        if model is not None:
+            frame = frame.filter(pl.col("model") == partition_value(model))
+
+        hits = "hits_cwe" if relaxed else "hits_code"
+        return (
+            frame.group_by(by)
+            .agg((pl.col(hits).sum() * 100 / pl.col("test_cases").sum()).alias("Accuracy"))
+            .sort(by)
+            .collect()
+        )
+
+    def import_csv_dir(self, directory: str | Path, language: str, model: str) -> int:
+        """
+        Import the test_cases_iter_<n>_results.csv files of a directory.
+        :param directory: str or Path, directory with the CSV files
+        :param language: str, language of the results
+        :param model: str, model that produced them
+        :return: int, number of imported iterations
+        """
+        imported = 0
+        for path in sorted(Path(directory).glob("test_cases_iter_*_results.csv")):
+            match = ITERATION_CSV.search(path.name)
+            if match is None:
+                continue
+            df = pl.read_csv(path, schema_overrides={column: pl.Utf8 for column in TEXT_COLUMNS})
+            self.write_run(df.select(RESULT_COLUMNS), language, model, int(match.group(1)), refresh=False)
+            imported += 1
+
+        if imported:
+            self.refresh_summary()
+        return imported
+
+
+if __name__ == "__main__":
+    from test_configuration import RESULTS_DIR, RESULTS_STORE_DIR
+
+    parser = argparse.ArgumentParser(description="Import test_cases.py results CSVs into the results store.")
+    parser.add_argument("directories", nargs="*", help="Result directories, named after their language (default: every directory of analysis/results).")
+    parser.add_argument("--model", default="gemini-2.0-flash", help="Model that produced the results.")
+    parser.add_argument("--store", default=str(RESULTS_STORE_DIR), help="Results store directory.")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.store)
+    directories = [Path(d) for d in args.directories] or sorted(p for p in RESULTS_DIR.iterdir() if p.is_dir())
+    for directory in directories:
+        count = store.import_csv_dir(directory, language=directory.name, model=args.model)
+        print(f"Imported {count} iterations from {directory}")
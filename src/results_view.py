@@ -0,0 +1,188 @@
+import html
+import math
+
+import numpy as np
+import pandas as pd
+
+RESULT_COLUMNS = ["Type", "Weakness", "Severity", "File", "Code", "Justification"]
+FILTER_COLUMNS = ["Type", "Severity", "File"]
+
+# Checked in order, so "Critical" wins over anything else in the same cell
+SEVERITY_LEVELS = ["Critical", "High", "Medium"]
+SEVERITY_CLASSES = ["severity-critical", "severity-high", "severity-medium"]
+DEFAULT_SEVERITY_CLASS = "severity-low"
+
+RESULTS_CSS = """
+.results-table { border-collapse: collapse; width: 100%; }
+.results-table th { background-color: #f0f0f0; text-align: left; position: sticky; top: 0; }
+.results-table td { vertical-align: top; border-top: 1px solid #e0e0e0; padding: 4px 8px; }
+.results-table pre { white-space: pre; margin: 0; max-height: 24em; overflow: auto; }
+.results-table .col-Weakness, .results-table .col-Code { font-weight: bold; }
+.severity-critical { color: red; }
+.severity-high { color: orange; }
+.severity-medium { color: yellow; }
+.severity-low { color: green; }
+"""
+
+
+def severity_classes(severity: pd.Series) -> pd.Series:
+    """
+    Maps a Severity column to CSS classes in one vectorized pass.
+
+    Args:
+        severity (pd.Series): Severity values as returned by the LLM.
+
+    Returns:
+        pd.Series: CSS class name per row.
+    """
+    values = severity.fillna("").astype(str)
+    conditions = [values.str.contains(level, regex=False) for level in SEVERITY_LEVELS]
+    return pd.Series(
+        np.select(conditions, SEVERITY_CLASSES, default=DEFAULT_SEVERITY_CLASS),
+        index=severity.index,
+    )
+
+
+class ResultsView:
+    def __init__(self, df: pd.DataFrame, page_size: int = 50) -> None:
+        """
+        Initialize a server-side view over LLM results. Filtering and sorting
+        only recompute the row order; rendering is limited to one page.
+        :param df: pd.DataFrame, parsed LLM results
+        :param page_size: int, number of rows rendered per page
+        """
+        columns = [column for column in RESULT_COLUMNS if column in df.columns]
+        self.df: pd.DataFrame = df[columns].reset_index(drop=True).fillna("").astype(str)
+        self.page_size: int = page_size
+        self.severity_class: pd.Series = self._severity_classes(self.df)
+        self.severity_rank: pd.Series = self._severity_ranks(self.severity_class)
+        self.index: pd.Index = self.df.index
+        self.current_page: int = 1
+        # Last filters and sort, reapplied when rows are appended
+        self.filters: dict[str, list[str]] = {}
+        self.sort_by: str | None = None
+        self.ascending: bool = True
+
+    @staticmethod
+    def _severity_classes(df: pd.DataFrame) -> pd.Series:
+        if "Severity" in df.columns:
+            return severity_classes(df["Severity"])
+        return pd.Series(DEFAULT_SEVERITY_CLASS, index=df.index)
+
+    @staticmethod
+    def _severity_ranks(severity_class: pd.Series) -> pd.Series:
+        return severity_class.map(
+            {name: rank for rank, name in enumerate(SEVERITY_CLASSES)}
+        ).fillna(len(SEVERITY_CLASSES))
+
+    def extend(self, df: pd.DataFrame) -> int:
+        """
+        Append rows, e.g. the findings of one more chunk, and reapply the
+        current filters and sort. Only the new rows are converted and
+        classified.
+        :param df: pd.DataFrame, parsed LLM results to append
+        :return: int, number of matching rows
+        """
+        if len(df):
+            rows = df.reindex(columns=self.df.columns).fillna("").astype(str)
+            rows.index = pd.RangeIndex(len(self.df), len(self.df) + len(rows))
+            severity_class = self._severity_classes(rows)
+            self.df = pd.concat([self.df, rows])
+            self.severity_class = pd.concat([self.severity_class, severity_class])
+            self.severity_rank = pd.concat([self.severity_rank, self._severity_ranks(severity_class)])
+        return self.apply(self.filters, self.sort_by, self.ascending)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def page_count(self) -> int:
+        return max(1, math.ceil(len(self.index) / self.page_size))
+
+    def filter_options(self) -> dict[str, list[str]]:
+        """
+        Get the distinct values available for each filter column.
+        :return: dict mapping column name to sorted distinct values
+        """
+        return {
+            column: sorted(self.df[column].unique().tolist())
+            for column in FILTER_COLUMNS
+            if column in self.df.columns
+        }
+
+    def apply(
+        self,
+        filters: dict[str, list[str]] | None = None,
+        sort_by: str | None = None,
+        ascending: bool = True,
+    ) -> int:
+        """
+        Filter and sort the rows. Only the row order (and the query, for
+        extend) is stored.
+        :param filters: dict mapping column name to accepted values (empty means all)
+        :param sort_by: str, column to sort by ("Severity" sorts by level)
+        :param ascending: bool, sort direction
+        :return: int, number of matching rows
+        """
+        mask = pd.Series(True, index=self.df.index)
+        for column, values in (filters or {}).items():
+            if values and column in self.df.columns:
+                mask &= self.df[column].isin(values)
+
+        index = self.df.index[mask]
+
+        if sort_by == "Severity":
+            keys = self.severity_rank[index]
+        elif sort_by in self.df.columns:
+            keys = self.df.loc[index, sort_by]
+        else:
+            keys = None
+
+        if keys is not None:
+            index = keys.sort_values(ascending=ascending, kind="stable").index
+
+        self.index = index
+        self.filters = dict(filters or {})
+        self.sort_by = sort_by
+        self.ascending = ascending
+        return len(self.index)
+
+    def page(self, number: int) -> pd.DataFrame:
+        """
+        Get the rows of one page of the current filtered and sorted view.
+        :param number: int, 1-based page number, clamped to the valid range
+        :return: pd.DataFrame with the page rows
+        """
+        number = min(max(1, number), self.page_count)
+        start = (number - 1) * self.page_size
+        return self.df.loc[self.index[start:start + self.page_size]]
+
+    def render_page(self, number: int) -> str:
+        """
+        Render one page as an HTML table using CSS classes for styling.
+        :param number: int, 1-based page number
+        :return: str, HTML table
+        """
+        self.current_page = min(max(1, number), self.page_count)
+        rows = self.page(number)
+        columns = list(self.df.columns)
+
+        header = "".join(f'<th class="col-{column}">{column}</th>' for column in columns)
+        body = []
+        for row_id, row in zip(rows.index, rows.itertuples(index=False)):
+            cells = []
+            for column, value in zip(columns, row):
+                text = html.escape(value)
+                if column in ("Code", "Justification"):
+                    text = f"<pre>{text}</pre>"
+                css = f"col-{column}"
+                if column == "Severity":
+                    css += f" {self.severity_class[row_id]}"
+                cells.append(f'<td class="{css}">{text}</td>')
+            body.append(f"<tr>{''.join(cells)}</tr>")
+
+        return (
+            f"<style>{RESULTS_CSS}</style>"
+            f'<table class="results-table"><thead><tr>{header}</tr></thead>'
+            f"<tbody>{''.join(body)}</tbody></table>"
+        )
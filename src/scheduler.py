@@ -0,0 +1,231 @@
+import math
+import os
+import re
+import time
+
+from chunker import Chunk
+from file import File
+from import_graph import file_references
+
+# Prior likelihood of findings per language, relative to 1.0
+LANGUAGE_WEIGHTS = {
+    "php": 1.5, "c": 1.5, "cpp": 1.4, "cc": 1.4, "js": 1.3, "ts": 1.2,
+    "py": 1.2, "java": 1.2, "cs": 1.2, "rb": 1.2, "go": 1.0, "kt": 1.0,
+    "kts": 1.0, "swift": 1.0, "h": 0.9, "hpp": 0.9, "hh": 0.9, "rs": 0.8,
+}
+
+# Local hits of risky constructs, with their weight. Each pattern counts at
+# most MAX_PATTERN_HITS times per file.
+RISK_PATTERNS: list[tuple[re.Pattern, float]] = [
+    # Dynamic code and command execution
+    (re.compile(r"\b(?:eval|exec|system|popen|passthru|shell_exec|proc_open)\s*\("), 3.0),
+    (re.compile(r"\b(?:Runtime\.getRuntime\(\)\.exec|Process\.Start|subprocess\.\w+|os\.system|child_process)\b"), 3.0),
+    # Queries built from strings
+    (re.compile(r"""(?i)\b(?:select|insert|update|delete)\b[^;\n]*["']\s*(?:\+|\.|%|\{)"""), 3.0),
+    # Untrusted input
+    (re.compile(r"\$_(?:GET|POST|REQUEST|COOKIE|FILES|SERVER)\b|\brequest\.(?:args|form|GET|POST|params|query)\b"), 2.0),
+    # Deserialization, unsafe memory and weak crypto
+    (re.compile(r"\b(?:unserialize|pickle\.loads?|yaml\.load|BinaryFormatter|ObjectInputStream|readObject)\b"), 2.5),
+    (re.compile(r"\b(?:strcpy|strcat|sprintf|gets|memcpy|alloca)\s*\("), 2.0),
+    (re.compile(r"(?i)\b(?:md5|sha1|des|rc4)\b"), 1.0),
+    # Secrets and output sinks
+    (re.compile(r"""(?i)\b(?:password|passwd|secret|api_?key|token)\b\s*[:=]\s*["']"""), 2.0),
+    (re.compile(r"\b(?:innerHTML|outerHTML|document\.write|dangerouslySetInnerHTML|echo)\b"), 0.5),
+]
+
+MAX_PATTERN_HITS = 5
+
+# File stems of typical entry points and request handlers
+ENTRY_POINT_NAMES = re.compile(
+    r"(?i)^(?:main|app|index|server|program|startup|manage|wsgi|asgi|routes?|urls|api)$"
+    r"|controller|handler|servlet|endpoint|view"
+)
+
+# Content markers of entry points
+ENTRY_POINT_PATTERNS = re.compile(
+    r"""if\s+__name__\s*==\s*["']__main__["']|static\s+(?:async\s+)?\w*\s*void\s+Main?\s*\(|"""
+    r"""public\s+static\s+void\s+main\s*\(|\bfunc\s+main\s*\(|\bint\s+main\s*\(|"""
+    r"""@(?:app|router|bp)\.(?:route|get|post|put|delete)\b|\[(?:Http(?:Get|Post|Put|Delete)|Route)\b|"""
+    r"""@(?:Get|Post|Request)Mapping\b|\bapp\.(?:get|post|use)\s*\("""
+)
+
+# Paths that rarely ship to production
+LOW_PRIORITY_PATHS = re.compile(r"(?i)(?:^|/)(?:tests?|spec|__tests__|vendor|node_modules|third_party|examples?)/|\.min\.js$")
+
+# Characters of content loaded by prepare_files that stay in memory for the
+# chunks, instead of being read from their source again
+PREPARED_CONTENT_CHARS = 64 * 1024 * 1024
+
+
+def file_risk(file: File) -> float:
+    """
+    Scores how likely a file is to contain important issues, from its type,
+    size, whether it is an entry point and local hits of risky patterns. The
+    score is computed once per file and kept when its content is released.
+
+    Args:
+        file (File): File to score.
+
+    Returns:
+        float: Risk score (higher is riskier).
+    """
+    path = file.path.replace("\\", "/")
+    stem = os.path.splitext(os.path.basename(path))[0]
+
+    def score(content: str) -> float:
+        hits = sum(
+            weight * min(len(pattern.findall(content)), MAX_PATTERN_HITS)
+            for pattern, weight in RISK_PATTERNS
+        )
+        entry_point = 2.0 * bool(ENTRY_POINT_NAMES.search(stem)) + 3.0 * bool(ENTRY_POINT_PATTERNS.search(content))
+        # Larger files hide more issues, with diminishing returns
+        size = math.log1p(len(content) / 1000)
+
+        risk = LANGUAGE_WEIGHTS.get(file.extension, 1.0) * (1.0 + hits + entry_point + size)
+        if LOW_PRIORITY_PATHS.search(path):
+            risk *= 0.3
+        return risk
+
+    return file.derive("risk", score)
+
+
+def prepare_files(code_files: list[File], max_chars: int = PREPARED_CONTENT_CHARS) -> None:
+    """
+    Computes the size, risk score and import references of every file from a
+    single read of its content. The contents read here stay loaded, up to
+    max_chars characters in total, so that most chunks do not read their
+    files again; beyond that they are released and read again when their
+    chunk is evaluated. Files already prepared are not read again.
+
+    Args:
+        code_files (list[File]): Files to prepare.
+        max_chars (int): Characters of read content kept in memory.
+    """
+    kept = 0
+    for file in code_files:
+        if file.has_derived("risk") and file.has_derived("references"):
+            continue
+        loaded = file.loaded
+        file.content
+        file_risk(file)
+        file_references(file)
+        if not loaded:
+            if kept + file.size <= max_chars:
+                kept += file.size
+            else:
+                file.release()
+
+
+class ScanBudget:
+    def __init__(
+        self,
+        seconds: float | None = None,
+        tokens: int | None = None,
+        overhead_tokens: int = 0,
+        clock=time.monotonic,
+    ) -> None:
+        """
+        Initialize a time and/or token budget for one evaluation, which also
+        records what was scanned and what was skipped.
+        :param seconds: float, wall-clock budget, or None for no limit
+        :param tokens: int, token budget (prompt and output), or None for no limit
+        :param overhead_tokens: int, prompt tokens sent with every chunk (system prompt, standard)
+        :param clock: callable returning the current time in seconds
+        """
+        self.seconds: float | None = seconds
+        self.tokens: int | None = tokens
+        self.overhead_tokens: int = overhead_tokens
+        self.clock = clock
+        self.started: float | None = None
+        self.used_tokens: int = 0
+        self.scanned: list[tuple[Chunk, float]] = []
+        self.skipped: list[tuple[Chunk, float, str]] = []
+        self._busy_seconds: float = 0.0
+        self._busy_chars: int = 0
+
+    @property
+    def elapsed(self) -> float:
+        return 0.0 if self.started is None else self.clock() - self.started
+
+    def start(self) -> None:
+        if self.started is None:
+            self.started = self.clock()
+
+    def predicted_tokens(self, chunk: Chunk) -> int:
+        return self.overhead_tokens + max(1, chunk.size // 4)
+
+    def predicted_seconds(self, chunk: Chunk) -> float:
+        """
+        Predict the duration of a chunk from the throughput observed so far.
+        """
+        if not self._busy_chars:
+            return 0.0
+        return self._busy_seconds * chunk.size / self._busy_chars
+
+    def admit(self, chunk: Chunk) -> str | None:
+        """
+        Check whether a chunk fits the remaining budget.
+        :param chunk: Chunk about to be evaluated
+        :return: str, reason to skip the chunk, or None if it fits
+        """
+        if self.seconds is not None and self.elapsed + self.predicted_seconds(chunk) > self.seconds:
+            return "time budget"
+        if self.tokens is not None and self.used_tokens + self.predicted_tokens(chunk) > self.tokens:
+            return "token budget"
+        return None
+
+    def record(self, chunk: Chunk, score: float, seconds: float, tokens: int) -> None:
+        """
+        Record an evaluated chunk.
+        :param chunk: Chunk evaluated
+        :param score: float, risk score of the chunk
+        :param seconds: float, time spent on the chunk
+        :param tokens: int, tokens used by the chunk
+        """
+        self.scanned.append((chunk, score))
+        self.used_tokens += tokens
+        self._busy_seconds += seconds
+        self._busy_chars += chunk.size
+
+    def skip(self, chunk: Chunk, score: float, reason: str) -> None:
+        self.skipped.append((chunk, score, reason))
+
+    def report(self) -> dict:
+        """
+        Summarize the evaluation.
+        :return: dict with the scanned/unscanned files and the budget usage
+        """
+        return {
+            "seconds": round(self.elapsed, 2),
+            "tokens": self.used_tokens,
+            "scanned_chunks": len(self.scanned),
+            "scanned_files": sum(len(chunk.files) for chunk, _ in self.scanned),
+            "skipped_chunks": len(self.skipped),
+            "unscanned": [
+                {"file": file.path, "risk": round(score, 2), "reason": reason}
+                for chunk, score, reason in self.skipped
+                for file in chunk.files
+            ],
+        }
+
+
+def prioritize_chunks(chunks: list[Chunk]) -> list[tuple[Chunk, float]]:
+    """
+    Orders chunks from the riskiest to the least risky. A chunk is as risky as
+    its riskiest file, plus a small share of the others so that bigger chunks
+    of risky code go first on ties. The original order breaks remaining ties.
+
+    Args:
+        chunks (list[Chunk]): Chunks to order.
+
+    Returns:
+        list[tuple[Chunk, float]]: Chunks with their risk score, riskiest first.
+    """
+    scored = []
+    for position, chunk in enumerate(chunks):
+        risks = sorted((file_risk(file) for file in chunk.files), reverse=True)
+        score = (risks[0] + 0.1 * sum(risks[1:])) if risks else 0.0
+        scored.append((score, position, chunk))
+
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return [(chunk, score) for score, _, chunk in scored]
@@ -0,0 +1,172 @@
+import logging
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from cascade import call_evaluator
+
+
+def normalize_code(code: str | None) -> str:
+    """
+    Normalizes a reported code snippet so that equivalent findings from
+    different samples compare equal.
+
+    Args:
+        code (str | None): Code field reported by the LLM.
+
+    Returns:
+        str: Snippet with whitespace collapsed and truncation markers removed.
+    """
+    lines = [line.strip() for line in (code or "").splitlines() if line.strip()]
+    if lines and lines[-1] == "...":
+        lines.pop()
+    return re.sub(r"\s+", " ", " ".join(lines))
+
+
+def finding_key(finding: dict) -> tuple[str, str]:
+    """
+    Builds the voting key of a finding: (Weakness, normalized Code).
+    """
+    weakness = (finding.get("Weakness") or "").strip().upper()
+    return weakness, normalize_code(finding.get("Code"))
+
+
+class SelfConsistencyEvaluator:
+    def __init__(
+        self,
+        evaluator,
+        parse,
+        samples: int = 5,
+        quorum: int | None = None,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        """
+        Initialize an evaluator that samples the same request up to k times,
+        concurrently, and keeps the findings a quorum of samples agree on.
+        :param evaluator: evaluator exposing evaluate(input_variables=...)
+        :param parse: callable turning a raw response into a list of finding dicts
+        :param samples: int, maximum number of samples (k)
+        :param quorum: int, votes needed to accept a finding (default majority of k)
+        :param logger: logging.Logger, optional logger for logging messages
+        """
+        if samples < 1:
+            raise ValueError("At least one sample is required.")
+
+        self.evaluator = evaluator
+        self.parse = parse
+        self.samples: int = samples
+        self.quorum: int = quorum if quorum is not None else samples // 2 + 1
+        self.logger: logging.Logger | None = logger
+        self.last_run: dict = {}
+
+        if not 1 <= self.quorum <= samples:
+            raise ValueError(f"Quorum must be between 1 and {samples}.")
+
+    def _log(self, message: str) -> None:
+        """
+        Log a message if a logger is provided.
+        :param message: str, message to log
+        """
+        if self.logger:
+            self.logger.info(message)
+
+    def _needed(self, votes: dict, completed: int) -> int:
+        """
+        Get the fewest further samples that could decide the outcome, if they
+        all agree with the votes so far.
+        :param votes: dict mapping finding key to vote count
+        :param completed: int, number of samples completed
+        :return: int, samples to keep in flight (0 or less once decided)
+        """
+        remaining = self.samples - completed
+        # An unseen finding can reach the quorum until fewer samples remain
+        needed = remaining - self.quorum + 1
+        for count in votes.values():
+            if count < self.quorum <= count + remaining:
+                # Accepted after quorum - count more votes, or out of reach
+                # once too few samples remain
+                needed = max(needed, min(self.quorum - count, remaining - self.quorum + count + 1))
+        return needed
+
+    def evaluate_findings(self, input_variables: dict[str, str]) -> list[dict]:
+        """
+        Sample the evaluator and vote on the merged findings. Only the
+        samples that could still decide the result, if they all agreed, are
+        in flight at any time; once it is decided, no more samples are sent,
+        so agreeing samples save the cost of the others.
+        :param input_variables: dict, prompt variables passed to the evaluator
+        :return: list of accepted findings with "Votes" and "Confidence" keys
+        """
+        votes: dict[tuple[str, str], int] = {}
+        representatives: dict[tuple[str, str], dict] = {}
+        usage = {"prompt_tokens": 0, "output_tokens": 0}
+        sent = 0
+        completed = 0
+        failed = 0
+        last_error: Exception | None = None
+
+        executor = ThreadPoolExecutor(max_workers=max(self.quorum, self._needed({}, 0)))
+
+        def send() -> None:
+            nonlocal sent
+            pending.add(executor.submit(call_evaluator, self.evaluator, input_variables))
+            sent += 1
+
+        pending = set()
+        try:
+            for _ in range(self._needed({}, 0)):
+                send()
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    completed += 1
+                    try:
+                        response, sample_usage, _ = future.result()
+                        usage["prompt_tokens"] += sample_usage.get("prompt_tokens", 0)
+                        usage["output_tokens"] += sample_usage.get("output_tokens", 0)
+                        findings = self.parse(response)
+                    except Exception as e:
+                        failed += 1
+                        last_error = e
+                        self._log(f"Sample failed: {e}")
+                        findings = []
+
+                    # One vote per sample and key
+                    for key in {finding_key(finding): None for finding in findings}:
+                        votes[key] = votes.get(key, 0) + 1
+                    for finding in findings:
+                        representatives.setdefault(finding_key(finding), finding)
+
+                needed = self._needed(votes, completed)
+                if needed <= 0:
+                    break
+                while sent < self.samples and len(pending) < needed:
+                    send()
+        finally:
+            # Samples still in flight finish in the background, ignored
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if failed == completed:
+            raise RuntimeError(f"All {completed} samples failed.") from last_error
+
+        self.last_run = {
+            "samples": self.samples,
+            "sent": sent,
+            "completed": completed,
+            "failed": failed,
+            "skipped": self.samples - sent,
+            "candidates": len(votes),
+            **usage,
+        }
+        self._log(f"Self-consistency run: {self.last_run}")
+
+        accepted = []
+        for key, count in sorted(votes.items(), key=lambda item: -item[1]):
+            if count < self.quorum:
+                continue
+            finding = dict(representatives[key])
+            finding["Votes"] = count
+            finding["Confidence"] = count / (completed - failed)
+            accepted.append(finding)
+
+        return accepted
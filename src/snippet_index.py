@@ -0,0 +1,227 @@
+import re
+from array import array
+from collections import defaultdict
+
+from file import File
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Token bigrams shared by more distinct lines than this (e.g. "( )") are too
+# common to narrow down a fuzzy lookup and are skipped at query time
+MAX_POSTINGS = 512
+
+# Minimum token-bigram similarity for a reported line to match a project line
+FUZZY_THRESHOLD = 0.6
+
+# Minimum fraction of the reported lines that must be found at the location
+MIN_MATCH_RATIO = 0.5
+
+# Maximum occurrences of the anchor line checked when aligning a snippet
+MAX_CANDIDATES = 256
+
+
+def normalize_line(line: str) -> str:
+    """
+    Normalizes a line of code for matching: surrounding whitespace is removed
+    and inner whitespace runs are collapsed.
+
+    Args:
+        line (str): Line of code.
+
+    Returns:
+        str: Normalized line.
+    """
+    return " ".join(line.split())
+
+
+def line_grams(line: str) -> set[str]:
+    """
+    Gets the token bigrams of a normalized line (its single token if it has
+    only one).
+
+    Args:
+        line (str): Normalized line.
+
+    Returns:
+        set[str]: Token n-grams.
+    """
+    tokens = TOKEN_PATTERN.findall(line)
+    if len(tokens) < 2:
+        return set(tokens)
+    return {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+
+
+class SnippetMatch:
+    __slots__ = ("path", "start", "end", "score")
+
+    def __init__(self, path: str, start: int, end: int, score: float) -> None:
+        """
+        Initialize the location of a reported snippet.
+        :param path: str, file path
+        :param start: int, first line (1-based)
+        :param end: int, last line (1-based)
+        :param score: float, fraction of the snippet lines found at the location
+        """
+        self.path = path
+        self.start = start
+        self.end = end
+        self.score = score
+
+    def __repr__(self):
+        return f"SnippetMatch(path={self.path}, start={self.start}, end={self.end}, score={self.score:.2f})"
+
+
+class SnippetIndex:
+    def __init__(self, files: list[File] | None = None) -> None:
+        """
+        Initialize an index mapping code snippets to file locations. Every
+        distinct normalized line gets an id; each file is stored as the array
+        of ids of its non-blank lines, with an inverted index from line ids to
+        occurrences and from token bigrams to line ids for fuzzy lookups.
+        Contents loaded for indexing are released afterwards.
+        :param files: list of File objects to index
+        """
+        self.paths: list[str] = []
+        self._line_ids: dict[str, int] = {}
+        self._gram_counts = array("i")
+        self._grams: dict[str, list[int]] = defaultdict(list)
+        self._occurrences: list[list[tuple[int, int]]] = []
+        # Per file: line ids of the non-blank lines and their line numbers
+        self._lines: list[array] = []
+        self._numbers: list[array] = []
+        self._by_name: dict[str, list[int]] = defaultdict(list)
+
+        for file in files or []:
+            self.add(file)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def add(self, file: File) -> None:
+        """
+        Index a file.
+        :param file: File to index
+        """
+        loaded = file.loaded
+        file_id = len(self.paths)
+        self.paths.append(file.path)
+        self._by_name[file.path.replace("\\", "/").split("/")[-1]].append(file_id)
+
+        lines = array("i")
+        numbers = array("i")
+        for number, raw in enumerate((file.content or "").splitlines(), start=1):
+            line = normalize_line(raw)
+            if not line:
+                continue
+            line_id = self._line_id(line)
+            self._occurrences[line_id].append((file_id, len(lines)))
+            lines.append(line_id)
+            numbers.append(number)
+
+        self._lines.append(lines)
+        self._numbers.append(numbers)
+        if not loaded:
+            file.release()
+
+    def _line_id(self, line: str) -> int:
+        line_id = self._line_ids.get(line)
+        if line_id is None:
+            line_id = len(self._occurrences)
+            self._line_ids[line] = line_id
+            self._occurrences.append([])
+            grams = line_grams(line)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._grams[gram].append(line_id)
+        return line_id
+
+    def match_line(self, line: str) -> int | None:
+        """
+        Find the id of the indexed line closest to a reported line: an exact
+        match after normalization, or else the most similar line sharing
+        token bigrams with it.
+        :param line: str, normalized reported line
+        :return: int line id, or None if nothing is similar enough
+        """
+        line_id = self._line_ids.get(line)
+        if line_id is not None:
+            return line_id
+
+        grams = line_grams(line)
+        if not grams:
+            return None
+
+        shared: dict[int, int] = defaultdict(int)
+        for gram in grams:
+            postings = self._grams.get(gram)
+            if postings and len(postings) <= MAX_POSTINGS:
+                for candidate in postings:
+                    shared[candidate] += 1
+
+        best, best_score = None, FUZZY_THRESHOLD
+        for candidate, count in shared.items():
+            # Dice coefficient over token bigrams
+            score = 2 * count / (len(grams) + self._gram_counts[candidate])
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    def _candidate_files(self, file_field: str | None) -> set[int]:
+        files = set()
+        for name in (file_field or "").split(","):
+            name = name.strip().replace("\\", "/")
+            if name:
+                files.update(self._by_name.get(name.split("/")[-1], []))
+        return files
+
+    def locate(self, code: str | None, file_field: str | None = None, prefer=None) -> SnippetMatch | None:
+        """
+        Locate a reported snippet. The rarest matched line anchors the
+        snippet, and each of its occurrences is scored by how many snippet
+        lines are found at the expected offsets. Occurrences in the files named
+        by the File field win ties, then occurrences accepted by prefer.
+        :param code: str, Code field reported by the LLM
+        :param file_field: str, File field reported by the LLM
+        :param prefer: callable(path, line) -> bool, optional tie-breaker on the first line
+        :return: SnippetMatch, or None if the snippet matches nothing (hallucinated)
+        """
+        snippet = [normalize_line(line) for line in (code or "").splitlines()]
+        snippet = [line for line in snippet if line]
+        if snippet and snippet[-1] == "...":
+            snippet.pop()
+        if not snippet:
+            return None
+
+        ids = [self.match_line(line) for line in snippet]
+        found = [(offset, line_id) for offset, line_id in enumerate(ids) if line_id is not None]
+        if len(found) < MIN_MATCH_RATIO * len(snippet):
+            return None
+
+        anchor_offset, anchor_id = min(found, key=lambda item: len(self._occurrences[item[1]]))
+        preferred = self._candidate_files(file_field)
+
+        best, best_key = None, None
+        for file_id, position in self._occurrences[anchor_id][:MAX_CANDIDATES]:
+            lines = self._lines[file_id]
+            first = position - anchor_offset
+            hits = sum(
+                1 for offset, line_id in found
+                if 0 <= first + offset < len(lines) and lines[first + offset] == line_id
+            )
+            key = (hits, file_id in preferred)
+            if prefer is not None:
+                numbers = self._numbers[file_id]
+                line = numbers[min(max(first, 0), len(numbers) - 1)]
+                key += (prefer(self.paths[file_id], line),)
+            if best_key is None or key > best_key:
+                best, best_key = (file_id, first), key
+
+        file_id, first = best
+        hits = best_key[0]
+        if hits < MIN_MATCH_RATIO * len(snippet):
+            return None
+
+        numbers = self._numbers[file_id]
+        first = max(first, 0)
+        last = min(first + len(snippet) - 1, len(numbers) - 1)
+        return SnippetMatch(self.paths[file_id], numbers[first], numbers[last], hits / len(snippet))
@@ -0,0 +1,436 @@
+import json
+import logging
+import re
+import threading
+
+TYPE_VALUES = ["Reliability", "Security", "Performance Efficiency", "Maintainability"]
+SEVERITY_VALUES = ["Critical", "High", "Medium", "Low"]
+
+FIELD_ENUMS = {
+    "Type": TYPE_VALUES,
+    "Severity": SEVERITY_VALUES,
+}
+
+# Fields locating the issue in the code: a repair model never saw the code, so
+# issues missing them are dropped instead of re-asked
+GROUNDED_FIELDS = ("File", "Code")
+
+REASK_PROMPT = """
+The following issue, reported as JSON by a code evaluator, is missing the fields {fields}.
+Return only a JSON object with exactly those keys, as strings, completing the issue.
+{enums}
+Issue:
+{issue}
+"""
+
+
+def build_output_schema(fields: list[str]) -> dict:
+    """
+    Builds the JSON schema of the structured output: an array of issues with
+    one required string property per output field.
+
+    Args:
+        fields (list[str]): Output fields, e.g. the keys of DEFAULT_OUTPUT_ROW.
+
+    Returns:
+        dict: JSON schema.
+    """
+    properties = {}
+    for field in fields:
+        properties[field] = {"type": "string"}
+        if field in FIELD_ENUMS:
+            properties[field]["enum"] = FIELD_ENUMS[field]
+
+    return {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": properties,
+            "required": list(fields),
+        },
+    }
+
+
+def to_gemini_schema(schema: dict) -> dict:
+    """
+    Converts a JSON schema to the OpenAPI subset accepted as a Gemini
+    response_schema (upper-case type names).
+
+    Args:
+        schema (dict): JSON schema.
+
+    Returns:
+        dict: Gemini response schema.
+    """
+    converted = {}
+    for key, value in schema.items():
+        if key == "type":
+            converted[key] = value.upper()
+        elif key == "properties":
+            converted[key] = {name: to_gemini_schema(prop) for name, prop in value.items()}
+        elif key == "items":
+            converted[key] = to_gemini_schema(value)
+        else:
+            converted[key] = value
+    return converted
+
+
+def compile_validator(schema: dict):
+    """
+    Compiles a JSON schema (type, enum, properties, required, items) into a
+    validation function, so the schema is walked once instead of per response.
+
+    Args:
+        schema (dict): JSON schema.
+
+    Returns:
+        callable: validate(instance, path="$") -> list[str] of error messages.
+    """
+    python_types = {
+        "array": list,
+        "object": dict,
+        "string": str,
+        "number": (int, float),
+        "integer": int,
+        "boolean": bool,
+    }
+    checks = []
+
+    if "type" in schema:
+        expected = python_types[schema["type"]]
+        type_name = schema["type"]
+
+        def check_type(instance, path):
+            if not isinstance(instance, expected):
+                return [f"{path}: expected {type_name}"]
+            return []
+
+        checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = set(schema["enum"])
+
+        def check_enum(instance, path):
+            if instance not in allowed:
+                return [f"{path}: {instance!r} is not one of {sorted(allowed)}"]
+            return []
+
+        checks.append(check_enum)
+
+    if "required" in schema:
+        required = list(schema["required"])
+
+        def check_required(instance, path):
+            if not isinstance(instance, dict):
+                return []
+            return [f"{path}: missing {key}" for key in required if key not in instance]
+
+        checks.append(check_required)
+
+    if "properties" in schema:
+        property_validators = {
+            name: compile_validator(prop) for name, prop in schema["properties"].items()
+        }
+
+        def check_properties(instance, path):
+            if not isinstance(instance, dict):
+                return []
+            errors = []
+            for name, validator in property_validators.items():
+                if name in instance:
+                    errors.extend(validator(instance[name], f"{path}.{name}"))
+            return errors
+
+        checks.append(check_properties)
+
+    if "items" in schema:
+        item_validator = compile_validator(schema["items"])
+
+        def check_items(instance, path):
+            if not isinstance(instance, list):
+                return []
+            errors = []
+            for i, item in enumerate(instance):
+                errors.extend(item_validator(item, f"{path}[{i}]"))
+            return errors
+
+        checks.append(check_items)
+
+    def validate(instance, path: str = "$") -> list[str]:
+        errors = []
+        for check in checks:
+            errors.extend(check(instance, path))
+        return errors
+
+    return validate
+
+
+def split_json_array(text: str) -> tuple[list, str]:
+    """
+    Decodes the complete elements of a possibly truncated JSON array.
+
+    Args:
+        text (str): Text containing a JSON array.
+
+    Returns:
+        tuple[list, str]: The decoded elements and the undecodable tail
+        (empty if the array was complete).
+    """
+    start = text.find("[")
+    if start == -1:
+        return [], text
+
+    decoder = json.JSONDecoder()
+    items = []
+    position = start + 1
+
+    while True:
+        while position < len(text) and text[position] in " \t\r\n,":
+            position += 1
+        if position >= len(text):
+            return items, ""
+        if text[position] == "]":
+            return items, ""
+        try:
+            item, position = decoder.raw_decode(text, position)
+        except json.JSONDecodeError:
+            return items, text[position:]
+        items.append(item)
+
+
+def first_object(text: str) -> str:
+    """
+    Cuts the first JSON object out of a text, ending at its balanced closing
+    brace, or where the next object starts if it was never closed.
+
+    Args:
+        text (str): Text starting with (or containing) a JSON object.
+
+    Returns:
+        str: The object text, empty if there is none.
+    """
+    start = text.find("{")
+    if start == -1:
+        return ""
+
+    depth = 0
+    in_string = escaped = False
+    for position in range(start, len(text)):
+        char = text[position]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            if depth == 1:
+                return text[start:position]
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:position + 1]
+    return text[start:]
+
+
+def salvage_fields(fragment: str) -> dict:
+    """
+    Extracts the complete "key": "value" string pairs of the first object of
+    a truncated JSON fragment; later objects are ignored.
+
+    Args:
+        fragment (str): Truncated JSON text starting at an object.
+
+    Returns:
+        dict: The fields that were complete.
+    """
+    fields = {}
+    for key, value in re.findall(r'"(\w+)"\s*:\s*"((?:[^"\\]|\\.)*)"', first_object(fragment)):
+        try:
+            fields[key] = json.loads(f'"{value}"')
+        except json.JSONDecodeError:
+            continue
+    return fields
+
+
+class ParsedResponse(str):
+    """
+    JSON text of issues already parsed and validated. Parsing it again returns
+    the issues as they are, without counting the response twice.
+    """
+
+    def __new__(cls, issues: list[dict]) -> "ParsedResponse":
+        response = super().__new__(cls, json.dumps(issues))
+        response.issues = issues
+        return response
+
+
+class StructuredOutputParser:
+    def __init__(
+        self,
+        fields: list[str],
+        reask=None,
+        logger: logging.Logger | None = None,
+    ) -> None:
+        """
+        Initialize a parser for schema-constrained JSON responses. Invalid
+        responses are repaired locally first and, for issues still missing
+        fields, by re-asking a cheap model for those fields only. Issues
+        missing a grounded field (File, Code) are dropped, never re-asked.
+        :param fields: list of output fields, e.g. the keys of DEFAULT_OUTPUT_ROW
+        :param reask: callable(prompt) -> str used for repairs, or None to disable
+        :param logger: logging.Logger, optional logger for logging messages
+        """
+        self.fields: list[str] = list(fields)
+        self.schema: dict = build_output_schema(self.fields)
+        self.validate_issue = compile_validator(self.schema["items"])
+        self.reask = reask
+        self.logger: logging.Logger | None = logger
+        self.counters: dict[str, int] = {
+            "responses": 0,
+            "valid": 0,
+            "repaired_locally": 0,
+            "reasked": 0,
+            "reask_failures": 0,
+            "dropped_issues": 0,
+        }
+        self._lock = threading.Lock()
+
+    def _log(self, message: str) -> None:
+        """
+        Log a message if a logger is provided.
+        :param message: str, message to log
+        """
+        if self.logger:
+            self.logger.warning(message)
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += amount
+
+    def _fix_locally(self, issue) -> dict | None:
+        """
+        Apply cheap local fixes: stringify values and normalize enum casing.
+        Fields that cannot be fixed are left out.
+        :param issue: decoded issue
+        :return: dict with the known fields, or None if it is not an object
+        """
+        if not isinstance(issue, dict):
+            return None
+
+        fixed = {}
+        for field in self.fields:
+            if field not in issue or issue[field] is None:
+                continue
+            value = issue[field] if isinstance(issue[field], str) else json.dumps(issue[field])
+            value = value.strip()
+            if field in FIELD_ENUMS:
+                # Unknown enum values are dropped so they get re-asked like missing ones
+                matches = [allowed for allowed in FIELD_ENUMS[field] if value.lower() == allowed.lower()]
+                if not matches:
+                    continue
+                value = matches[0]
+            fixed[field] = value
+        return fixed
+
+    def _reask_missing(self, issue: dict) -> dict | None:
+        """
+        Ask the repair model for the missing fields of one issue only.
+        :param issue: dict, partially valid issue
+        :return: dict, the completed issue, or None if the repair failed
+        """
+        missing = [field for field in self.fields if field not in issue]
+        enums = "\n".join(
+            f"{field} must be one of: {', '.join(FIELD_ENUMS[field])}."
+            for field in missing
+            if field in FIELD_ENUMS
+        )
+        prompt = REASK_PROMPT.format(
+            fields=", ".join(missing), enums=enums, issue=json.dumps(issue, indent=2)
+        )
+
+        self._count("reasked")
+        try:
+            answer = self.reask(prompt)
+            start, end = answer.find("{"), answer.rfind("}")
+            completion = self._fix_locally(json.loads(answer[start:end + 1])) or {}
+        except Exception as e:
+            self._log(f"Repair re-ask failed: {e}")
+            self._count("reask_failures")
+            return None
+
+        repaired = {**issue, **{field: completion[field] for field in missing if field in completion}}
+        if self.validate_issue(repaired):
+            self._count("reask_failures")
+            return None
+        return repaired
+
+    def parse(self, response: str) -> list[dict]:
+        """
+        Parse a structured response into issues without raising.
+        :param response: str, raw model response
+        :return: list of issue dicts with every output field
+        """
+        if isinstance(response, ParsedResponse):
+            return list(response.issues)
+
+        self._count("responses")
+        items, tail = split_json_array(response)
+
+        if not tail and all(not self.validate_issue(item) for item in items):
+            self._count("valid")
+            return items
+
+        issues = []
+        repaired_locally = False
+
+        candidates = list(items)
+        if tail.strip():
+            # Truncated response: keep whatever fields of the last issue are complete
+            salvaged = salvage_fields(tail)
+            if salvaged:
+                candidates.append(salvaged)
+
+        for item in candidates:
+            issue = self._fix_locally(item)
+            if issue is None:
+                self._count("dropped_issues")
+                continue
+
+            if not self.validate_issue(issue):
+                issues.append(issue)
+                repaired_locally = True
+                continue
+
+            grounded = all(field in issue for field in GROUNDED_FIELDS if field in self.fields)
+            if self.reask is not None and grounded:
+                repaired = self._reask_missing(issue)
+                if repaired is not None:
+                    issues.append(repaired)
+                    continue
+
+            self._count("dropped_issues")
+            self._log(f"Dropped invalid issue: {self.validate_issue(issue)}")
+
+        if repaired_locally:
+            self._count("repaired_locally")
+
+        return issues
+
+    def metrics(self) -> dict:
+        """
+        Get the parse counters and the derived retry/repair rates.
+        :return: dict of counters and rates
+        """
+        with self._lock:
+            metrics = dict(self.counters)
+
+        responses = metrics["responses"] or 1
+        metrics["valid_rate"] = metrics["valid"] / responses
+        metrics["local_repair_rate"] = metrics["repaired_locally"] / responses
+        metrics["reask_rate"] = metrics["reasked"] / responses
+        return metrics
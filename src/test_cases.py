@@ -1,28 +1,42 @@
 from test_case_data_load import read_all_test_cases
-from test_core import check_response
-from core import send_code_to_llm, parse_response_to_dataframe
-
-from test_configuration import CSHARP_TEST_DIR, PHP_TEST_DIR, CSHARP_RESULTS_DIR, PHP_RESULTS_DIR, JAVA_TEST_DIR, JAVA_RESULTS_DIR
+from test_core import check_response, check_response_located
+from core import send_chunk_to_llm, send_chunk_to_llm_with_consensus, parse_response_to_dataframe, findings_to_xml, MODEL_LADDER
+from chunker import Chunk
+from file import File
+from snippet_index import SnippetIndex
+from results_store import ResultsStore
+
+from test_configuration import CSHARP_TEST_DIR, PHP_TEST_DIR, CSHARP_RESULTS_DIR, PHP_RESULTS_DIR, JAVA_TEST_DIR, JAVA_RESULTS_DIR, RESULTS_STORE_DIR
+import os
 import time
 import pandas as pd
 
+# Number of concurrent samples voted on per test case; 1 disables self-consistency
+SAMPLES = int(os.getenv("SELF_CONSISTENCY_SAMPLES", "1"))
+
+# Also write the legacy per-iteration CSVs (e.g. for replay_evaluator.py)
+WRITE_CSV = os.getenv("RESULTS_CSV", "0") == "1"
+
 if __name__ == "__main__":
     # Set display options for Pandas DataFrame
     pd.set_option('display.max_columns', None)
 
     base_path = PHP_TEST_DIR
     results_path = PHP_RESULTS_DIR
+    store = ResultsStore(RESULTS_STORE_DIR)
 
     iterations = 12
     iterations_list = []
     total_test_cases_list = []
     hit_test_cases_list = []
+    located_test_cases_list = []
     accuracy_list = []
 
     for iter in range(11, iterations):
         total_test_cases = 100
         test_cases = read_all_test_cases(base_path, max_dirs=100)
         hit_test_cases = 0
+        located_test_cases = 0
         
         hit_cwe_list = []
         llm_code_list = []
@@ -34,15 +48,24 @@ if __name__ == "__main__":
         llm_complete_responses = []
 
         for test_case in test_cases:
-            code_combined = "File name: File 1\n" + test_case["Source"]
-
-            response = send_code_to_llm(code_combined, verbose=False)
-            response_df = parse_response_to_dataframe(response)
+            # Sent as a chunk, so that compact responses are expanded back into code
+            chunk = Chunk([File(path="File 1", content=test_case["Source"])])
+
+            if SAMPLES > 1:
+                response_df = send_chunk_to_llm_with_consensus(chunk, samples=SAMPLES, verbose=False)
+                response = findings_to_xml(response_df.to_dict("records"))
+            else:
+                response = send_chunk_to_llm(chunk, verbose=False)
+                response_df = parse_response_to_dataframe(response)
             hit, llm_code = check_response(response_df, test_case)
 
             if hit:
                 hit_test_cases += 1
 
+            # Relaxed metric, reported separately from the exact line hits
+            if check_response_located(response_df, test_case, SnippetIndex(chunk.files)):
+                located_test_cases += 1
+
             hit_cwe = False
             if llm_code != "":
                 hit_cwe = True
@@ -62,8 +85,8 @@ if __name__ == "__main__":
 
             time.sleep(5)
 
-        # Create a DataFrame with the results
-        results_df = pd.DataFrame({
+        # Store the results of the iteration
+        results = {
             "Test Case Weakness": test_case_weakness_list,
             "Test Case File": test_case_file_list,
             "Test Case Code": test_case_code_list,
@@ -72,23 +95,31 @@ if __name__ == "__main__":
             "LLM Hit Code": hit_code_list,
             "LLM Code": llm_code_list,
             "LLM Complete Response": llm_complete_responses
-        })
+        }
+
+        store.write_run(results, language=results_path.name, model=",".join(MODEL_LADDER), iteration=iter)
 
-        results_df.to_csv(str(results_path / f"test_cases_iter_{iter}_results.csv"), index=False)
+        if WRITE_CSV:
+            pd.DataFrame(results).to_csv(str(results_path / f"test_cases_iter_{iter}_results.csv"), index=False)
 
         iterations_list.append(iter + 1)
         total_test_cases_list.append(total_test_cases)
         hit_test_cases_list.append(hit_test_cases)
+        located_test_cases_list.append(located_test_cases)
         accuracy_list.append(hit_test_cases / total_test_cases * 100)
 
-        print(f"Iteration {iter + 1}: {hit_test_cases} out of {total_test_cases} test cases hit. Accuracy: {hit_test_cases / total_test_cases * 100:.2f}%")
+        print(f"Iteration {iter + 1}: {hit_test_cases} out of {total_test_cases} test cases hit. Accuracy: {hit_test_cases / total_test_cases * 100:.2f}% (located: {located_test_cases / total_test_cases * 100:.2f}%)")
 
     # Create a DataFrame with the results
     results_df = pd.DataFrame({
         "Iteration": iterations_list,
         "Total Test Cases": total_test_cases_list,
         "Hit Test Cases": hit_test_cases_list,
-        "Accuracy": accuracy_list
+        "Accuracy": accuracy_list,
+        "Located Hit Test Cases": located_test_cases_list,
     })
     # Save the results to a CSV file
     results_df.to_csv(str(results_path / "test_cases_results_general.csv"), index=False)
+
+    # Accuracy of every stored iteration of this language and model
+    print(store.accuracy(by=["iteration"], language=results_path.name, model=",".join(MODEL_LADDER)))
@@ -7,4 +7,7 @@ JAVA_TEST_DIR = TEST_DIR / "java"
 RESULTS_DIR = Path("analysis/results")
 CSHARP_RESULTS_DIR = RESULTS_DIR / "csharp"
 PHP_RESULTS_DIR = RESULTS_DIR / "php"
-JAVA_RESULTS_DIR = RESULTS_DIR / "java"
\ No newline at end of file
+JAVA_RESULTS_DIR = RESULTS_DIR / "java"
+
+# Columnar store of the benchmark runs (see results_store.py)
+RESULTS_STORE_DIR = Path("analysis/warehouse")
@@ -1,5 +1,7 @@
 import difflib
 
+from snippet_index import SnippetIndex
+
 def fuzzy_substring_match(substring, string, threshold=0.8):
     """
     Checks if any substring of 'string' (of length equal to 'substring') 
@@ -65,3 +67,28 @@ def check_response(response_df, test_case) -> tuple[bool, str]:
 
     print(f"Failed to accert CWE: {value} in file {test_case['File']}. No matching CWE found.")
     return False, ""
+
+
+def check_response_located(response_df, test_case, index: SnippetIndex) -> bool:
+    """
+    Relaxed hit metric, reported next to check_response and never instead of
+    it: a finding of the expected weakness counts when the span its code maps
+    to in the test case source contains the expected line, even if no single
+    reported line matches that line.
+    Args:
+        response_df (pd.DataFrame): DataFrame containing the LLM's response.
+        test_case (dict): Dictionary containing the test case data.
+        index (SnippetIndex): Index of the test case source, built once per test case.
+    Returns:
+        bool: True if a located finding covers the expected line, False otherwise.
+    """
+    expected = index.locate(test_case["Line"].strip())
+    if expected is None:
+        return False
+
+    matches = response_df["Weakness"].str.startswith(test_case["Weakness"])
+    for code in response_df.loc[matches, "Code"]:
+        located = index.locate(code)
+        if located is not None and located.start <= expected.start <= located.end:
+            return True
+    return False
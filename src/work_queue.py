@@ -0,0 +1,815 @@
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+
+logger = logging.getLogger("work_queue")
+logger.setLevel(logging.INFO)
+if not logger.hasHandlers():
+    handler = logging.StreamHandler()
+    formatter = logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+# Seconds a leased job stays invisible to other workers without a heartbeat
+DEFAULT_VISIBILITY_TIMEOUT = 600.0
+
+# Leases of a job before it is reported as failed
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Delay before a failed attempt is retried
+RETRY_DELAY = 10.0
+
+# Job ids per SQLite lookup, below the bound parameter limit
+SQLITE_BATCH = 500
+
+
+class Job:
+    __slots__ = ("id", "batch", "payload", "token", "attempts")
+
+    def __init__(self, id: str, batch: str, payload: dict, token: str, attempts: int) -> None:
+        """
+        Initialize a leased job.
+        :param id: str, job id, unique in the queue
+        :param batch: str, batch the job belongs to
+        :param payload: dict, job input
+        :param token: str, lease token, required to settle the job
+        :param attempts: int, number of times the job was leased, this one included
+        """
+        self.id = id
+        self.batch = batch
+        self.payload = payload
+        self.token = token
+        self.attempts = attempts
+
+    def __repr__(self):
+        return f"Job(id={self.id}, batch={self.batch}, attempts={self.attempts})"
+
+
+class JobFailedError(RuntimeError):
+    """Raised when collecting a batch whose job failed on every attempt."""
+
+
+class WorkQueue(ABC):
+    """
+    Queue of LLM jobs shared by a producer and any number of worker processes.
+    Leased jobs become visible again when their lease expires, so a crashed
+    worker never loses work, and the first result written for a job wins, so
+    a job finished twice is harmless.
+    """
+
+    @abstractmethod
+    def put(self, batch: str, job_id: str, payload: dict) -> bool:
+        """
+        Enqueue a job. Enqueuing an existing job id does nothing.
+        :return: bool, True if the job was added
+        """
+
+    @abstractmethod
+    def lease(self, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT) -> Job | None:
+        """
+        Lease the oldest visible job.
+        :return: Job, or None if no job is available
+        """
+
+    @abstractmethod
+    def extend(self, job: Job, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT) -> bool:
+        """
+        Extend a lease (heartbeat).
+        :return: bool, False if the lease was lost
+        """
+
+    @abstractmethod
+    def complete(self, job: Job, result: str) -> bool:
+        """
+        Store the result of a job.
+        :return: bool, False if a result was already stored
+        """
+
+    @abstractmethod
+    def fail(self, job: Job, error: str) -> None:
+        """
+        Release a job after a failed attempt; it is retried later, or marked
+        as failed once it has been leased max_attempts times.
+        """
+
+    @abstractmethod
+    def cancel(self, batch: str, job_ids) -> int:
+        """
+        Remove jobs of a batch that have no result yet, so that no worker
+        leases them again. A job being processed may still store its result.
+        :param job_ids: iterable of job ids to cancel
+        :return: int, number of jobs removed
+        """
+
+    @abstractmethod
+    def results(self, batch: str, job_ids=None) -> dict[str, str]:
+        """
+        Get the results stored so far for a batch.
+        :param job_ids: iterable of job ids to look up, or None for all
+        :return: dict mapping job ids to results
+        """
+
+    @abstractmethod
+    def failures(self, batch: str, job_ids=None) -> dict[str, str]:
+        """
+        Get the jobs of a batch that failed on every attempt.
+        :param job_ids: iterable of job ids to look up, or None for all
+        :return: dict mapping job ids to their last error
+        """
+
+
+class SQLiteWorkQueue(WorkQueue):
+    def __init__(self, path: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> None:
+        """
+        Initialize a queue stored in a SQLite database, shared by the processes
+        of one machine (or of several, over a file system with working locks).
+        :param path: str, database file
+        :param max_attempts: int, leases of a job before it is marked as failed
+        """
+        self.path: str = path
+        self.max_attempts: int = max_attempts
+        self._local = threading.local()
+
+        self._connect().executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                batch TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'queued',
+                token TEXT,
+                visible_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_visible ON jobs (state, visible_at);
+            CREATE TABLE IF NOT EXISTS results (
+                id TEXT PRIMARY KEY,
+                batch TEXT NOT NULL,
+                result TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS results_batch ON results (batch);
+            """
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Get the connection of the current thread and process. Connections are
+        never shared across a fork.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def put(self, batch, job_id, payload) -> bool:
+        cursor = self._connect().execute(
+            "INSERT OR IGNORE INTO jobs (id, batch, payload, visible_at, created) VALUES (?, ?, ?, ?, ?)",
+            (job_id, batch, json.dumps(payload), time.time(), time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def lease(self, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT) -> Job | None:
+        connection = self._connect()
+        now = time.time()
+
+        # Takes the write lock up front, so two workers never pick the same job
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "UPDATE jobs SET state = 'failed', error = coalesce(error, 'Lease expired') "
+                "WHERE state = 'leased' AND visible_at <= ? AND attempts >= ?",
+                (now, self.max_attempts),
+            )
+            row = connection.execute(
+                "SELECT id, batch, payload, attempts FROM jobs "
+                "WHERE state IN ('queued', 'leased') AND visible_at <= ? "
+                "ORDER BY rowid LIMIT 1",
+                (now,),
+            ).fetchone()
+
+            if row is None:
+                connection.execute("COMMIT")
+                return None
+
+            job_id, batch, payload, attempts = row
+            token = uuid.uuid4().hex
+            connection.execute(
+                "UPDATE jobs SET state = 'leased', token = ?, visible_at = ?, attempts = ? WHERE id = ?",
+                (token, now + visibility_timeout, attempts + 1, job_id),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        return Job(job_id, batch, json.loads(payload), token, attempts + 1)
+
+    def extend(self, job, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT) -> bool:
+        cursor = self._connect().execute(
+            "UPDATE jobs SET visible_at = ? WHERE id = ? AND token = ? AND state = 'leased'",
+            (time.time() + visibility_timeout, job.id, job.token),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, job, result) -> bool:
+        connection = self._connect()
+        cursor = connection.execute(
+            "INSERT OR IGNORE INTO results (id, batch, result) VALUES (?, ?, ?)",
+            (job.id, job.batch, result),
+        )
+        connection.execute("UPDATE jobs SET state = 'done', token = NULL WHERE id = ?", (job.id,))
+        return cursor.rowcount == 1
+
+    def fail(self, job, error) -> None:
+        if job.attempts >= self.max_attempts:
+            self._connect().execute(
+                "UPDATE jobs SET state = 'failed', error = ? WHERE id = ? AND token = ?",
+                (error, job.id, job.token),
+            )
+        else:
+            self._connect().execute(
+                "UPDATE jobs SET state = 'queued', error = ?, token = NULL, visible_at = ? "
+                "WHERE id = ? AND token = ?",
+                (error, time.time() + RETRY_DELAY, job.id, job.token),
+            )
+
+    def cancel(self, batch, job_ids) -> int:
+        job_ids = list(job_ids)
+        connection = self._connect()
+        cancelled = 0
+        for start in range(0, len(job_ids), SQLITE_BATCH):
+            ids = job_ids[start:start + SQLITE_BATCH]
+            cursor = connection.execute(
+                f"DELETE FROM jobs WHERE batch = ? AND state IN ('queued', 'leased') "
+                f"AND id IN ({', '.join('?' * len(ids))})",
+                (batch, *ids),
+            )
+            cancelled += cursor.rowcount
+        return cancelled
+
+    def _select(self, query: str, batch: str, job_ids) -> dict[str, str]:
+        """
+        Run a (id, value) query of a batch, restricted to some job ids if given.
+        """
+        connection = self._connect()
+        if job_ids is None:
+            return dict(connection.execute(query, (batch,)).fetchall())
+
+        job_ids = list(job_ids)
+        found = {}
+        for start in range(0, len(job_ids), SQLITE_BATCH):
+            ids = job_ids[start:start + SQLITE_BATCH]
+            rows = connection.execute(
+                f"{query} AND id IN ({', '.join('?' * len(ids))})", (batch, *ids)
+            )
+            found.update(rows.fetchall())
+        return found
+
+    def results(self, batch, job_ids=None) -> dict[str, str]:
+        return self._select("SELECT id, result FROM results WHERE batch = ?", batch, job_ids)
+
+    def failures(self, batch, job_ids=None) -> dict[str, str]:
+        return self._select("SELECT id, error FROM jobs WHERE batch = ? AND state = 'failed'", batch, job_ids)
+
+
+def _text(value) -> str | None:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+class WatchError(RuntimeError):
+    """Raised by LocalRedis when a watched key changed before a transaction ran."""
+
+
+class LocalRedis:
+    def __init__(self, clock=time.time) -> None:
+        """
+        Initialize an in-process stand-in for the subset of the Redis API used
+        by RedisWorkQueue (hashes, sorted sets, expiring keys and WATCH/MULTI
+        transactions), to test the Redis backend without a server. Its data
+        lives in this process only.
+        :param clock: callable returning the current time in seconds
+        """
+        self.clock = clock
+        self._data: dict = {}
+        self._expires: dict[str, float] = {}
+        self._versions: dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    def _live(self, key: str):
+        expires = self._expires.get(key)
+        if expires is not None and expires <= self.clock():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return self._data.get(key)
+
+    def _touch(self, key: str) -> None:
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    def version(self, key: str) -> int:
+        with self._lock:
+            self._live(key)
+            return self._versions.get(key, 0)
+
+    def pipeline(self) -> "LocalPipeline":
+        return LocalPipeline(self)
+
+    def exists(self, *keys: str) -> int:
+        with self._lock:
+            return sum(self._live(key) is not None for key in keys)
+
+    def get(self, key: str):
+        with self._lock:
+            value = self._live(key)
+            return value if isinstance(value, str) else None
+
+    def set(self, key: str, value: str, nx: bool = False, px: int | None = None) -> bool | None:
+        with self._lock:
+            if nx and self._live(key) is not None:
+                return None
+            self._data[key] = str(value)
+            self._expires.pop(key, None)
+            if px is not None:
+                self._expires[key] = self.clock() + px / 1000
+            self._touch(key)
+            return True
+
+    def pexpire(self, key: str, milliseconds: int) -> bool:
+        with self._lock:
+            if self._live(key) is None:
+                return False
+            self._expires[key] = self.clock() + milliseconds / 1000
+            return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            deleted = 0
+            for key in keys:
+                if self._live(key) is not None:
+                    del self._data[key]
+                    self._expires.pop(key, None)
+                    self._touch(key)
+                    deleted += 1
+            return deleted
+
+    def _hash(self, key: str) -> dict:
+        value = self._live(key)
+        if value is None:
+            value = self._data[key] = {}
+        return value
+
+    def hset(self, key: str, field: str | None = None, value=None, mapping: dict | None = None) -> int:
+        with self._lock:
+            items = dict(mapping or {})
+            if field is not None:
+                items[field] = value
+            fields = self._hash(key)
+            added = sum(name not in fields for name in items)
+            fields.update({name: str(item) for name, item in items.items()})
+            self._touch(key)
+            return added
+
+    def hsetnx(self, key: str, field: str, value) -> int:
+        with self._lock:
+            fields = self._hash(key)
+            if field in fields:
+                return 0
+            fields[field] = str(value)
+            self._touch(key)
+            return 1
+
+    def hget(self, key: str, field: str):
+        with self._lock:
+            return (self._live(key) or {}).get(field)
+
+    def hmget(self, key: str, fields) -> list:
+        with self._lock:
+            values = self._live(key) or {}
+            return [values.get(field) for field in fields]
+
+    def hgetall(self, key: str) -> dict:
+        with self._lock:
+            return dict(self._live(key) or {})
+
+    def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        with self._lock:
+            fields = self._hash(key)
+            fields[field] = str(int(fields.get(field, 0)) + amount)
+            self._touch(key)
+            return int(fields[field])
+
+    def zadd(self, key: str, mapping: dict) -> int:
+        with self._lock:
+            scores = self._hash(key)
+            added = sum(member not in scores for member in mapping)
+            scores.update({member: float(score) for member, score in mapping.items()})
+            self._touch(key)
+            return added
+
+    def zrem(self, key: str, *members: str) -> int:
+        with self._lock:
+            scores = self._live(key) or {}
+            removed = sum(scores.pop(member, None) is not None for member in members)
+            if removed:
+                self._touch(key)
+            return removed
+
+    def zrangebyscore(self, key: str, min, max, start: int | None = None, num: int | None = None) -> list:
+        with self._lock:
+            low, high = float(min), float(max)
+            members = sorted(
+                (score, member) for member, score in (self._live(key) or {}).items() if low <= score <= high
+            )
+            members = [member for _, member in members]
+            if start is not None:
+                members = members[start:start + num if num is not None else None]
+            return members
+
+
+class LocalPipeline:
+    def __init__(self, client: LocalRedis) -> None:
+        """
+        Initialize a WATCH/MULTI/EXEC transaction of a LocalRedis. Commands
+        run immediately until multi() and are queued afterwards.
+        :param client: LocalRedis, the stand-in server
+        """
+        self.client = client
+        self._watched: dict[str, int] = {}
+        self._commands: list | None = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self._watched = {}
+        self._commands = None
+
+    def watch(self, *keys: str) -> None:
+        for key in keys:
+            self._watched[key] = self.client.version(key)
+
+    def unwatch(self) -> None:
+        self._watched = {}
+
+    def multi(self) -> None:
+        self._commands = []
+
+    def execute(self) -> list:
+        with self.client._lock:
+            changed = [key for key, version in self._watched.items() if self.client.version(key) != version]
+            commands, self._commands = self._commands or [], None
+            self._watched = {}
+            if changed:
+                raise WatchError(f"Watched keys changed: {changed}")
+            return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in commands]
+
+    def __getattr__(self, name: str):
+        command = getattr(self.client, name)
+        if self._commands is None:
+            return command
+
+        def queue(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+            return self
+
+        return queue
+
+
+class RedisWorkQueue(WorkQueue):
+    def __init__(self, client, prefix: str = "llmq", max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> None:
+        """
+        Initialize a queue stored in Redis, shared by workers on several nodes.
+        Visible jobs are kept in a sorted set scored by the time they become
+        visible, and a lease is a key set with NX and an expiry, so a job is
+        held by at most one worker at a time without server-side scripts. Jobs
+        are enqueued in a WATCH/MULTI transaction, so a job is never visible
+        before its fields are complete.
+        :param client: Redis client (redis.Redis, LocalRedis, or any object with the same API)
+        :param prefix: str, prefix of every key
+        :param max_attempts: int, leases of a job before it is marked as failed
+        """
+        self.client = client
+        self.prefix: str = prefix
+        self.max_attempts: int = max_attempts
+        try:
+            from redis.exceptions import WatchError as RedisWatchError
+
+            self._watch_errors: tuple = (WatchError, RedisWatchError)
+        except ImportError:
+            self._watch_errors = (WatchError,)
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.prefix,) + parts)
+
+    def put(self, batch, job_id, payload) -> bool:
+        job_key = self._key("job", job_id)
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(job_key)
+                if pipe.exists(job_key):
+                    pipe.unwatch()
+                    return False
+                pipe.multi()
+                pipe.hset(job_key, mapping={"payload": json.dumps(payload), "batch": batch, "attempts": 0})
+                pipe.zadd(self._key("visible"), {job_id: time.time()})
+                pipe.execute()
+            except self._watch_errors:
+                # Another producer enqueued the same job first
+                return False
+        return True
+
+    def lease(self, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT) -> Job | None:
+        now = time.time()
+        candidates = self.client.zrangebyscore(self._key("visible"), "-inf", now, start=0, num=16)
+
+        for job_id in map(_text, candidates):
+            token = uuid.uuid4().hex
+            if not self.client.set(self._key("lease", job_id), token, nx=True, px=int(visibility_timeout * 1000)):
+                continue
+
+            job_key = self._key("job", job_id)
+            if not self.client.exists(job_key):
+                # Cancelled since it was listed
+                self.client.zrem(self._key("visible"), job_id)
+                self.client.delete(self._key("lease", job_id))
+                continue
+            attempts = int(self.client.hincrby(job_key, "attempts", 1))
+            batch = _text(self.client.hget(job_key, "batch"))
+
+            if attempts > self.max_attempts:
+                self.client.zrem(self._key("visible"), job_id)
+                self.client.hsetnx(self._key("failed", batch), job_id, "Lease expired")
+                continue
+
+            self.client.zadd(self._key("visible"), {job_id: now + visibility_timeout})
+            payload = json.loads(_text(self.client.hget(job_key, "payload")))
+            return Job(job_id, batch, payload, token, attempts)
+
+        return None
+
+    def _holds_lease(self, job: Job) -> bool:
+        return _text(self.client.get(self._key("lease", job.id))) == job.token
+
+    def extend(self, job, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT) -> bool:
+        if not self._holds_lease(job):
+            return False
+        self.client.pexpire(self._key("lease", job.id), int(visibility_timeout * 1000))
+        self.client.zadd(self._key("visible"), {job.id: time.time() + visibility_timeout})
+        return True
+
+    def complete(self, job, result) -> bool:
+        stored = bool(self.client.hsetnx(self._key("results", job.batch), job.id, result))
+        self.client.zrem(self._key("visible"), job.id)
+        if self._holds_lease(job):
+            self.client.delete(self._key("lease", job.id))
+        return stored
+
+    def fail(self, job, error) -> None:
+        if not self._holds_lease(job):
+            return
+        if not self.client.exists(self._key("job", job.id)):
+            # Cancelled while leased: dropped, never retried
+            self.client.zrem(self._key("visible"), job.id)
+        elif job.attempts >= self.max_attempts:
+            self.client.zrem(self._key("visible"), job.id)
+            self.client.hset(self._key("failed", job.batch), job.id, error)
+        else:
+            self.client.zadd(self._key("visible"), {job.id: time.time() + RETRY_DELAY})
+        self.client.delete(self._key("lease", job.id))
+
+    def cancel(self, batch, job_ids) -> int:
+        cancelled = 0
+        for job_id in job_ids:
+            if _text(self.client.hget(self._key("job", job_id), "batch")) != batch:
+                continue
+            if self.client.hget(self._key("results", batch), job_id) is not None:
+                continue
+            self.client.zrem(self._key("visible"), job_id)
+            cancelled += self.client.delete(self._key("job", job_id))
+        return cancelled
+
+    def _fields(self, key: str, job_ids) -> dict[str, str]:
+        if job_ids is None:
+            return {_text(k): _text(v) for k, v in self.client.hgetall(key).items()}
+        job_ids = list(job_ids)
+        if not job_ids:
+            return {}
+        values = self.client.hmget(key, job_ids)
+        return {job_id: _text(value) for job_id, value in zip(job_ids, values) if value is not None}
+
+    def results(self, batch, job_ids=None) -> dict[str, str]:
+        return self._fields(self._key("results", batch), job_ids)
+
+    def failures(self, batch, job_ids=None) -> dict[str, str]:
+        return self._fields(self._key("failed", batch), job_ids)
+
+
+def open_work_queue(url: str) -> WorkQueue:
+    """
+    Opens a work queue from a URL: 'sqlite:///path/to/queue.db' (or a plain
+    path) for the SQLite backend, 'redis://host:port/db' for Redis.
+
+    Args:
+        url (str): Queue URL.
+
+    Returns:
+        WorkQueue: The queue.
+    """
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("The Redis work queue needs the redis package: uv add redis") from e
+        return RedisWorkQueue(redis.Redis.from_url(url, decode_responses=True))
+
+    path = url[len("sqlite:///"):] if url.startswith("sqlite:///") else url
+    return SQLiteWorkQueue(path)
+
+
+def chunk_job_id(batch: str, text: str) -> str:
+    """
+    Builds a job id from the chunk content, so that re-enqueuing the same
+    chunk in the same batch is a no-op.
+    """
+    return f"{batch}:{hashlib.sha256(text.encode('utf-8')).hexdigest()[:24]}"
+
+
+def enqueue_chunks(queue: WorkQueue, chunks: list, batch: str | None = None, numbered: bool = False) -> tuple[str, dict]:
+    """
+    Producer side: enqueues one job per chunk. Chunk contents are released
+    once enqueued.
+
+    Args:
+        queue (WorkQueue): Queue to use.
+        chunks (list[Chunk]): Chunks to evaluate.
+        batch (str): Batch id; a stable id makes a restarted producer reuse
+            the results already stored (default: a new id).
+        numbered (bool): Whether to send the files with line numbers, for
+            compact responses (default False).
+
+    Returns:
+        tuple[str, dict]: The batch id and the chunk of every job id.
+    """
+    batch = batch or uuid.uuid4().hex
+    jobs = {}
+    for chunk in chunks:
+        text = chunk.numbered_text if numbered else chunk.text
+        job_id = chunk_job_id(batch, text)
+        queue.put(batch, job_id, {"code": text, "files": [file.path for file in chunk.files], "numbered": numbered})
+        jobs[job_id] = chunk
+        chunk.release()
+    return batch, jobs
+
+
+def collect_results(
+    queue: WorkQueue,
+    batch: str,
+    job_ids,
+    timeout: float | None = None,
+    poll_interval: float = 1.0,
+):
+    """
+    Producer side: yields the results of a batch as workers store them.
+    Every poll only looks up the jobs not collected yet.
+
+    Args:
+        queue (WorkQueue): Queue to use.
+        batch (str): Batch id.
+        job_ids (Iterable[str]): Jobs to wait for.
+        timeout (float): Seconds to wait for the whole batch (default no limit).
+        poll_interval (float): Seconds between polls.
+
+    Yields:
+        tuple[str, str]: Job id and raw LLM response.
+    """
+    pending = set(job_ids)
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    while pending:
+        for job_id, result in queue.results(batch, pending).items():
+            pending.discard(job_id)
+            yield job_id, result
+
+        failed = queue.failures(batch, pending)
+        if failed:
+            job_id = min(failed)
+            raise JobFailedError(f"Job {job_id} failed: {failed[job_id]}")
+
+        if pending:
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"{len(pending)} jobs of batch {batch} are still pending")
+            time.sleep(poll_interval)
+
+
+def process_job(queue: WorkQueue, job: Job, visibility_timeout: float, verbose: bool = False) -> None:
+    """
+    Worker side: evaluates a leased job while a heartbeat keeps its lease.
+    Numbered code needs the compact prompt and plain code the full one, so a
+    worker whose LLM_COMPACT_OUTPUT differs from the producer's fails the job.
+    """
+    from core import COMPACT_OUTPUT, send_code_to_llm
+
+    stop = threading.Event()
+
+    def heartbeat():
+        while not stop.wait(visibility_timeout / 3):
+            if not queue.extend(job, visibility_timeout):
+                logger.warning(f"Lost the lease of {job.id}")
+                return
+
+    thread = threading.Thread(target=heartbeat, daemon=True)
+    thread.start()
+    try:
+        if job.payload.get("numbered", False) != COMPACT_OUTPUT:
+            raise ValueError("LLM_COMPACT_OUTPUT differs between the producer and this worker")
+        response = send_code_to_llm(job.payload["code"], verbose)
+        if not queue.complete(job, response):
+            logger.info(f"{job.id} was already completed by another worker")
+    except Exception as e:
+        logger.warning(f"{job.id} failed on attempt {job.attempts}: {e}")
+        queue.fail(job, str(e))
+    finally:
+        stop.set()
+
+
+def run_worker(
+    url: str,
+    visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT,
+    idle_exit: float = 0.0,
+    poll_interval: float = 1.0,
+    verbose: bool = False,
+) -> int:
+    """
+    Worker loop: leases and evaluates jobs until idle for idle_exit seconds
+    (forever if 0).
+
+    Returns:
+        int: Number of jobs processed.
+    """
+    from core import warmup_evaluators
+
+    # Clients are built once per worker process, before the first lease
+    warmup_evaluators(verbose)
+
+    queue = open_work_queue(url)
+    processed = 0
+    idle_since = time.monotonic()
+
+    while True:
+        job = queue.lease(visibility_timeout)
+        if job is None:
+            if idle_exit and time.monotonic() - idle_since > idle_exit:
+                return processed
+            time.sleep(poll_interval)
+            continue
+
+        process_job(queue, job, visibility_timeout, verbose)
+        processed += 1
+        idle_since = time.monotonic()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run LLM evaluation workers on a work queue.")
+    parser.add_argument("--queue", default=os.getenv("LLM_WORK_QUEUE"), help="Queue URL (sqlite:///file.db or redis://host:port/db).")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes on this node.")
+    parser.add_argument("--visibility-timeout", type=float, default=DEFAULT_VISIBILITY_TIMEOUT, help="Lease duration in seconds.")
+    parser.add_argument("--idle-exit", type=float, default=0.0, help="Exit after this many idle seconds (0 runs forever).")
+    parser.add_argument("--verbose", action="store_true", help="Log LLM calls.")
+    args = parser.parse_args(argv)
+
+    if not args.queue:
+        parser.error("no queue given (--queue or LLM_WORK_QUEUE)")
+
+    worker_args = (args.queue, args.visibility_timeout, args.idle_exit, 1.0, args.verbose)
+    if args.processes == 1:
+        run_worker(*worker_args)
+        return 0
+
+    context = multiprocessing.get_context()
+    processes = [context.Process(target=run_worker, args=worker_args) for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
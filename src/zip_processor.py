@@ -1,21 +1,89 @@
+import io
+import os
+import threading
 import zipfile
 import logging
+from functools import partial
+from typing import BinaryIO
 from file import File
 
+# Limits applied to every archive before anything is decompressed. Members
+# are read lazily, so the compressed size only bounds the upload and the
+# central directory scan; scans set it with LLM_MAX_ARCHIVE_SIZE (see core.py)
+MAX_ARCHIVE_SIZE = 2 * 1024 * 1024 * 1024  # compressed bytes
+MAX_MEMBERS = 100_000
+MAX_FILE_SIZE = 20 * 1024 * 1024  # uncompressed bytes per extracted file
+MAX_TOTAL_SIZE = 512 * 1024 * 1024  # uncompressed bytes over extracted files
+MAX_COMPRESSION_RATIO = 100
+
+READ_BLOCK_SIZE = 64 * 1024
+
+
+class UnsafeZipError(ValueError):
+    """Raised when an archive exceeds the configured size, member or ratio limits."""
+
 
 class ZipFileProcessor:
     def __init__(
         self,
-        zip_file_path: str,
+        zip_file_path: str | bytes | BinaryIO,
         logger: logging.Logger | None = None,
+        max_archive_size: int = MAX_ARCHIVE_SIZE,
+        max_members: int = MAX_MEMBERS,
+        max_file_size: int = MAX_FILE_SIZE,
+        max_total_size: int = MAX_TOTAL_SIZE,
+        max_compression_ratio: float = MAX_COMPRESSION_RATIO,
     ) -> None:
         """
-        Initialize the ZipFileProcessor with a local zip file and an optional logger.
-        :param zip_file_path: str, path to the local zip file
+        Initialize the ZipFileProcessor with a zip archive and an optional logger.
+        The archive is read in place: a path is opened directly, and bytes or a
+        seekable binary file object are read from memory, without temporary copies.
+        :param zip_file_path: str path, bytes or binary file object of the zip archive
         :param logger: logging.Logger, optional logger for logging messages
+        :param max_archive_size: int, maximum compressed archive size in bytes
+        :param max_members: int, maximum number of members in the archive
+        :param max_file_size: int, maximum uncompressed size of an extracted file
+        :param max_total_size: int, maximum uncompressed size of all extracted files
+        :param max_compression_ratio: float, maximum uncompressed/compressed ratio per file
         """
-        self.zip_file_path: str = zip_file_path
+        if isinstance(zip_file_path, (bytes, bytearray, memoryview)):
+            zip_file_path = io.BytesIO(zip_file_path)
+
+        self.zip_file_path: str | BinaryIO = zip_file_path
         self.logger: logging.Logger | None = logger
+        self.max_archive_size: int = max_archive_size
+        self.max_members: int = max_members
+        self.max_file_size: int = max_file_size
+        self.max_total_size: int = max_total_size
+        self.max_compression_ratio: float = max_compression_ratio
+        self._zip_ref: zipfile.ZipFile | None = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _open(self) -> zipfile.ZipFile:
+        """
+        Get the archive handle, opened once and shared by the lazy file loaders.
+        :return: zipfile.ZipFile, open archive
+        """
+        with self._lock:
+            if self._zip_ref is None:
+                self._zip_ref = zipfile.ZipFile(self.zip_file_path, "r")
+            return self._zip_ref
+
+    def close(self) -> None:
+        """
+        Close the archive handle. Lazy files loaded afterwards reopen the
+        archive for the duration of their read only.
+        """
+        with self._lock:
+            if self._zip_ref is not None:
+                self._zip_ref.close()
+                self._zip_ref = None
 
     def _log(self, message: str) -> None:
         """
@@ -27,66 +95,179 @@ class ZipFileProcessor:
         else:
             print(message)
 
+    def _archive_size(self) -> int:
+        """
+        Get the compressed size of the archive.
+        :return: int, size in bytes
+        """
+        if isinstance(self.zip_file_path, str):
+            return os.path.getsize(self.zip_file_path)
+
+        position = self.zip_file_path.tell()
+        size = self.zip_file_path.seek(0, os.SEEK_END)
+        self.zip_file_path.seek(position)
+        return size
+
+    def _check_limits(self, zip_ref: zipfile.ZipFile, selected: list[zipfile.ZipInfo]) -> None:
+        """
+        Check the archive against the limits using only the central directory,
+        before any member is decompressed.
+        :param zip_ref: zipfile.ZipFile, open archive
+        :param selected: list of ZipInfo, members that will be extracted
+        """
+        archive_size = self._archive_size()
+        if archive_size > self.max_archive_size:
+            raise UnsafeZipError(
+                f"Archive is {archive_size} bytes, limit is {self.max_archive_size}"
+            )
+
+        member_count = len(zip_ref.infolist())
+        if member_count > self.max_members:
+            raise UnsafeZipError(
+                f"Archive has {member_count} members, limit is {self.max_members}"
+            )
+
+        total_size = 0
+        for info in selected:
+            if info.file_size > self.max_file_size:
+                raise UnsafeZipError(
+                    f"{info.filename} is {info.file_size} bytes, limit is {self.max_file_size}"
+                )
+            if info.file_size > self.max_compression_ratio * max(info.compress_size, 1):
+                raise UnsafeZipError(
+                    f"{info.filename} has a compression ratio above {self.max_compression_ratio}"
+                )
+            total_size += info.file_size
+
+        if total_size > self.max_total_size:
+            raise UnsafeZipError(
+                f"Extracted files total {total_size} bytes, limit is {self.max_total_size}"
+            )
+
+    def _read_member(self, zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo) -> bytes:
+        """
+        Decompress a member while enforcing its declared size, since the sizes
+        stored in the central directory can be forged.
+        :param zip_ref: zipfile.ZipFile, open archive
+        :param info: ZipInfo, member to read
+        :return: bytes, member content
+        """
+        limit = min(info.file_size, self.max_file_size)
+        chunks = []
+        size = 0
+
+        with zip_ref.open(info) as file:
+            while block := file.read(READ_BLOCK_SIZE):
+                size += len(block)
+                if size > limit:
+                    raise UnsafeZipError(
+                        f"{info.filename} decompresses beyond its declared size"
+                    )
+                chunks.append(block)
+
+        return b"".join(chunks)
+
+    def _select_members(
+        self, zip_ref: zipfile.ZipFile, allowed_extensions: list[str], verbose: bool
+    ) -> list[zipfile.ZipInfo]:
+        """
+        Select the archive members with an allowed extension.
+        :param zip_ref: zipfile.ZipFile, open archive
+        :param allowed_extensions: list of allowed file extensions, without dots
+        :param verbose: bool, if True, print the file paths
+        :return: list of ZipInfo to extract
+        """
+        selected: list[zipfile.ZipInfo] = []
+
+        for info in zip_ref.infolist():
+            file_path = info.filename
+
+            if info.is_dir() or file_path.startswith("__MACOSX"):
+                continue
+
+            # Check if the file has an allowed extension
+            file_extension: str = (
+                file_path.split(".")[-1] if "." in file_path else ""
+            )
+
+            if allowed_extensions and file_extension not in allowed_extensions:
+                continue
+
+            if verbose:
+                self._log(f"File path: {file_path}")
+
+            selected.append(info)
+
+        return selected
+
+    def _load_member(self, info: zipfile.ZipInfo) -> bytes:
+        """
+        Loader used by lazy File objects.
+        :param info: ZipInfo, member to read
+        :return: bytes, member content
+        """
+        with self._lock:
+            zip_ref = self._zip_ref
+        if zip_ref is None:
+            with zipfile.ZipFile(self.zip_file_path, "r") as zip_ref:
+                return self._read_member(zip_ref, info)
+        return self._read_member(zip_ref, info)
+
     def get_all_files(
         self,
         allowed_extensions: list[str] | None = None,
         verbose: bool = False,
+        lazy: bool = True,
     ) -> list[File]:
         """
-        Extract all files from the local zip file and filter by allowed extensions.
+        List all files from the zip archive and filter by allowed extensions.
+        The archive is checked against the limits first. By default the files
+        are lazy: each member is decompressed when its content is first used.
         :param allowed_extensions: list of allowed file extensions
         :param verbose: bool, if True, print the file paths
+        :param lazy: bool, if False, decompress every file content now
         :return: list of filtered File objects
         """
-        if allowed_extensions is None:
-            allowed_extensions = []
-
-        for i, ext in enumerate(allowed_extensions):
-            allowed_extensions[i] = ext.lstrip(".")
+        allowed_extensions = [ext.lstrip(".") for ext in allowed_extensions or []]
 
-        file_objects: list[File] = []
+        zip_ref = self._open()
+        selected = self._select_members(zip_ref, allowed_extensions, verbose)
 
-        with zipfile.ZipFile(self.zip_file_path, "r") as zip_ref:
-            # List all files in the zip archive
-            files = zip_ref.namelist()
-
-            for file_path in files:
-                # Check if the file has an allowed extension
-                file_extension: str = (
-                    file_path.split(".")[-1] if "." in file_path else ""
-                )
+        if verbose:
+            self._log(f"Found {len(selected)} files in zip: {self.zip_file_path}")
 
-                if file_path.startswith("__MACOSX"):
-                    continue
+        self._check_limits(zip_ref, selected)
 
-                if allowed_extensions and file_extension not in allowed_extensions:
-                    continue
+        file_objects: list[File] = [
+            File(
+                path=info.filename,
+                extension=info.filename.split(".")[-1] if "." in info.filename else "",
+                loader=partial(self._load_member, info),
+            )
+            for info in selected
+        ]
 
+        if not lazy:
+            for file in file_objects:
+                file.content
                 if verbose:
-                    self._log(f"File path: {file_path}")
-
-                file_objects.append(File(path=file_path, extension=file_extension))
-
-        if verbose:
-            self._log(f"Found {len(file_objects)} files in zip: {self.zip_file_path}")
-
-        for file in file_objects:
-            file.content = self.get_file_content(file.path, verbose=verbose)
+                    self._log(f"Fetched content from file {file.path}")
 
         return file_objects
 
     def get_file_content(self, file_path: str, verbose: bool = False) -> str:
         """
-        Get the content of a file from the local zip file.
+        Get the content of a file from the zip archive.
         :param file_path: str, path to the file in the zip
         :param verbose: bool, if True, print the file content
         :return: str, content of the file
         """
-        with zipfile.ZipFile(self.zip_file_path, "r") as zip_ref:
-            with zip_ref.open(file_path) as file:
-                content = file.read().decode("utf-8")
+        zip_ref = self._open()
+        info = zip_ref.getinfo(file_path)
+        self._check_limits(zip_ref, [info])
+        content = self._read_member(zip_ref, info).decode("utf-8")
 
-                if verbose:
-                    self._log(f"Fetched content from file {file_path}")
+        if verbose:
+            self._log(f"Fetched content from file {file_path}")
 
-                return content
+        return content
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modules in src/ import each other by their top-level names
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
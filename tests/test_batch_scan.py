@@ -0,0 +1,101 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import pytest
+
+for module in ("pandas", "PyPDF2", "langchain_google_genai", "google.generativeai"):
+    pytest.importorskip(module)
+
+import batch_scan  # noqa: E402
+import core  # noqa: E402
+
+
+@pytest.fixture
+def stub_scans(monkeypatch):
+    """
+    Run projects in threads of this process, against the stub model, and
+    record the scanned targets.
+    """
+    scanned = []
+    scan_project = batch_scan.scan_project
+
+    def recording_scan(target, *args):
+        scanned.append(target)
+        return scan_project(target, *args)
+
+    monkeypatch.setattr(batch_scan, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(batch_scan, "scan_project", recording_scan)
+    monkeypatch.setattr(core, "warmup_evaluators", lambda verbose=True: [])
+    monkeypatch.setattr(core, "get_evaluator", lambda: core.build_model_evaluator("stub"))
+    return scanned
+
+
+@pytest.fixture
+def project(tmp_path):
+    directory = tmp_path / "project"
+    directory.mkdir()
+    (directory / "app.py").write_text("import os\nos.system(input())\n")
+    return str(directory)
+
+
+def test_run_batch_skips_done_and_failed_projects(tmp_path, project, stub_scans):
+    out = str(tmp_path / "out")
+    missing = str(tmp_path / "missing.zip")
+
+    summary = batch_scan.run_batch([project, missing], out, workers=1)
+    assert (summary["done"], summary["failed"], summary["pending"]) == (1, 1, 0)
+    assert stub_scans == [project, missing]
+
+    batch_scan.run_batch([project, missing], out, workers=1)
+    assert stub_scans == [project, missing]
+
+    batch_scan.run_batch([project, missing], out, workers=1, retry_failed=True)
+    assert stub_scans == [project, missing, missing]
+
+
+def test_write_summary_reports_projects_without_status_as_pending(tmp_path, project):
+    out = tmp_path / "out"
+    report_dir = out / batch_scan.report_dir_name(project)
+    report_dir.mkdir(parents=True)
+    batch_scan.write_json_atomic(
+        str(report_dir / batch_scan.STATUS_FILE),
+        {"target": project, "status": "done", "findings": 2, "seconds": 1.5, "traceback": "x"},
+    )
+
+    summary = batch_scan.write_summary(str(out), [project, "owner/repo"])
+    assert (summary["done"], summary["pending"], summary["findings"]) == (1, 1, 2)
+    assert "traceback" not in summary["results"][0]
+    assert json.loads((out / batch_scan.SUMMARY_FILE).read_text()) == summary
+
+
+def test_scan_project_closes_archive_when_setup_fails(tmp_path, monkeypatch):
+    archive = tmp_path / "project.zip"
+    archive.write_bytes(b"")
+    closed = []
+
+    @contextmanager
+    def open_zip_files(path, verbose):
+        try:
+            yield []
+        finally:
+            closed.append(path)
+
+    def get_evaluator():
+        raise RuntimeError("no backend")
+
+    write_json_atomic = batch_scan.write_json_atomic
+    closed_at_status = []
+
+    def write_status(path, data):
+        closed_at_status.append(list(closed))
+        write_json_atomic(path, data)
+
+    monkeypatch.setattr(core, "open_zip_files", open_zip_files)
+    monkeypatch.setattr(core, "get_evaluator", get_evaluator)
+    monkeypatch.setattr(batch_scan, "write_json_atomic", write_status)
+
+    status = batch_scan.scan_project(str(archive), str(tmp_path / "report"))
+    assert status["status"] == "failed" and "no backend" in status["error"]
+    # Closed by the scan itself, not later by garbage collection
+    assert closed_at_status == [[str(archive)]]
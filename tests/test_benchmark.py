@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+for module in ("pandas", "PyPDF2", "langchain_google_genai", "google.generativeai"):
+    pytest.importorskip(module)
+
+import benchmark  # noqa: E402
+
+
+def measurement(items_per_second: float, relative_speed: float | None, peak_memory_mb: float = 10.0) -> dict:
+    result = {"items_per_second": items_per_second, "peak_memory_mb": peak_memory_mb}
+    if relative_speed is not None:
+        result["relative_speed"] = relative_speed
+    return result
+
+
+def test_calibrated_speed_ignores_machine_speed():
+    baseline = {"case": measurement(1000, 0.01)}
+    # Twice slower machine, same speed relative to the calibration loop
+    assert benchmark.compare_to_baseline({"case": measurement(500, 0.01)}, baseline) == []
+    assert benchmark.compare_to_baseline({"case": measurement(1000, 0.005)}, baseline)
+
+
+def test_uncalibrated_baseline_falls_back_to_throughput():
+    baseline = {"case": measurement(1000, None)}
+    assert benchmark.compare_to_baseline({"case": measurement(900, 0.01)}, baseline) == []
+    assert benchmark.compare_to_baseline({"case": measurement(500, 0.01)}, baseline)
+
+
+def test_memory_regression_and_unknown_cases():
+    baseline = {"case": measurement(1000, 0.01, peak_memory_mb=10)}
+    assert benchmark.compare_to_baseline({"case": measurement(1000, 0.01, peak_memory_mb=20)}, baseline)
+    assert benchmark.compare_to_baseline({"new": measurement(1, 0.0001)}, baseline) == []
+
+
+def test_calibrate_is_positive():
+    assert benchmark.calibrate(repeat=1) > 0
+
+
+def test_missing_baseline_fails_before_running(tmp_path, monkeypatch):
+    monkeypatch.setattr(benchmark, "run_benchmarks", lambda **kwargs: pytest.fail("benchmarks ran"))
+    assert benchmark.main(["--baseline", str(tmp_path / "missing.json")]) == 1
+
+
+def test_regressions_are_confirmed_by_running_the_group_again(tmp_path, monkeypatch):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"slow": measurement(1000, 0.01), "fast": measurement(1000, 0.01)}))
+    runs = []
+
+    def run_benchmarks(only=None, quick=False):
+        runs.append(only)
+        # The first run hits a slow moment of the machine
+        speed = 0.005 if len(runs) == 1 else 0.01
+        return {
+            "slow": {**measurement(1000, speed), "seconds": 1.0, "group": "noisy"},
+            "fast": {**measurement(1000, 0.01), "seconds": 1.0, "group": "steady"},
+        }
+
+    monkeypatch.setattr(benchmark, "run_benchmarks", run_benchmarks)
+    assert benchmark.main(["--baseline", str(baseline)]) == 0
+    assert runs == [None, ["noisy"]]
+
+
+def test_confirmed_regression_fails(tmp_path, monkeypatch):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"slow": measurement(1000, 0.01)}))
+    runs = []
+
+    def run_benchmarks(only=None, quick=False):
+        runs.append(only)
+        return {"slow": {**measurement(1000, 0.005), "seconds": 1.0, "group": "noisy"}}
+
+    monkeypatch.setattr(benchmark, "run_benchmarks", run_benchmarks)
+    assert benchmark.main(["--baseline", str(baseline)]) == 1
+    assert len(runs) == 1 + benchmark.CONFIRM_RUNS
+
+
+def test_baseline_keeps_the_median_run(tmp_path, monkeypatch):
+    baseline = tmp_path / "baseline.json"
+    speeds = iter([0.02, 0.01, 0.012])
+
+    def run_benchmarks(only=None, quick=False):
+        return {"case": {**measurement(1000, next(speeds)), "seconds": 1.0, "group": "group"}}
+
+    monkeypatch.setattr(benchmark, "run_benchmarks", run_benchmarks)
+    assert benchmark.main(["--update-baseline", "--baseline", str(baseline)]) == 0
+    assert json.loads(baseline.read_text())["case"]["relative_speed"] == 0.012
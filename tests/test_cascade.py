@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from cascade import (
+    ModelCascade,
+    ModelTier,
+    call_evaluator,
+    default_escalation_policy,
+    json_escalation_policy,
+)
+
+LOW = "<Issues>\n<Issue><Severity>Low</Severity></Issue>\n</Issues>"
+HIGH = "<Issues>\n<Issue><Severity>High</Severity></Issue>\n</Issues>"
+
+
+class FixedEvaluator:
+    def __init__(self, response: str, usage: dict | None = None) -> None:
+        self.model = "fixed"
+        self.system_prompt = "{code_snippet}"
+        self.response = response
+        self.usage = usage or {}
+        self.calls = 0
+
+    def call(self, input_variables, max_output_tokens=None):
+        self.calls += 1
+        return self.response, dict(self.usage), "stop"
+
+
+class LegacyEvaluator:
+    model = "legacy"
+    system_prompt = "{code_snippet}"
+
+    def evaluate(self, input_variables):
+        self.last_usage = {"prompt_tokens": 7, "output_tokens": 3}
+        return "ok"
+
+
+def test_default_escalation_policy():
+    assert not default_escalation_policy(LOW)
+    assert not default_escalation_policy("<Issues>\n</Issues>")
+    assert default_escalation_policy(HIGH)
+    assert default_escalation_policy("<Issues>\n<Issue><Severity>Low")
+    assert default_escalation_policy("no issues")
+
+
+def test_json_escalation_policy():
+    assert not json_escalation_policy(json.dumps([{"Severity": "Low"}]))
+    assert json_escalation_policy(json.dumps([{"Severity": "Critical"}]))
+    assert json_escalation_policy('[{"Severity": "Low"}, {"Sev')
+    assert json_escalation_policy("nothing")
+
+
+@pytest.mark.parametrize("triage, calls", [(LOW, 0), (HIGH, 1)])
+def test_cascade_escalates_only_when_needed(triage, calls):
+    cheap, strong = FixedEvaluator(triage, {"prompt_tokens": 10, "output_tokens": 2}), FixedEvaluator(HIGH)
+    cascade = ModelCascade([ModelTier("cheap", cheap), ModelTier("strong", strong)])
+    response, usage, _ = cascade.call({"code_snippet": "code"})
+
+    assert strong.calls == calls
+    assert response == (HIGH if calls else LOW)
+    # The strong tier reports no usage, so its prompt ("code") is estimated as 1 token
+    assert usage["prompt_tokens"] == 10 + calls
+    assert cascade.stats[0]["escalations"] == calls
+
+
+def test_call_evaluator_falls_back_to_last_usage():
+    assert call_evaluator(LegacyEvaluator(), {"code_snippet": "x"}) == ("ok", {"prompt_tokens": 7, "output_tokens": 3}, None)
+
+
+def test_cascade_needs_a_tier():
+    with pytest.raises(ValueError):
+        ModelCascade([])
@@ -0,0 +1,64 @@
+from diff_scanner import DiffScan, context_windows, parse_unified_diff
+
+BASE = "".join(f"line {i}\n" for i in range(1, 31))
+
+DIFF = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -4,3 +4,4 @@
+ line 4
+-line 5
++query = "SELECT * FROM t WHERE id = " + user_id
++cursor.execute(query)
+ line 6
+@@ -20,2 +21,2 @@
+ line 20
+-line 21
++line twenty-one
+--- /dev/null
++++ b/new.py
+@@ -0,0 +1,2 @@
++import os
++os.system(cmd)
+"""
+
+
+def test_parse_unified_diff():
+    patches = parse_unified_diff(DIFF)
+    assert [(patch.old_path, patch.new_path) for patch in patches] == [("app.py", "app.py"), (None, "new.py")]
+    first, second = patches[0].hunks
+    assert (first.old_start, first.old_length, first.new_start, first.new_length) == (4, 3, 4, 4)
+    assert first.changed_lines() == [5, 6]
+    assert second.changed_lines() == [22]
+
+
+def test_apply_rebuilds_new_side():
+    patch = parse_unified_diff(DIFF)[0]
+    lines = patch.apply(BASE)
+    assert len(lines) == 31
+    assert lines[4:6] == ['query = "SELECT * FROM t WHERE id = " + user_id', "cursor.execute(query)"]
+    assert lines[6] == "line 6"
+    assert lines[21] == "line twenty-one"
+    assert lines[30] == "line 30"
+
+
+def test_apply_added_file_and_missing_base():
+    patches = parse_unified_diff(DIFF)
+    assert patches[1].apply("") == ["import os", "os.system(cmd)"]
+    lines = patches[0].apply(None)
+    assert lines[4] == 'query = "SELECT * FROM t WHERE id = " + user_id'
+    assert lines[0] == ""
+
+
+def test_context_windows_merge():
+    assert context_windows([5, 6, 22], 31, 3) == [(2, 9), (19, 25)]
+    assert context_windows([5, 10], 31, 3) == [(2, 13)]
+
+
+def test_locate_finding_in_window():
+    scan = DiffScan(parse_unified_diff(DIFF), {"app.py": BASE}, context=2)
+    assert scan.locate("app.py (lines 3-8)", "cursor.execute( query )") == ("app.py", 6, 6)
+    path, start, end = scan.locate("app.py", "eval(something_else_entirely)")
+    assert (path, start, end) == ("app.py", None, None)
+    assert scan.touches_change("app.py", 5, 6)
+    assert not scan.touches_change("app.py", 10, 12)
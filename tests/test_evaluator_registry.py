@@ -0,0 +1,45 @@
+import threading
+
+from evaluator_registry import EvaluatorRegistry
+
+
+class Client:
+    def __init__(self, key) -> None:
+        self.key = key
+        self.warmed = False
+
+    def warmup(self) -> None:
+        if self.key == "broken":
+            raise ConnectionError("unreachable")
+        self.warmed = True
+
+
+def test_builds_once_per_key_across_threads():
+    built = []
+    registry = EvaluatorRegistry(lambda key: built.append(key) or Client(key))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("m"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert built == ["m"]
+    assert all(result is results[0] for result in results)
+    assert "m" in registry and len(registry) == 1
+
+
+def test_reset_rebuilds():
+    registry = EvaluatorRegistry(Client)
+    first = registry.get("m")
+    registry.reset()
+    assert len(registry) == 0
+    assert registry.get("m") is not first
+
+
+def test_warmup_reports_each_backend():
+    registry = EvaluatorRegistry(Client)
+    report = registry.warmup(["a", "broken"])
+    assert [(status["key"], status["ok"]) for status in report] == [("a", True), ("broken", False)]
+    assert registry.get("a").warmed
+    assert report[1]["error"] == "unreachable"
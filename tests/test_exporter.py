@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from exporter import FindingsWriter, JsonlFindingsWriter, RegionResolver, SarifFindingsWriter
+from file import File
+
+SOURCE = "import os\n\ncmd = input()\nos.system(cmd)\n"
+
+FINDINGS = [
+    {"Weakness": "CWE-78", "Severity": "High", "File": "app.py", "Code": "os.system(cmd)", "Description": "Command injection"},
+    {"Weakness": "CWE-89", "Severity": "Low", "File": "app.py", "Code": "cursor.execute(sql % user)"},
+]
+
+
+def test_resolver_indexes_lazily():
+    loads = []
+    file = File(path="src/app.py", loader=lambda: loads.append(1) or SOURCE)
+    resolver = RegionResolver([file])
+    assert loads == []
+    assert resolver.resolve("app.py", "os.system(cmd)") == ("src/app.py", 4, 4)
+    assert resolver.resolve("app.py", "eval(x)") == ("src/app.py", None, None)
+    assert len(loads) == 1 and not file.loaded
+
+
+def test_resolver_indexes_added_files_once():
+    file = File(path="src/app.py", content=SOURCE)
+    resolver = RegionResolver([file])
+    resolver.add([file])
+    resolver.add([file])
+    assert len(resolver.index) == 1
+
+
+def test_jsonl_writer_flags_hallucinations(tmp_path):
+    path = tmp_path / "findings.jsonl"
+    with JsonlFindingsWriter(str(path), RegionResolver([File(path="src/app.py", content=SOURCE)])) as writer:
+        writer.write(FINDINGS)
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(r["Path"], r["Start Line"], r["Hallucinated"]) for r in records] == [
+        ("src/app.py", 4, False),
+        ("src/app.py", None, True),
+    ]
+
+
+def test_sarif_writer_streams_valid_document(tmp_path):
+    path = tmp_path / "findings.sarif"
+    with SarifFindingsWriter(str(path), RegionResolver([File(path="src/app.py", content=SOURCE)])) as writer:
+        writer.write(FINDINGS[:1])
+        writer.write(FINDINGS[1:])
+    sarif = json.loads(path.read_text())
+    run = sarif["runs"][0]
+    assert sarif["version"] == "2.1.0"
+    assert [result["level"] for result in run["results"]] == ["error", "note"]
+    region = run["results"][0]["locations"][0]["physicalLocation"]["region"]
+    assert (region["startLine"], region["endLine"]) == (4, 4)
+    assert [rule["id"] for rule in run["tool"]["driver"]["rules"]] == ["CWE-78", "CWE-89"]
+
+
+def test_findings_writer_is_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        FindingsWriter(str(tmp_path / "out"))
@@ -0,0 +1,78 @@
+from file import File
+
+
+def counting_loader(content, loads: list):
+    def load():
+        loads.append(1)
+        return content
+    return load
+
+
+def test_content_is_loaded_on_first_access():
+    loads = []
+    file = File(path="a.py", loader=counting_loader(b"x = 1\n", loads))
+    assert not file.loaded and loads == []
+    assert file.content == "x = 1\n"
+    assert file.content == "x = 1\n"
+    assert loads == [1]
+
+
+def test_size_is_in_characters_whatever_the_load_state():
+    loads = []
+    file = File(path="a.py", loader=counting_loader("é = 'ü'\n".encode("utf-8"), loads))
+    assert file.size == 8
+    assert not file.loaded
+    file.content
+    file.release()
+    assert file.size == 8 and len(loads) == 2
+
+
+def test_keep_loaded_content_is_not_released():
+    loads = []
+    file = File(path="a.py", loader=counting_loader("x", loads), keep_loaded=True)
+    assert file.derive("length", len) == 1
+    file.release()
+    assert file.loaded and file.content == "x" and len(loads) == 1
+
+
+def test_release_and_reload():
+    loads = []
+    file = File(path="a.py", loader=counting_loader("x", loads))
+    file.content
+    file.release()
+    assert not file.loaded
+    assert file.content == "x"
+    assert len(loads) == 2
+
+
+def test_release_keeps_content_without_loader():
+    file = File(path="a.py", content="x")
+    file.release()
+    assert file.content == "x"
+
+
+def test_derive_is_cached_and_releases_only_what_it_loaded():
+    loads = []
+    lazy = File(path="a.py", loader=counting_loader("abc", loads))
+    assert lazy.derive("length", len) == 3
+    assert not lazy.loaded
+    assert lazy.derive("length", lambda content: 0) == 3
+    assert lazy.has_derived("length") and len(loads) == 1
+
+    loaded = File(path="b.py", loader=counting_loader("abcd", loads))
+    loaded.content
+    assert loaded.derive("length", len) == 4
+    assert loaded.loaded
+
+
+def test_content_hash_resets_when_content_changes():
+    file = File(path="a.py", content="x")
+    first = file.content_hash
+    file.content = "y"
+    assert file.content_hash != first
+    assert file.size == 1
+
+
+def test_repr_does_not_include_content():
+    file = File(path="a.py", extension="py", content="secret" * 1000)
+    assert "secret" not in repr(file)
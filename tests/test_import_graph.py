@@ -0,0 +1,64 @@
+from file import File
+from import_graph import ImportGraph, build_graph_chunks
+
+
+def py(path: str, content: str = "") -> File:
+    return File(path=path, extension="py", content=content)
+
+
+def neighbors(graph: ImportGraph, path: str) -> set[str]:
+    node = next(node for node, file in enumerate(graph.files) if file.path == path)
+    return {graph.files[neighbor].path for neighbor in graph.edges[node]}
+
+
+def test_relative_and_package_imports():
+    graph = ImportGraph([
+        py("pkg/__init__.py"),
+        py("pkg/a.py", "from . import b\nfrom .sub import c\n"),
+        py("pkg/sub/__init__.py"),
+        py("pkg/b.py"),
+    ])
+    assert neighbors(graph, "pkg/a.py") == {"pkg/__init__.py", "pkg/sub/__init__.py"}
+
+
+def test_common_name_links_to_closest_match():
+    graph = ImportGraph([
+        py("app/utils.py"),
+        py("app/views.py", "import utils\n"),
+        py("lib/utils.py"),
+        py("lib/deep/utils.py"),
+    ])
+    assert neighbors(graph, "app/views.py") == {"app/utils.py"}
+
+
+def test_javascript_relative_import():
+    graph = ImportGraph([
+        File(path="web/app.js", extension="js", content="import x from './lib/util';\nimport react from 'react';\n"),
+        File(path="web/lib/util.js", extension="js", content=""),
+    ])
+    assert neighbors(graph, "web/app.js") == {"web/lib/util.js"}
+
+
+def test_duplicate_paths_are_kept():
+    files = [py("a.py", "import b\n"), py("b.py"), py("a.py", "x = 1\n")]
+    graph = ImportGraph(files)
+    assert len(graph.files) == 3
+    communities = graph.communities()
+    assert sorted(node for community in communities for node in community) == [0, 1, 2]
+
+
+def test_chunks_group_imports_and_cover_every_file_once():
+    files = [
+        py("a/one.py", "import two\n" + "x = 1\n" * 20),
+        py("a/two.py", "y = 2\n" * 20),
+        py("b/three.py", "import four\n" + "z = 3\n" * 20),
+        py("b/four.py", "w = 4\n" * 20),
+        py("a/one.py", "dup = 1\n"),
+    ]
+    chunks = build_graph_chunks(files, max_chars=400)
+    packed = [file for chunk in chunks for file in chunk.files]
+    assert sorted(map(id, packed)) == sorted(map(id, files))
+
+    chunk_of = {id(file): i for i, chunk in enumerate(chunks) for file in chunk.files}
+    assert chunk_of[id(files[0])] == chunk_of[id(files[1])]
+    assert chunk_of[id(files[2])] == chunk_of[id(files[3])]
@@ -0,0 +1,142 @@
+import json
+
+from file import File
+from chunker import Chunk
+from output_control import (
+    CONTINUATION_STANDARD,
+    ContinuationEvaluator,
+    complete_issues,
+    expand_line_ranges,
+    output_budget,
+    split_code_files,
+    unfinished_files,
+    MAX_OUTPUT_TOKENS,
+    MIN_OUTPUT_TOKENS,
+)
+
+
+def xml_issue(weakness: str, code: str, file: str = "a.py") -> str:
+    return f"<Issue><Weakness>{weakness}</Weakness><File>{file}</File><Code>{code}</Code></Issue>"
+
+
+class ScriptedEvaluator:
+    def __init__(self, responses: list[tuple[str, str]]) -> None:
+        self.model = "scripted"
+        self.system_prompt = "{standard} {code_snippet}"
+        self.responses = list(responses)
+        self.requests = []
+
+    def call(self, input_variables, max_output_tokens=None):
+        self.requests.append((input_variables, max_output_tokens))
+        response, finish_reason = self.responses.pop(0)
+        return response, {"prompt_tokens": 10, "output_tokens": 5}, finish_reason
+
+
+def test_output_budget_is_bounded():
+    assert output_budget("") == MIN_OUTPUT_TOKENS
+    assert output_budget("x" * 10_000_000) == MAX_OUTPUT_TOKENS
+    assert output_budget("x" * 40_000, compact=True) < output_budget("x" * 40_000)
+
+
+def test_complete_issues_xml():
+    full = "<Issues>\n" + xml_issue("CWE-1", "a") + "\n</Issues>"
+    assert complete_issues(full) == ([xml_issue("CWE-1", "a")], False)
+
+    cut = "<Issues>\n" + xml_issue("CWE-1", "a") + "\n<Issue><Weakness>CWE-2</Weak"
+    blocks, truncated = complete_issues(cut)
+    assert blocks == [xml_issue("CWE-1", "a")] and truncated
+
+    blocks, truncated = complete_issues("<Issues>\n" + xml_issue("CWE-1", "a"))
+    assert len(blocks) == 1 and truncated
+
+
+def test_complete_issues_json():
+    text = json.dumps([{"Weakness": "CWE-1"}, {"Weakness": "CWE-2"}])
+    assert complete_issues(text, structured=True) == ([{"Weakness": "CWE-1"}, {"Weakness": "CWE-2"}], False)
+    items, truncated = complete_issues(text[:-10], structured=True)
+    assert items == [{"Weakness": "CWE-1"}] and truncated
+
+
+def test_continuation_merges_parts_without_duplicates():
+    first = "<Issues>\n" + xml_issue("CWE-1", "a") + "\n<Issue><Weakness>CWE-2"
+    second = "<Issues>\n" + xml_issue("CWE-1", "a") + "\n" + xml_issue("CWE-2", "b") + "\n</Issues>"
+    llm = ScriptedEvaluator([(first, "length"), (second, "stop")])
+    evaluator = ContinuationEvaluator(llm)
+
+    response, usage, finish_reason = evaluator.call({"standard": "", "code_snippet": "code"})
+    assert complete_issues(response) == ([xml_issue("CWE-1", "a"), xml_issue("CWE-2", "b")], False)
+    assert usage == {"prompt_tokens": 20, "output_tokens": 10}
+    assert finish_reason == "stop"
+    assert "CWE-1 in a.py" in llm.requests[1][0]["code_snippet"]
+    assert evaluator.metrics()["recovered_issues"] == 1
+
+
+def three_files() -> str:
+    return Chunk([File(path=f"src/{name}.py", content=f"{name} = 1\n" * 50) for name in "abc"]).text
+
+
+def test_split_code_files():
+    code = three_files()
+    parts = split_code_files(code)
+    assert [path for path, _ in parts] == ["src/a.py", "src/b.py", "src/c.py"]
+    assert "".join(text for _, text in parts) == code
+    assert split_code_files("x = 1") == [("", "x = 1")]
+
+
+def test_unfinished_files_start_at_the_last_reported_file():
+    code = three_files()
+    cut = "<Issues>\n" + xml_issue("CWE-1", "a", "src/a.py") + "\n<Issue><Weakness>CWE-2</Weakness><File>b.py"
+    assert unfinished_files(code, cut).startswith("File name: src/b.py\n")
+    assert "src/a.py" not in unfinished_files(code, cut)
+    assert unfinished_files(code, '[{"File": "src/c.py", "Code": "x"}, {"Weak', structured=True).startswith("File name: src/c.py")
+    # Nothing reported yet, or an unknown file: every file is unfinished
+    assert unfinished_files(code, "<Issues>\n<Iss") == code
+    assert unfinished_files(code, xml_issue("CWE-1", "a", "other.py")) == code
+
+
+def test_continuation_sends_only_unfinished_files_without_standard():
+    code = three_files()
+    first = "<Issues>\n" + xml_issue("CWE-1", "a", "src/a.py") + "\n" + xml_issue("CWE-2", "b", "src/b.py") + "\n<Issue>"
+    second = "<Issues>\n" + xml_issue("CWE-3", "c", "src/c.py") + "\n<Issue><File>src/c.py"
+    third = "<Issues>\n" + xml_issue("CWE-4", "d", "src/c.py") + "\n</Issues>"
+    llm = ScriptedEvaluator([(first, "length"), (second, "length"), (third, "stop")])
+    evaluator = ContinuationEvaluator(llm, max_continuations=2)
+
+    response, _, finish_reason = evaluator.call({"standard": "rules " * 1000, "code_snippet": code})
+    assert finish_reason == "stop" and len(complete_issues(response)[0]) == 4
+
+    continuations = [request for request, _ in llm.requests[1:]]
+    assert all(request["standard"] == CONTINUATION_STANDARD for request in continuations)
+    assert "File name: src/a.py" not in continuations[0]["code_snippet"]
+    assert "CWE-2 in src/b.py" in continuations[0]["code_snippet"]
+    assert "CWE-1 in src/a.py" not in continuations[0]["code_snippet"]
+    assert "File name: src/b.py" not in continuations[1]["code_snippet"]
+    assert len(continuations[1]["code_snippet"]) < len(continuations[0]["code_snippet"]) < len(code)
+
+
+def test_continuation_gives_up_after_max():
+    cut = "<Issues>\n" + xml_issue("CWE-1", "a")
+    llm = ScriptedEvaluator([(cut, "length")] * 3)
+    evaluator = ContinuationEvaluator(llm, max_continuations=2)
+    _, _, finish_reason = evaluator.call({"standard": "", "code_snippet": "code"})
+    assert finish_reason == "length"
+    assert len(llm.requests) == 3
+    assert evaluator.metrics()["incomplete"] == 1
+
+
+def test_expand_line_ranges():
+    file = File(path="src/app.py", content="import os\nx = input()\nos.system(x)\n")
+    response = "<Issues>\n" + xml_issue("CWE-78", "L2-3", "src/app.py") + "\n" + xml_issue("CWE-1", "9-12", "app.py") + "\n</Issues>"
+    expanded = expand_line_ranges(response, [file])
+    assert "<Code>x = input()\nos.system(x)</Code>" in expanded
+    # Out of range: left as reported
+    assert "<Code>9-12</Code>" in expanded
+
+
+def test_expand_line_ranges_escapes_and_caps():
+    file = File(path="a.php", content="\n".join(f"echo '<b>{i}</b>' && $x;" for i in range(1, 100)))
+    expanded = expand_line_ranges(xml_issue("CWE-79", "1-99", "a.php"), [file])
+    code = expanded.split("<Code>")[1].split("</Code>")[0]
+    assert "echo '&lt;b&gt;1&lt;/b&gt;' &amp;&amp; $x;" in code
+    assert code.endswith("...")
+    assert code.count("\n") == 30
@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pytest
+
+for module in ("pandas", "PyPDF2", "langchain_google_genai", "google.generativeai"):
+    pytest.importorskip(module)
+
+import core  # noqa: E402
+from chunker import Chunk  # noqa: E402
+from file import File  # noqa: E402
+from scheduler import ScanBudget  # noqa: E402
+from work_queue import SQLiteWorkQueue  # noqa: E402
+
+
+def chunks(count: int) -> list[tuple[Chunk, float]]:
+    return [(Chunk([File(path=f"f{i}.py", content=f"x = {i}\n")]), 1.0) for i in range(count)]
+
+
+@pytest.fixture
+def queue_url(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'queue.db'}"
+    monkeypatch.setattr(core, "WORK_QUEUE", url)
+    return url
+
+
+def test_time_budget_cancels_uncollected_jobs(queue_url):
+    budget = ScanBudget(seconds=0)
+    assert list(core.iter_queued_chunks(chunks(3), verbose=False, budget=budget)) == []
+    assert len(budget.skipped) == 3
+    assert SQLiteWorkQueue(queue_url[len("sqlite:///"):]).lease() is None
+
+
+def test_closing_the_generator_cancels_the_rest(queue_url):
+    queue = SQLiteWorkQueue(queue_url[len("sqlite:///"):])
+    answered = []
+
+    def worker():
+        # Answer a single job, as a worker that then goes away
+        while (job := queue.lease()) is None:
+            time.sleep(0.01)
+        queue.complete(job, "<Issues>\n</Issues>")
+        answered.append(job.id)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    responses = core.iter_queued_chunks(chunks(3), verbose=False, batch="b")
+    next(responses)
+    responses.close()
+    thread.join()
+
+    assert queue.lease() is None
+    assert list(queue.results("b")) == answered
@@ -0,0 +1,76 @@
+import pytest
+
+from output_control import ContinuationEvaluator
+from replay_evaluator import (
+    Cassette,
+    InjectedLLMError,
+    RecordingEvaluator,
+    ReplayEvaluator,
+    ReplayMissError,
+    prompt_hash,
+)
+
+PROMPT = "{standard}\n{code_snippet}"
+
+
+class ScriptedEvaluator:
+    def __init__(self, responses: list[tuple[str, str]]) -> None:
+        self.model = "scripted"
+        self.system_prompt = PROMPT
+        self.responses = list(responses)
+
+    def call(self, input_variables, max_output_tokens=None):
+        response, finish_reason = self.responses.pop(0)
+        return response, {"prompt_tokens": 1, "output_tokens": 1}, finish_reason
+
+
+def test_cassette_round_trip(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    cassette = Cassette(path)
+    cassette.add("h", "first", 0.5)
+    cassette.add("h", "second", finish_reason="length")
+
+    loaded = Cassette(path)
+    assert len(loaded) == 2
+    assert loaded.get("h", 0)["response"] == "first"
+    assert loaded.get("h", 3)["finish_reason"] == "length"
+    assert loaded.get("unknown") is None
+
+
+def test_replay_cycles_recordings_and_reports_misses():
+    cassette = Cassette()
+    recorder = RecordingEvaluator(ScriptedEvaluator([("one", "stop"), ("two", "stop")]), cassette)
+    payload = {"standard": "s", "code_snippet": "c"}
+    recorder.evaluate(payload)
+    recorder.evaluate(payload)
+
+    replay = ReplayEvaluator(cassette, PROMPT, sleep=lambda seconds: None)
+    assert [replay.evaluate(payload) for _ in range(3)] == ["one", "two", "one"]
+    with pytest.raises(ReplayMissError):
+        replay.evaluate({"standard": "s", "code_snippet": "other"})
+
+
+def test_replayed_continuations_match_recording():
+    cut = "<Issues>\n<Issue><Weakness>CWE-1</Weakness><File>a</File><Code>x</Code></Issue>\n<Issue><Weak"
+    rest = "<Issues>\n<Issue><Weakness>CWE-2</Weakness><File>a</File><Code>y</Code></Issue>\n</Issues>"
+    cassette = Cassette()
+    live = ContinuationEvaluator(RecordingEvaluator(ScriptedEvaluator([(cut, "length"), (rest, "stop")]), cassette))
+    payload = {"standard": "s", "code_snippet": "code"}
+    recorded = live.evaluate(payload)
+
+    replayed = ContinuationEvaluator(ReplayEvaluator(cassette, PROMPT, sleep=lambda seconds: None)).evaluate(payload)
+    assert replayed == recorded
+    assert "CWE-1" in replayed and "CWE-2" in replayed
+
+
+def test_replay_latency_and_injected_errors():
+    cassette = Cassette()
+    cassette.add(prompt_hash("s\nc"), "r", latency=2.0)
+    waits = []
+    replay = ReplayEvaluator(cassette, PROMPT, latency_scale=0.5, sleep=waits.append)
+    replay.evaluate({"standard": "s", "code_snippet": "c"})
+    assert waits == [1.0]
+
+    failing = ReplayEvaluator(cassette, PROMPT, error_rate=1.0, sleep=lambda seconds: None)
+    with pytest.raises(InjectedLLMError):
+        failing.evaluate({"standard": "s", "code_snippet": "c"})
@@ -0,0 +1,39 @@
+import pytest
+
+pl = pytest.importorskip("polars")
+
+from results_store import RESULT_COLUMNS, ResultsStore  # noqa: E402
+
+
+def run(code: str, hit: bool = True) -> dict:
+    row = {column: "" for column in RESULT_COLUMNS}
+    row.update({"Test Case Code": code, "LLM Complete Response": "<Issues></Issues>", "LLM Hit CWE": hit, "LLM Hit Code": hit})
+    return {column: [value] for column, value in row.items()}
+
+
+def test_texts_are_stored_once(tmp_path):
+    store = ResultsStore(tmp_path)
+    store.write_run(run("same code"), "php", "m", 0)
+    store.write_run(run("same code"), "php", "m", 1)
+    store.write_run(run("other code"), "php", "m", 2)
+
+    hashes = store.texts().select("hash").collect()["hash"].to_list()
+    assert len(hashes) == len(set(hashes)) == 3
+
+    # A new store instance reads the stored hashes once and keeps deduplicating
+    again = ResultsStore(tmp_path)
+    again.write_run(run("same code"), "php", "m", 3)
+    assert again.texts().select("hash").collect().height == 3
+
+
+def test_runs_are_partitioned_by_model(tmp_path):
+    store = ResultsStore(tmp_path)
+    store.write_run(run("a", hit=True), "php", "flash", 0)
+    store.write_run(run("a", hit=False), "php", "pro", 0)
+
+    assert store.runs(language="php", model="flash").collect().height == 1
+    models = store.runs(language="php").select("model").unique().collect()["model"].to_list()
+    assert sorted(models) == ["flash", "pro"]
+
+    texts = store.with_texts(store.runs(model="pro")).collect()
+    assert texts["Test Case Code"].to_list() == ["a"]
@@ -0,0 +1,38 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from results_view import ResultsView  # noqa: E402
+
+
+def findings(*rows) -> "pd.DataFrame":
+    return pd.DataFrame(
+        [{"Type": "Security", "Weakness": w, "Severity": s, "File": f, "Code": "x", "Justification": ""} for w, s, f in rows]
+    )
+
+
+def test_filter_sort_and_page():
+    view = ResultsView(findings(("a", "Low", "a.py"), ("b", "Critical", "b.py"), ("c", "High", "a.py")), page_size=1)
+    assert view.apply(filters={"File": ["a.py"]}, sort_by="Severity") == 2
+    assert view.page(1)["Weakness"].tolist() == ["c"]
+    assert view.page(9)["Weakness"].tolist() == ["a"]
+    assert view.page_count == 2
+
+
+def test_extend_keeps_filters_sort_and_page():
+    view = ResultsView(findings(("a", "Low", "a.py")), page_size=1)
+    view.apply(filters={"File": ["a.py"]}, sort_by="Severity")
+    view.render_page(1)
+
+    assert view.extend(findings(("b", "Critical", "a.py"), ("c", "High", "b.py"))) == 2
+    assert view.filters == {"File": ["a.py"]}
+    assert view.df["Weakness"].tolist() == ["a", "b", "c"]
+    assert view.page(1)["Weakness"].tolist() == ["b"]
+    assert view.current_page == 1
+
+
+def test_render_escapes_html_and_tags_severity():
+    view = ResultsView(findings(("<script>", "Critical", "a.py")))
+    html = view.render_page(1)
+    assert "&lt;script&gt;" in html and "<script>" not in html
+    assert "severity-critical" in html
@@ -0,0 +1,100 @@
+from chunker import Chunk
+from file import File
+from import_graph import build_graph_chunks
+from scheduler import ScanBudget, file_risk, prepare_files, prioritize_chunks
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_risky_files_score_higher():
+    risky = File(path="app/controller.php", extension="php", content="$id = $_GET['id'];\neval($id);\n")
+    plain = File(path="app/format.php", extension="php", content="$x = 1;\n")
+    test = File(path="tests/controller.php", extension="php", content=risky.content)
+    assert file_risk(risky) > file_risk(plain)
+    assert file_risk(risky) > file_risk(test)
+
+
+def test_risk_is_kept_after_release():
+    loads = []
+    file = File(path="a.py", extension="py", loader=lambda: loads.append(1) or "os.system(cmd)\n")
+    first = file_risk(file)
+    assert not file.loaded
+    assert file_risk(file) == first
+    assert len(loads) == 1
+
+
+def counted_files(contents: dict[str, str], loads: dict[str, int]) -> list[File]:
+    def loader(path):
+        def load():
+            loads[path] = loads.get(path, 0) + 1
+            return contents[path]
+        return load
+    return [File(path=path, extension=path.split(".")[-1], loader=loader(path)) for path in contents]
+
+
+def test_prepared_files_are_read_once_per_scan():
+    contents = {"app.py": "import util\nos.system(cmd)\n", "util.py": "x = 1\n", "é.py": "s = 'ééé'\n"}
+    loads = {}
+    files = counted_files(contents, loads)
+
+    prepare_files(files)
+    prepare_files(files)
+    for chunk in build_graph_chunks(files, max_chars=1000):
+        chunk.text
+        chunk.release()
+
+    assert loads == dict.fromkeys(contents, 1)
+    assert [file.size for file in files] == [len(content) for content in contents.values()]
+
+
+def test_prepared_content_beyond_the_limit_is_released():
+    loads = {}
+    files = counted_files({"a.py": "a" * 10, "b.py": "b" * 10}, loads)
+    prepare_files(files, max_chars=15)
+    assert [file.loaded for file in files] == [True, False]
+    assert files[1].size == 10 and loads == {"a.py": 1, "b.py": 1}
+
+
+def test_prioritize_chunks_riskiest_first_and_stable():
+    low = Chunk([File(path="a.txt", extension="txt", content="hello\n")])
+    high = Chunk([File(path="main.py", extension="py", content="exec(input())\n")])
+    low_again = Chunk([File(path="b.txt", extension="txt", content="hello\n")])
+    ordered = [chunk for chunk, _ in prioritize_chunks([low, high, low_again])]
+    assert ordered == [high, low, low_again]
+
+
+def test_time_budget_counts_from_start():
+    clock = FakeClock()
+    budget = ScanBudget(seconds=10, clock=clock)
+    chunk = Chunk([File(path="a.py", extension="py", content="x = 1\n" * 100)])
+
+    budget.start()
+    clock.now += 2  # loading and chunking
+    budget.start()  # a later start keeps the first one
+    assert budget.elapsed == 2
+    assert budget.admit(chunk) is None
+
+    clock.now += 5
+    budget.record(chunk, 1.0, seconds=5, tokens=10)
+    # The next chunk of the same size is predicted to take 5 more seconds
+    assert budget.admit(chunk) == "time budget"
+
+
+def test_token_budget_and_report():
+    budget = ScanBudget(tokens=100, overhead_tokens=50)
+    small = Chunk([File(path="a.py", extension="py", content="x" * 40)])
+    large = Chunk([File(path="b.py", extension="py", content="x" * 400)])
+    assert budget.admit(small) is None
+    budget.record(small, 2.0, seconds=0.1, tokens=budget.predicted_tokens(small))
+    assert budget.admit(large) == "token budget"
+    budget.skip(large, 1.0, "token budget")
+
+    report = budget.report()
+    assert report["scanned_files"] == 1
+    assert report["unscanned"] == [{"file": "b.py", "risk": 1.0, "reason": "token budget"}]
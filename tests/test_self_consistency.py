@@ -0,0 +1,83 @@
+import json
+import threading
+
+import pytest
+
+from self_consistency import SelfConsistencyEvaluator, finding_key
+
+
+class SampleEvaluator:
+    def __init__(self, responses: list[list[dict]]) -> None:
+        self.responses = [json.dumps(findings) for findings in responses]
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def call(self, input_variables, max_output_tokens=None):
+        with self._lock:
+            response = self.responses[self.calls % len(self.responses)]
+            self.calls += 1
+        return response, {"prompt_tokens": 3, "output_tokens": 2}, "stop"
+
+
+SQLI = {"Weakness": "CWE-89", "Code": "query = 'SELECT ' + id"}
+XSS = {"Weakness": "CWE-79", "Code": "echo $name;"}
+
+
+def test_finding_key_normalizes_code():
+    assert finding_key({"Weakness": "cwe-89 ", "Code": "a =  b\n  c\n..."}) == ("CWE-89", "a = b c")
+
+
+def test_majority_vote_with_confidence():
+    evaluator = SampleEvaluator([[SQLI, XSS], [SQLI], [SQLI, SQLI]])
+    consistency = SelfConsistencyEvaluator(evaluator, json.loads, samples=3)
+    findings = consistency.evaluate_findings({})
+    # Sampling may stop early once the vote is decided
+    assert [f["Weakness"] for f in findings] == ["CWE-89"]
+    assert findings[0]["Votes"] >= 2
+    assert findings[0]["Confidence"] == 1.0
+
+
+def test_unanimous_samples_stop_before_sending_the_rest():
+    evaluator = SampleEvaluator([[SQLI]])
+    consistency = SelfConsistencyEvaluator(evaluator, json.loads, samples=5)
+    findings = consistency.evaluate_findings({})
+    assert [f["Votes"] for f in findings] == [3]
+    assert evaluator.calls == 3
+    assert consistency.last_run["sent"] == 3 and consistency.last_run["skipped"] == 2
+
+
+def test_failed_samples_are_replaced():
+    class Flaky(SampleEvaluator):
+        def call(self, input_variables, max_output_tokens=None):
+            with self._lock:
+                self.calls += 1
+                if self.calls == 1:
+                    raise RuntimeError("down")
+            return json.dumps([SQLI]), {}, "stop"
+
+    evaluator = Flaky([[]])
+    consistency = SelfConsistencyEvaluator(evaluator, json.loads, samples=5)
+    assert [f["Votes"] for f in consistency.evaluate_findings({})] == [3]
+    assert evaluator.calls == 4 and consistency.last_run["failed"] == 1
+
+
+def test_quorum_of_one_keeps_every_finding():
+    evaluator = SampleEvaluator([[SQLI], [XSS]])
+    findings = SelfConsistencyEvaluator(evaluator, json.loads, samples=2, quorum=1).evaluate_findings({})
+    assert sorted(f["Weakness"] for f in findings) == ["CWE-79", "CWE-89"]
+
+
+def test_all_samples_failing_raises():
+    class Failing(SampleEvaluator):
+        def call(self, input_variables, max_output_tokens=None):
+            raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError, match="samples failed"):
+        SelfConsistencyEvaluator(Failing([[]]), json.loads, samples=3).evaluate_findings({})
+
+
+def test_invalid_settings():
+    with pytest.raises(ValueError):
+        SelfConsistencyEvaluator(SampleEvaluator([[]]), json.loads, samples=0)
+    with pytest.raises(ValueError):
+        SelfConsistencyEvaluator(SampleEvaluator([[]]), json.loads, samples=3, quorum=4)
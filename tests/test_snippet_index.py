@@ -0,0 +1,44 @@
+from file import File
+from snippet_index import SnippetIndex
+
+SOURCE = """<?php
+$id = $_GET['id'];
+
+$query = "SELECT * FROM users WHERE id = " . $id;
+$result = mysqli_query($conn, $query);
+echo $result;
+"""
+
+
+def test_locate_exact_snippet_with_blank_lines():
+    index = SnippetIndex([File(path="app/user.php", content=SOURCE)])
+    match = index.locate("$query = \"SELECT * FROM users WHERE id = \" . $id;\n$result = mysqli_query($conn, $query);")
+    assert (match.path, match.start, match.end) == ("app/user.php", 4, 5)
+    assert match.score == 1.0
+
+
+def test_locate_tolerates_whitespace_and_small_edits():
+    index = SnippetIndex([File(path="user.php", content=SOURCE)])
+    match = index.locate("$result   =  mysqli_query($conn,$query)")
+    assert (match.start, match.end) == (5, 5)
+
+
+def test_locate_rejects_hallucinated_code():
+    index = SnippetIndex([File(path="user.php", content=SOURCE)])
+    assert index.locate("subprocess.call(command, shell=True)") is None
+    assert index.locate("") is None
+
+
+def test_file_field_breaks_ties():
+    files = [File(path="a/util.php", content="echo $x;\n"), File(path="b/view.php", content="echo $x;\n")]
+    index = SnippetIndex(files)
+    assert index.locate("echo $x;", "view.php").path == "b/view.php"
+    assert index.locate("echo $x;", "a/util.php").path == "a/util.php"
+
+
+def test_add_releases_only_content_it_loaded():
+    lazy = File(path="lazy.php", loader=lambda: SOURCE)
+    loaded = File(path="loaded.php", content=SOURCE)
+    SnippetIndex([lazy, loaded])
+    assert not lazy.loaded
+    assert loaded.loaded
@@ -0,0 +1,66 @@
+import json
+
+from structured_output import ParsedResponse, StructuredOutputParser, first_object, salvage_fields, split_json_array
+
+FIELDS = ["Type", "Severity", "Weakness", "File", "Code"]
+
+
+def issue(code: str) -> dict:
+    return {"Type": "Security", "Severity": "High", "Weakness": "CWE-89", "File": "a.py", "Code": code}
+
+
+def test_split_json_array_complete():
+    items, tail = split_json_array(json.dumps([issue("x"), issue("y")]))
+    assert [item["Code"] for item in items] == ["x", "y"]
+    assert tail == ""
+
+
+def test_split_json_array_truncated_keeps_complete_items():
+    text = json.dumps([issue("x"), issue("y")])
+    items, tail = split_json_array(text[:-20])
+    assert [item["Code"] for item in items] == ["x"]
+    assert tail.startswith("{")
+
+
+def test_split_json_array_reads_first_of_several_arrays():
+    text = json.dumps([issue("x")]) + "\n" + json.dumps([issue("y")])
+    items, tail = split_json_array(text)
+    assert [item["Code"] for item in items] == ["x"]
+    assert tail == ""
+
+
+def test_split_json_array_without_array():
+    assert split_json_array("no json here") == ([], "no json here")
+
+
+def test_first_object_stops_at_next_object():
+    assert first_object('{"a": "1", "b": "{x}"} trailing') == '{"a": "1", "b": "{x}"}'
+    assert first_object('{"a": "1", {"b": "2"}') == '{"a": "1", '
+
+
+def test_salvage_fields_ignores_later_objects():
+    fragment = '{"Weakness": "CWE-79", "File": "a.py", "Code": "echo $x"}, {"Weakness": "CWE-89", "File": "b.p'
+    assert salvage_fields(fragment) == {"Weakness": "CWE-79", "File": "a.py", "Code": "echo $x"}
+
+
+def test_parse_drops_ungrounded_issue_without_reask():
+    asked = []
+    parser = StructuredOutputParser(FIELDS, reask=lambda prompt: asked.append(prompt) or "{}")
+    response = json.dumps([{"Type": "Security", "Severity": "High", "Weakness": "CWE-89", "File": "a.py"}])
+    assert parser.parse(response) == []
+    assert asked == []
+    assert parser.metrics()["dropped_issues"] == 1
+
+
+def test_parse_reasks_missing_fields_of_grounded_issue():
+    parser = StructuredOutputParser(FIELDS, reask=lambda prompt: '{"Severity": "low"}')
+    partial = {key: value for key, value in issue("x").items() if key != "Severity"}
+    assert parser.parse(json.dumps([partial])) == [{**partial, "Severity": "Low"}]
+
+
+def test_parsed_response_is_not_parsed_again():
+    parser = StructuredOutputParser(FIELDS)
+    merged = ParsedResponse(parser.parse(json.dumps([issue("x")])) + parser.parse(json.dumps([issue("y")])))
+    assert json.loads(merged) == [issue("x"), issue("y")]
+    assert parser.parse(merged) == [issue("x"), issue("y")]
+    assert parser.metrics()["responses"] == 2 and parser.metrics()["valid"] == 2
@@ -0,0 +1,96 @@
+import pytest
+
+from work_queue import LocalRedis, RedisWorkQueue, SQLiteWorkQueue, WorkQueue
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def queue(request, tmp_path) -> WorkQueue:
+    if request.param == "sqlite":
+        return SQLiteWorkQueue(str(tmp_path / "queue.db"), max_attempts=2)
+    return RedisWorkQueue(LocalRedis(), max_attempts=2)
+
+
+def test_put_is_idempotent(queue):
+    assert queue.put("b", "j1", {"code": "x"})
+    assert not queue.put("b", "j1", {"code": "y"})
+    job = queue.lease()
+    assert (job.id, job.batch, job.payload, job.attempts) == ("j1", "b", {"code": "x"}, 1)
+    assert queue.lease() is None
+
+
+def test_leases_follow_enqueue_order(queue):
+    for i in range(5):
+        queue.put("b", f"j{i}", {"i": i})
+    assert [queue.lease().id for _ in range(5)] == [f"j{i}" for i in range(5)]
+
+
+def test_expired_lease_is_requeued_then_failed(queue):
+    queue.put("b", "j1", {})
+    first = queue.lease(visibility_timeout=0)
+    second = queue.lease(visibility_timeout=0)
+    assert second.id == "j1" and second.attempts == 2
+    assert second.token != first.token
+
+    # The stale worker can no longer extend or fail the job
+    assert not queue.extend(first)
+    queue.fail(first, "stale")
+    assert queue.failures("b") == {}
+
+    assert queue.lease() is None
+    assert queue.failures("b") == {"j1": "Lease expired"}
+
+
+def test_complete_stores_first_result_only(queue):
+    queue.put("b", "j1", {})
+    queue.put("b", "j2", {})
+    job = queue.lease()
+    assert queue.complete(job, "result")
+    assert not queue.complete(job, "again")
+    assert queue.results("b") == {"j1": "result"}
+    assert queue.results("b", ["j1", "j2"]) == {"j1": "result"}
+    assert queue.results("b", []) == {}
+
+
+def test_failed_job_is_retried_until_max_attempts(queue, monkeypatch):
+    monkeypatch.setattr("work_queue.RETRY_DELAY", 0)
+    queue.put("b", "j1", {})
+    queue.fail(queue.lease(), "boom")
+    job = queue.lease()
+    assert job.attempts == 2
+    queue.fail(job, "boom again")
+    assert queue.lease() is None
+    assert queue.failures("b", ["j1"]) == {"j1": "boom again"}
+
+
+def test_results_of_many_ids(queue):
+    for i in range(1200):
+        queue.put("b", f"j{i}", {})
+    for _ in range(1200):
+        job = queue.lease()
+        queue.complete(job, job.id.upper())
+    ids = [f"j{i}" for i in range(1200)]
+    assert queue.results("b", ids) == {job_id: job_id.upper() for job_id in ids}
+
+
+def test_cancel_removes_pending_jobs_only(queue):
+    for i in range(3):
+        queue.put("b", f"j{i}", {})
+    queue.put("other", "k", {})
+    done = queue.lease()
+    queue.complete(done, "result")
+    leased = queue.lease()
+
+    assert queue.cancel("b", ["j0", "j1", "j2", "k"]) == 2
+    assert queue.lease().id == "k"
+    assert queue.lease() is None
+    assert queue.results("b") == {"j0": "result"}
+
+    # A job cancelled while leased is neither retried nor reported as failed
+    queue.fail(leased, "boom")
+    assert queue.lease() is None
+    assert queue.failures("b") == {}
+
+
+def test_work_queue_is_abstract():
+    with pytest.raises(TypeError):
+        WorkQueue()
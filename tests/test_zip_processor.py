@@ -0,0 +1,63 @@
+import io
+import zipfile
+
+import pytest
+
+from zip_processor import UnsafeZipError, ZipFileProcessor
+
+
+def make_zip(members: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def test_files_are_filtered_and_loaded_lazily():
+    data = make_zip({"src/a.py": b"print(1)\n", "README.md": b"# x\n", "src/": b""})
+    with ZipFileProcessor(data) as processor:
+        files = processor.get_all_files(["py"])
+        assert [file.path for file in files] == ["src/a.py"]
+        assert not files[0].loaded
+        assert files[0].content == "print(1)\n"
+
+
+def test_lazy_file_reopens_closed_archive_for_the_read_only():
+    processor = ZipFileProcessor(make_zip({"a.py": b"x = 1\n"}))
+    with processor:
+        files = processor.get_all_files(["py"])
+    assert files[0].content == "x = 1\n"
+    assert processor._zip_ref is None
+
+
+def test_rejects_too_many_members():
+    data = make_zip({f"f{i}.py": b"x" for i in range(5)})
+    with ZipFileProcessor(data, max_members=4) as processor:
+        with pytest.raises(UnsafeZipError, match="members"):
+            processor.get_all_files(["py"])
+
+
+def test_rejects_large_file_and_total():
+    data = make_zip({"a.py": b"a" * 100, "b.py": b"b" * 100})
+    with ZipFileProcessor(data, max_file_size=50, max_compression_ratio=1000) as processor:
+        with pytest.raises(UnsafeZipError, match="a.py"):
+            processor.get_all_files(["py"])
+    with ZipFileProcessor(data, max_total_size=150, max_compression_ratio=1000) as processor:
+        with pytest.raises(UnsafeZipError, match="total"):
+            processor.get_all_files(["py"])
+
+
+def test_rejects_high_compression_ratio():
+    data = make_zip({"bomb.py": b"0" * 1_000_000})
+    with ZipFileProcessor(data) as processor:
+        with pytest.raises(UnsafeZipError, match="compression ratio"):
+            processor.get_all_files(["py"])
+
+
+def test_rejects_large_archive():
+    data = make_zip({"a.py": b"x = 1\n"})
+    with ZipFileProcessor(data, max_archive_size=len(data) - 1) as processor:
+        with pytest.raises(UnsafeZipError, match="Archive is"):
+            processor.get_all_files(["py"])
+